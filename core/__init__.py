@@ -0,0 +1,3 @@
+# Bumped with every snapshot (see snapshots/). Anything derived from asset
+# data and persisted to disk (e.g. .grekocache files) is keyed on this.
+ENGINE_VERSION = "3.3"
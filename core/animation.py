@@ -0,0 +1,346 @@
+"""
+glTF animation clips, sampled for every channel at once.
+
+Keyframes are decoded through the accessor layer once, when the clip is
+loaded. Channels are grouped by (path, interpolation) and padded to the
+same key count, so sampling a clip is a handful of NumPy calls however
+many bones it drives. Each player remembers the current keyframe of every
+channel; during forward playback that index only ever moves by a step or
+two, so there is no per-frame binary search.
+
+Only joints of the target skeleton are animated. "weights" (morph) channels
+are skipped for now; expressions are driven by the behaviours.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.gltf_accessors import read_accessor_array
+
+
+_PATH_WIDTH = {"translation": 3, "rotation": 4, "scale": 3}
+_INTERPOLATIONS = ("LINEAR", "STEP", "CUBICSPLINE")
+
+# Forward steps tried before the cursor is re-found from scratch
+_MAX_CURSOR_STEPS = 4
+
+
+# ==========================
+# Quaternion helpers (xyzw, batched over rows)
+# ==========================
+def normalize_quaternions(q: np.ndarray) -> np.ndarray:
+    length = np.linalg.norm(q, axis=-1, keepdims=True)
+    return q / np.maximum(length, 1e-12)
+
+
+def quaternion_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Hamilton product a * b (apply b, then a)."""
+    ax, ay, az, aw = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bx, by, bz, bw = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=-1)
+
+
+def quaternion_conjugate(q: np.ndarray) -> np.ndarray:
+    """Inverse of a unit quaternion."""
+    return q * np.array([-1.0, -1.0, -1.0, 1.0], dtype=q.dtype)
+
+
+def nlerp(q0: np.ndarray, q1: np.ndarray, alpha) -> np.ndarray:
+    """Normalized lerp along the short arc. Cheap; fine for small angles and blending."""
+    alpha = np.asarray(alpha, dtype=np.float32)
+    if alpha.ndim:
+        alpha = alpha.reshape(-1, 1)
+
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0.0, -q1, q1)
+    return normalize_quaternions(q0 + (q1 - q0) * alpha)
+
+
+def slerp(q0: np.ndarray, q1: np.ndarray, alpha) -> np.ndarray:
+    """Spherical lerp along the short arc; falls back to nlerp for nearly equal rotations."""
+    alpha = np.asarray(alpha, dtype=np.float32)
+    if alpha.ndim:
+        alpha = alpha.reshape(-1, 1)
+
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0.0, -q1, q1)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    near = sin_theta < 1e-5
+    safe_sin = np.where(near, 1.0, sin_theta)
+
+    w0 = np.where(near, 1.0 - alpha, np.sin((1.0 - alpha) * theta) / safe_sin)
+    w1 = np.where(near, alpha, np.sin(alpha * theta) / safe_sin)
+    return normalize_quaternions(w0 * q0 + w1 * q1)
+
+
+# ==========================
+# Clip data
+# ==========================
+@dataclass
+class ChannelGroup:
+    """All channels of one clip sharing a target path and interpolation."""
+    path: str                  # "translation" | "rotation" | "scale"
+    interpolation: str         # "LINEAR" | "STEP" | "CUBICSPLINE"
+    joints: np.ndarray         # (C,) skeleton joint per channel
+    counts: np.ndarray         # (C,) real key count per channel
+    times: np.ndarray          # (C, K) padded by repeating the last key
+    values: np.ndarray         # (C, K, D)
+    in_tangents: Optional[np.ndarray] = None   # CUBICSPLINE only, (C, K, D)
+    out_tangents: Optional[np.ndarray] = None
+
+    @property
+    def channel_count(self) -> int:
+        return len(self.joints)
+
+
+@dataclass
+class AnimationClip:
+    name: str
+    duration: float
+    groups: List[ChannelGroup]
+    joints: Optional[np.ndarray] = None   # every joint the clip touches
+
+    def __post_init__(self):
+        if self.joints is None:
+            touched = [g.joints for g in self.groups]
+            self.joints = np.unique(np.concatenate(touched)) if touched else np.zeros(0, dtype=np.intp)
+
+
+def _pad_keys(arrays: List[np.ndarray], width: int) -> np.ndarray:
+    key_count = max(len(a) for a in arrays)
+    out = np.empty((len(arrays), key_count) + ((width,) if width else ()), dtype=np.float32)
+    for i, a in enumerate(arrays):
+        out[i, :len(a)] = a
+        out[i, len(a):] = a[-1]
+    return out
+
+
+def _joint_lookup(gltf_json, skeleton, by_name: bool) -> Dict[int, int]:
+    """Animation node index → skeleton joint index."""
+    if not by_name:
+        return dict(skeleton.joint_index_map)
+
+    joint_by_name = {
+        skeleton.nodes[node_index].get("name"): i
+        for i, node_index in enumerate(skeleton.joint_nodes)
+    }
+    lookup = {}
+    for node_index, node in enumerate(gltf_json.get("nodes", [])):
+        joint = joint_by_name.get(node.get("name"))
+        if joint is not None:
+            lookup[node_index] = joint
+    return lookup
+
+
+def load_animations(gltf_json, bin_blob, skeleton, by_name: bool = False) -> List[AnimationClip]:
+    """
+    Decodes every clip in gltf_json["animations"] for `skeleton`.
+    by_name matches channel targets to joints by node name, for clips that
+    come from a different file than the model.
+    """
+    lookup = _joint_lookup(gltf_json, skeleton, by_name)
+    clips = []
+
+    for clip_index, animation in enumerate(gltf_json.get("animations", [])):
+        samplers = animation["samplers"]
+        decoded_inputs: Dict[int, np.ndarray] = {}
+        buckets: Dict[tuple, list] = {}
+        duration = 0.0
+
+        for channel in animation["channels"]:
+            target = channel["target"]
+            path = target["path"]
+            joint = lookup.get(target.get("node"))
+            if path not in _PATH_WIDTH or joint is None:
+                continue
+
+            sampler = samplers[channel["sampler"]]
+            interpolation = sampler.get("interpolation", "LINEAR")
+            if interpolation not in _INTERPOLATIONS:
+                print(f"[ANIM] ⚠ Unknown interpolation {interpolation}, using LINEAR")
+                interpolation = "LINEAR"
+
+            # Inputs are often shared between channels; decode each once
+            input_index = sampler["input"]
+            times = decoded_inputs.get(input_index)
+            if times is None:
+                times = read_accessor_array(gltf_json, bin_blob, input_index).astype(np.float32).reshape(-1)
+                decoded_inputs[input_index] = times
+            if len(times) == 0:
+                continue
+
+            width = _PATH_WIDTH[path]
+            values = read_accessor_array(gltf_json, bin_blob, sampler["output"]).astype(np.float32)
+            values = values.reshape(-1, width)
+
+            duration = max(duration, float(times[-1]))
+            buckets.setdefault((path, interpolation), []).append((joint, times, values))
+
+        groups = []
+        for (path, interpolation), channels in buckets.items():
+            width = _PATH_WIDTH[path]
+            joints = np.array([c[0] for c in channels], dtype=np.intp)
+            counts = np.array([len(c[1]) for c in channels], dtype=np.intp)
+            times = _pad_keys([c[1] for c in channels], 0)
+
+            in_tangents = out_tangents = None
+            if interpolation == "CUBICSPLINE":
+                # Stored as (in-tangent, value, out-tangent) per key
+                triples = [c[2].reshape(-1, 3, width) for c in channels]
+                in_tangents = _pad_keys([t[:, 0] for t in triples], width)
+                values = _pad_keys([t[:, 1] for t in triples], width)
+                out_tangents = _pad_keys([t[:, 2] for t in triples], width)
+            else:
+                values = _pad_keys([c[2] for c in channels], width)
+
+            groups.append(ChannelGroup(
+                path=path,
+                interpolation=interpolation,
+                joints=joints,
+                counts=counts,
+                times=times,
+                values=values,
+                in_tangents=in_tangents,
+                out_tangents=out_tangents,
+            ))
+
+        name = animation.get("name") or f"clip_{clip_index}"
+        clips.append(AnimationClip(name=name, duration=duration, groups=groups))
+
+    return clips
+
+
+# ==========================
+# Sampling
+# ==========================
+def _locate(group: ChannelGroup, cursor: np.ndarray, t: float) -> None:
+    """Moves cursor (C,) to the last key with time <= t (0 before the first key)."""
+    rows = np.arange(group.channel_count)
+    last = group.counts - 1
+
+    # FLAG: Cached Keyframe
+    # Forward playback: a step or two from last frame's key.
+    behind = (cursor > 0) & (group.times[rows, cursor] > t)
+    if not behind.any():
+        for _ in range(_MAX_CURSOR_STEPS):
+            nxt = np.minimum(cursor + 1, last)
+            step = (nxt > cursor) & (group.times[rows, nxt] <= t)
+            if not step.any():
+                return
+            cursor += step
+
+    # Seek, loop wrap or a big jump: find it from scratch (still one call)
+    found = np.sum(group.times <= t, axis=1) - 1
+    np.clip(found, 0, last, out=found)
+    cursor[:] = found
+
+
+def _sample_group(group: ChannelGroup, cursor: np.ndarray, t: float) -> np.ndarray:
+    _locate(group, cursor, t)
+
+    if group.interpolation == "STEP":
+        return group.values[np.arange(group.channel_count), cursor]
+
+    rows = np.arange(group.channel_count)
+    k0 = np.clip(np.minimum(cursor, group.counts - 2), 0, None)
+    k1 = np.minimum(k0 + 1, group.counts - 1)
+
+    t0 = group.times[rows, k0]
+    t1 = group.times[rows, k1]
+    span = t1 - t0
+    safe_span = np.where(span > 0.0, span, 1.0)
+    alpha = np.where(span > 0.0, np.clip((t - t0) / safe_span, 0.0, 1.0), 0.0).astype(np.float32)
+
+    v0 = group.values[rows, k0]
+    v1 = group.values[rows, k1]
+
+    if group.interpolation == "CUBICSPLINE":
+        # Hermite spline, glTF 2.0 spec appendix C
+        s = alpha[:, None]
+        s2, s3 = s * s, s * s * s
+        dt = span[:, None]
+        b0 = group.out_tangents[rows, k0]
+        a1 = group.in_tangents[rows, k1]
+        out = (
+            (2 * s3 - 3 * s2 + 1) * v0
+            + (s3 - 2 * s2 + s) * dt * b0
+            + (-2 * s3 + 3 * s2) * v1
+            + (s3 - s2) * dt * a1
+        )
+        if group.path == "rotation":
+            out = normalize_quaternions(out)
+        return out
+
+    if group.path == "rotation":
+        return slerp(v0, v1, alpha)
+    return v0 + (v1 - v0) * alpha[:, None]
+
+
+class AnimationPlayer:
+    """
+    Plays one clip on one skeleton, writing straight into its local TRS
+    arrays and re-composing the touched joints' local matrices.
+
+    `target` redirects the output into anything else with translations /
+    rotations / scales arrays (a pose.Pose feeding a PoseBlender layer);
+    nothing is composed then, the blender does that once for all layers.
+    """
+
+    def __init__(self, skeleton, clip: AnimationClip, loop: bool = True, speed: float = 1.0, target=None):
+        self.skeleton = skeleton
+        self.target = skeleton if target is None else target
+        self.clip = clip
+        self.loop = loop
+        self.speed = speed
+        self.time = 0.0
+        self.playing = True
+
+        # Per-channel keyframe cursors, one array per group
+        self._cursors = [np.zeros(g.channel_count, dtype=np.intp) for g in clip.groups]
+
+        self._targets = {
+            "translation": self.target.translations,
+            "rotation": self.target.rotations,
+            "scale": self.target.scales,
+        }
+
+    def seek(self, t: float) -> None:
+        self.time = t
+        self.apply()
+
+    def advance(self, dt: float) -> None:
+        if not self.playing:
+            return
+
+        t = self.time + dt * self.speed
+        duration = self.clip.duration
+
+        if duration > 0.0:
+            if self.loop:
+                t %= duration
+            elif t >= duration:
+                t = duration
+                self.playing = False
+            elif t < 0.0:
+                t = 0.0
+                self.playing = False
+
+        self.time = t
+        self.apply()
+
+    def apply(self) -> None:
+        """Samples the clip at self.time into the skeleton."""
+        for group, cursor in zip(self.clip.groups, self._cursors):
+            self._targets[group.path][group.joints] = _sample_group(group, cursor, self.time)
+
+        if self.target is self.skeleton:
+            self.skeleton.compose_locals(self.clip.joints)
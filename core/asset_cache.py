@@ -0,0 +1,674 @@
+"""
+Persistent pre-cooked asset cache (.grekocache).
+
+A cache file sits next to its source (`kisayo.vrm` → `kisayo.vrm.grekocache`)
+and holds everything the loader would otherwise rebuild on every launch:
+GPU-ready vertex/index/morph arrays per primitive, the skin's inverse-bind
+matrices and decoded RGBA mip chains per image.
+
+File layout (all little-endian):
+
+    [0:8)    magic  b"GREKOCH\\0"
+    [8:12)   cache format version (u32)
+    [12:16)  reserved
+    [16:24)  manifest offset (u64)
+    [24:32)  manifest length (u64)
+    [32:40)  source mtime in ns (i64), patched in place after a touch
+    ...      raw array blobs, each 64-byte aligned
+    ...      manifest (UTF-8 JSON)
+
+Warm starts mmap the file and wrap every blob with a zero-copy NumPy view.
+
+CLI:
+    python -m core.asset_cache cook assets/kisayo.vrm [--force]
+    python -m core.asset_cache verify assets/kisayo.vrm [--deep]
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from core import ENGINE_VERSION
+from core.glb_parser import parse_glb
+from core.gltf_accessors import read_accessor_array
+from core.loader import package_all_primitives
+from core.mesh_data import package_mesh, read_image_bytes
+from core.morph_stack import MorphStack
+
+
+CACHE_MAGIC = b"GREKOCH\0"
+CACHE_FORMAT_VERSION = 3
+CACHE_SUFFIX = ".grekocache"
+
+_HEADER = struct.Struct("<8sIIQQq")
+_MTIME_OFFSET = 32
+_BLOB_ALIGN = 64
+_HASH_CHUNK = 8 * 1024 * 1024
+
+# package_mesh keys that are stored as blobs
+_PRIMITIVE_ARRAYS = ("vertices", "normals", "uvs", "joints", "weights", "indices")
+
+
+class AssetCacheError(RuntimeError):
+    pass
+
+
+@dataclass
+class CookedAsset:
+    path: Path
+    manifest: dict
+    gltf: dict
+    primitives: List[dict]
+    inverse_bind: Optional[np.ndarray]
+    # glTF image index → RGBA mip chain, level 0 first
+    textures: Dict[int, List[np.ndarray]] = field(default_factory=dict)
+    # Keeps the file mapped while any view above is alive
+    mapping: Optional[mmap.mmap] = None
+
+
+def cache_path_for(source: str | Path) -> Path:
+    source = Path(source)
+    return source.with_name(source.name + CACHE_SUFFIX)
+
+
+def hash_file(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Mip chain
+# ---------------------------------------------------------------------------
+
+def _srgb_to_linear_lut() -> np.ndarray:
+    c = np.arange(256, dtype=np.float32) / 255.0
+    return np.where(
+        c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4
+    ).astype(np.float32)
+
+
+_SRGB_TO_LINEAR = _srgb_to_linear_lut()
+
+
+def _linear_to_srgb(c: np.ndarray) -> np.ndarray:
+    c = np.clip(c, 0.0, 1.0)
+    return np.where(
+        c <= 0.0031308, c * 12.92, 1.055 * np.power(c, 1.0 / 2.4) - 0.055
+    )
+
+
+def build_mip_chain(rgba: np.ndarray, srgb: bool = True) -> List[np.ndarray]:
+    """
+    Box-filtered mip chain down to 1x1, same level sizes as glGenerateMipmap.
+    Colour channels are averaged in linear space for sRGB textures; alpha is
+    always linear.
+    """
+    levels = [np.ascontiguousarray(rgba, dtype=np.uint8)]
+
+    if srgb:
+        current = np.empty(rgba.shape, dtype=np.float32)
+        current[..., :3] = _SRGB_TO_LINEAR[rgba[..., :3]]
+        current[..., 3] = rgba[..., 3] / np.float32(255.0)
+    else:
+        current = rgba.astype(np.float32) / np.float32(255.0)
+
+    while current.shape[0] > 1 or current.shape[1] > 1:
+        h, w = current.shape[:2]
+
+        # Odd sizes drop the last row/column (GL floors level sizes)
+        if h > 1:
+            current = 0.5 * (current[0:h - 1:2] + current[1:h:2])
+        if w > 1:
+            current = 0.5 * (current[:, 0:w - 1:2] + current[:, 1:w:2])
+
+        out = np.empty(current.shape, dtype=np.float32)
+        if srgb:
+            out[..., :3] = _linear_to_srgb(current[..., :3])
+            out[..., 3] = current[..., 3]
+        else:
+            out[:] = current
+
+        levels.append(
+            np.ascontiguousarray(np.rint(out * 255.0), dtype=np.uint8)
+        )
+
+    return levels
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+class _BlobWriter:
+    def __init__(self, f):
+        self.f = f
+        self.table = {}
+
+    def add(self, key: str, array: np.ndarray) -> str:
+        array = np.ascontiguousarray(array)
+
+        offset = self.f.tell()
+        pad = (-offset) % _BLOB_ALIGN
+        if pad:
+            self.f.write(b"\0" * pad)
+            offset += pad
+
+        data = memoryview(array).cast("B")
+        self.f.write(data)
+
+        self.table[key] = {
+            "offset": offset,
+            "dtype": array.dtype.newbyteorder("<").str,
+            "shape": list(array.shape),
+            "nbytes": array.nbytes,
+            "crc32": zlib.crc32(data),
+        }
+        return key
+
+
+def write_cache(
+    source: str | Path,
+    gltf: dict,
+    primitives: Iterable[dict],
+    inverse_bind: Optional[np.ndarray],
+    load_textures: Callable[[List[int]], Dict[int, List[np.ndarray]]],
+    source_hash: Optional[str] = None,
+    stat: Optional[os.stat_result] = None,
+) -> Path:
+    """
+    Writes the .grekocache for data that is already packaged: `primitives`
+    are package_mesh outputs carrying mesh_index/prim_index/mesh_name, and
+    load_textures(image indices) returns the mip chains of the ones it
+    could decode. Pass source_hash/stat when taken before parsing, so a
+    file changed in between is caught by the next load.
+    """
+    source = Path(source)
+    if source_hash is None:
+        source_hash = hash_file(source)
+    if stat is None:
+        stat = source.stat()
+
+    out_path = cache_path_for(source)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * _HEADER.size)
+            blobs = _BlobWriter(f)
+
+            records = []
+            image_indices = set()
+
+            for packed in primitives:
+                prefix = f"m{packed['mesh_index']}.p{packed['prim_index']}"
+
+                record = {
+                    "mesh_index": packed["mesh_index"],
+                    "prim_index": packed["prim_index"],
+                    "mesh_name": packed["mesh_name"],
+                    "image_index": packed["image_index"],
+                    "sampler_index": packed["sampler_index"],
+                    "base_color_factor": list(packed["base_color_factor"]),
+                    "arrays": {},
+                    "morph_names": list(packed["morph_targets"].keys()),
+                    "morphs": None,
+                    "morph_normals": None,
+                    "morph_ranges": None,
+                }
+
+                for name in _PRIMITIVE_ARRAYS:
+                    record["arrays"][name] = blobs.add(
+                        f"{prefix}.{name}", packed[name]
+                    )
+
+                # FLAG: One Morph Blob
+                # The MorphStack is already (targets, vertices, 3), stored as-is
+                stack = packed["morph_targets"]
+                if len(stack):
+                    record["morphs"] = blobs.add(f"{prefix}.morphs", stack.deltas)
+                    record["morph_ranges"] = blobs.add(f"{prefix}.morph_ranges", stack.ranges)
+                    if stack.normal_deltas is not None:
+                        record["morph_normals"] = blobs.add(
+                            f"{prefix}.morph_normals", stack.normal_deltas
+                        )
+
+                if packed["image_index"] is not None:
+                    image_indices.add(packed["image_index"])
+
+                records.append(record)
+
+            skeleton = None
+            if inverse_bind is not None:
+                skeleton = {"inverse_bind": blobs.add("skin.inverse_bind", inverse_bind)}
+
+            textures = {}
+            for image_idx, levels in sorted(load_textures(sorted(image_indices)).items()):
+                textures[str(image_idx)] = {
+                    "width": int(levels[0].shape[1]),
+                    "height": int(levels[0].shape[0]),
+                    "levels": [
+                        blobs.add(f"img{image_idx}.mip{n}", level)
+                        for n, level in enumerate(levels)
+                    ],
+                }
+
+            manifest = {
+                "engine_version": ENGINE_VERSION,
+                "format_version": CACHE_FORMAT_VERSION,
+                "source": {
+                    "name": source.name,
+                    "sha256": source_hash,
+                    "size": stat.st_size,
+                },
+                "gltf": gltf,
+                "primitives": records,
+                "skeleton": skeleton,
+                "textures": textures,
+                "blobs": blobs.table,
+            }
+
+            manifest_bytes = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+            manifest_offset = f.tell()
+            f.write(manifest_bytes)
+
+            f.seek(0)
+            f.write(_HEADER.pack(
+                CACHE_MAGIC,
+                CACHE_FORMAT_VERSION,
+                0,
+                manifest_offset,
+                len(manifest_bytes),
+                stat.st_mtime_ns,
+            ))
+
+        # Atomic swap so a crashed cook never leaves a half-written cache behind
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        # ...nor a half-written .tmp next to the source
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    print(f"[CACHE] Wrote {out_path} ({out_path.stat().st_size} bytes)")
+    return out_path
+
+
+def cook(
+    source: str | Path,
+    decode_images=None,
+    max_workers: Optional[int] = None,
+    mode: str = "thread"
+) -> Path:
+    """
+    Parses `source`, packages every primitive (see core.loader for
+    max_workers/mode), decodes every referenced image and writes the
+    .grekocache next to it. Returns the cache path.
+
+    decode_images(list of buffers) → list of (H, W, 4) uint8 (None on
+    failure) defaults to the native stb pool, which decodes on all cores
+    without the GIL and needs no GL context.
+    """
+    source = Path(source)
+    if decode_images is None:
+        import core.greko_native as gn
+        decode_images = gn.decode_textures
+
+    print(f"[CACHE] Cooking {source}")
+    source_hash = hash_file(source)
+    stat = source.stat()
+
+    parsed = parse_glb(source, mmap=True)
+    gltf = parsed.json
+
+    def primitives():
+        for result in package_all_primitives(parsed, max_workers=max_workers, mode=mode):
+            packed = result.packed
+            packed.update(
+                mesh_index=result.mesh_index,
+                prim_index=result.prim_index,
+                mesh_name=result.mesh_name,
+            )
+            yield packed
+
+    def load_textures(image_indices):
+        # Image bytes stay views into the mapped BIN chunk (no copies)
+        image_sources = []
+        for image_idx in image_indices:
+            data = read_image_bytes(gltf, parsed.bin_blob, image_idx)
+            if data is not None:
+                image_sources.append((image_idx, data))
+
+        decoded = decode_images([data for _, data in image_sources])
+
+        # Mip building is NumPy-bound (GIL released), so it parallelizes too
+        with ThreadPoolExecutor() as pool:
+            chains = list(pool.map(
+                lambda rgba: None if rgba is None else build_mip_chain(rgba, srgb=True),
+                decoded,
+            ))
+
+        textures = {}
+        for (image_idx, _), levels in zip(image_sources, chains):
+            if levels is None:
+                print(f"[CACHE] ⚠ Image {image_idx} failed to decode, skipping")
+                continue
+            textures[image_idx] = levels
+        return textures
+
+    try:
+        inverse_bind = None
+        if gltf.get("skins"):
+            ibm_accessor = gltf["skins"][0].get("inverseBindMatrices")
+            if ibm_accessor is not None:
+                ibm = read_accessor_array(gltf, parsed.bin_blob, ibm_accessor)
+                inverse_bind = np.ascontiguousarray(
+                    ibm.reshape(-1, 4, 4).transpose(0, 2, 1)
+                )
+
+        return write_cache(
+            source, gltf, primitives(), inverse_bind, load_textures,
+            source_hash=source_hash, stat=stat,
+        )
+    finally:
+        parsed.close()
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def _read_manifest(cache_file: Path):
+    with open(cache_file, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapping) < _HEADER.size:
+        raise AssetCacheError(f"Cache file too small: {cache_file}")
+
+    magic, version, _, manifest_offset, manifest_length, mtime_ns = _HEADER.unpack_from(mapping, 0)
+
+    if magic != CACHE_MAGIC:
+        raise AssetCacheError(f"Not a .grekocache file: {cache_file}")
+
+    if version != CACHE_FORMAT_VERSION:
+        raise AssetCacheError(
+            f"Cache format {version} != expected {CACHE_FORMAT_VERSION}"
+        )
+
+    if manifest_offset + manifest_length > len(mapping):
+        raise AssetCacheError("Manifest exceeds cache file size")
+
+    manifest = json.loads(
+        mapping[manifest_offset:manifest_offset + manifest_length].decode("utf-8")
+    )
+    # The header copy is the live one; see _restamp
+    manifest.setdefault("source", {})["mtime_ns"] = mtime_ns
+    return mapping, manifest
+
+
+def _blob_views(mapping: mmap.mmap, table: dict) -> Dict[str, np.ndarray]:
+    view = memoryview(mapping)
+    arrays = {}
+    for key, info in table.items():
+        if info["offset"] + info["nbytes"] > len(mapping):
+            raise AssetCacheError(f"Blob '{key}' exceeds cache file size")
+
+        arrays[key] = np.ndarray(
+            shape=tuple(info["shape"]),
+            dtype=np.dtype(info["dtype"]),
+            buffer=view,
+            offset=info["offset"],
+        )
+    return arrays
+
+
+def check_source(manifest: dict, source: str | Path, strict: bool = False) -> Optional[str]:
+    """
+    Returns None when the manifest matches `source` and this engine build,
+    otherwise a human-readable reason.
+
+    The content hash is authoritative, but hashing a multi-hundred-MB VRM
+    on every launch defeats the point, so unless `strict` we trust an
+    unchanged size + mtime and only rehash when those moved.
+    """
+    if manifest.get("engine_version") != ENGINE_VERSION:
+        return (
+            f"engine version {manifest.get('engine_version')} != {ENGINE_VERSION}"
+        )
+
+    source = Path(source)
+    recorded = manifest.get("source", {})
+    stat = source.stat()
+
+    if stat.st_size != recorded.get("size"):
+        return "source size changed"
+
+    if not strict and stat.st_mtime_ns == recorded.get("mtime_ns"):
+        return None
+
+    if hash_file(source) != recorded.get("sha256"):
+        return "source content hash changed"
+
+    # Same content, new mtime (touch, checkout, copy): record it so the
+    # next launch takes the fast path again. load_cache persists it.
+    recorded["mtime_ns"] = stat.st_mtime_ns
+    return None
+
+
+def _restamp(cache_file: Path, mtime_ns: int) -> None:
+    """
+    Records a new source mtime without re-cooking. It lives in a fixed
+    header field, so this is one 8-byte write in place and the file never
+    grows.
+    """
+    with open(cache_file, "r+b") as f:
+        f.seek(_MTIME_OFFSET)
+        f.write(struct.pack("<q", mtime_ns))
+
+
+def load_cache(source: str | Path, strict: bool = False) -> Optional[CookedAsset]:
+    """Maps a valid cache for `source`, or returns None if it is missing/stale."""
+    source = Path(source)
+    cache_file = cache_path_for(source)
+
+    if not cache_file.exists():
+        return None
+
+    try:
+        mapping, manifest = _read_manifest(cache_file)
+    except (AssetCacheError, ValueError) as e:
+        print(f"[CACHE] Ignoring {cache_file}: {e}")
+        return None
+
+    stamped = manifest.get("source", {}).get("mtime_ns")
+    reason = check_source(manifest, source, strict=strict)
+    if reason is not None:
+        print(f"[CACHE] Stale {cache_file}: {reason}")
+        return None
+
+    if manifest["source"]["mtime_ns"] != stamped:
+        try:
+            _restamp(cache_file, manifest["source"]["mtime_ns"])
+        except OSError as e:
+            print(f"[CACHE] ⚠ Could not record new source mtime in {cache_file}: {e}")
+
+    arrays = _blob_views(mapping, manifest["blobs"])
+
+    primitives = []
+    for record in manifest["primitives"]:
+        packed = {name: arrays[key] for name, key in record["arrays"].items()}
+        packed["index_count"] = len(packed["indices"])
+
+        if record["morphs"]:
+            packed["morph_targets"] = MorphStack(
+                names=record["morph_names"],
+                deltas=arrays[record["morphs"]],
+                normal_deltas=arrays[record["morph_normals"]] if record["morph_normals"] else None,
+                ranges=arrays[record["morph_ranges"]],
+            )
+        else:
+            packed["morph_targets"] = MorphStack(
+                names=[],
+                deltas=np.zeros((0, len(packed["vertices"]), 3), dtype=np.float32),
+            )
+
+        packed.update(
+            mesh_index=record["mesh_index"],
+            prim_index=record["prim_index"],
+            mesh_name=record["mesh_name"],
+            image_index=record["image_index"],
+            sampler_index=record.get("sampler_index"),
+            base_color_factor=record["base_color_factor"],
+        )
+        primitives.append(packed)
+
+    inverse_bind = None
+    if manifest["skeleton"]:
+        inverse_bind = arrays[manifest["skeleton"]["inverse_bind"]]
+
+    textures = {
+        int(image_idx): [arrays[key] for key in info["levels"]]
+        for image_idx, info in manifest["textures"].items()
+    }
+
+    return CookedAsset(
+        path=cache_file,
+        manifest=manifest,
+        gltf=manifest["gltf"],
+        primitives=primitives,
+        inverse_bind=inverse_bind,
+        textures=textures,
+        mapping=mapping,
+    )
+
+
+def load_or_cook(source: str | Path) -> CookedAsset:
+    cooked = load_cache(source)
+    if cooked is not None:
+        print(f"[CACHE] Warm start from {cooked.path}")
+        return cooked
+
+    cook(source)
+    cooked = load_cache(source)
+    if cooked is None:
+        raise AssetCacheError(f"Freshly cooked cache for {source} failed to load")
+    return cooked
+
+
+def verify(source: str | Path, deep: bool = False) -> List[str]:
+    """
+    Checks header, version, source hash (always strict) and every blob's
+    CRC. With `deep`, also re-packages the source and compares the arrays.
+    Returns a list of problems (empty = OK).
+    """
+    source = Path(source)
+    cache_file = cache_path_for(source)
+    problems = []
+
+    if not cache_file.exists():
+        return [f"{cache_file} does not exist"]
+
+    try:
+        mapping, manifest = _read_manifest(cache_file)
+    except (AssetCacheError, ValueError) as e:
+        return [str(e)]
+
+    reason = check_source(manifest, source, strict=True)
+    if reason is not None:
+        problems.append(reason)
+
+    try:
+        arrays = _blob_views(mapping, manifest["blobs"])
+    except AssetCacheError as e:
+        return problems + [str(e)]
+
+    for key, info in manifest["blobs"].items():
+        if zlib.crc32(memoryview(arrays[key]).cast("B")) != info["crc32"]:
+            problems.append(f"CRC mismatch in blob '{key}'")
+
+    if deep and not problems:
+        parsed = parse_glb(source, mmap=True)
+        for record in manifest["primitives"]:
+            mesh = parsed.json["meshes"][record["mesh_index"]]
+            packed = package_mesh(
+                parsed.json, parsed.bin_blob, mesh["primitives"][record["prim_index"]],
+                mesh_index=record["mesh_index"],
+            )
+            for name, key in record["arrays"].items():
+                if not np.array_equal(packed[name], arrays[key]):
+                    problems.append(f"Array '{key}' differs from source")
+
+            if record["morphs"] and not np.array_equal(
+                packed["morph_targets"].deltas, arrays[record["morphs"]]
+            ):
+                problems.append(f"Array '{record['morphs']}' differs from source")
+        parsed.close()
+
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.asset_cache",
+        description="Pre-cook and verify .grekocache files",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_cook = sub.add_parser("cook", help="Build the cache for one or more assets")
+    p_cook.add_argument("sources", nargs="+")
+    p_cook.add_argument("--force", action="store_true", help="Re-cook even if the cache is valid")
+    p_cook.add_argument("--workers", type=int, default=None, help="Packaging pool size (default: CPU count)")
+    p_cook.add_argument("--processes", action="store_true", help="Package on a process pool instead of threads")
+
+    p_verify = sub.add_parser("verify", help="Check caches against their sources")
+    p_verify.add_argument("sources", nargs="+")
+    p_verify.add_argument("--deep", action="store_true", help="Also re-package and compare arrays")
+
+    args = parser.parse_args(argv)
+    status = 0
+
+    for source in args.sources:
+        if not Path(source).exists():
+            print(f"❌ Source not found: {source}")
+            status = 1
+            continue
+
+        if args.command == "cook":
+            if not args.force and load_cache(source, strict=True) is not None:
+                print(f"✅ {cache_path_for(source)} is up to date")
+                continue
+            cook(
+                source,
+                max_workers=args.workers,
+                mode="process" if args.processes else "thread",
+            )
+
+        elif args.command == "verify":
+            problems = verify(source, deep=args.deep)
+            if problems:
+                status = 1
+                print(f"❌ {cache_path_for(source)}")
+                for problem in problems:
+                    print(f"   - {problem}")
+            else:
+                print(f"✅ {cache_path_for(source)}")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,22 @@
-import time
 import math
 
 from core.behaviours_manager import BehaviorBase
 
 class Blinker(BehaviorBase):
+    outputs = ("blink",)
+
     def __init__(self):
-        # Native VRM Names
-        self.target_name = "Fcl_EYE_Close"  
-        self.blink_right = "Fcl_EYE_Close_R"
-        self.blink_left = "Fcl_EYE_Close_L"
+        # VRM expression presets (0.x blink / blink_r / blink_l map to these)
+        self.target_name = "blink"
+        self.blink_right = "blinkRight"
+        self.blink_left = "blinkLeft"
         
         self.strength = 1.0 
         self.interval = 4.0
         self.blink_duration = 0.5 #inversely proportional to blink speed
 
-    def update(self, gn):
-        """Calculates a natural-ish blink timing and returns weights"""
-        t = time.time()
+    def update(self, gn, t, dt):
+        """Calculates a natural-ish blink timing"""
         weight = 0.0
         
         # Logic: If we are in the first 0.2s of our interval, blink!
@@ -26,9 +26,7 @@ class Blinker(BehaviorBase):
             # Sine creates a smooth 'in and out' so the eyelids don't pop
             weight = math.sin((cycle_pos / self.blink_duration) * math.pi) * self.strength
         
-        # Return a dictionary of weights
-        # This allows one behavior to control multiple facial expressions at once
-        return { "Fcl_EYE_Close": weight }
+        self.values[0] = weight
         #return {
         #    self.target_name: weight,
         #    self.blink_right: weight,
@@ -1,16 +1,17 @@
-import time
 import math
 
 from core.behaviours_manager import BehaviorBase
 
 class Breather(BehaviorBase):
+    outputs = ("Fcl_ALL_Surprised",)
+    # A 3 s cycle at 5% strength doesn't need every frame
+    rate = 20.0
+
     def __init__(self):
         # We'll use the Surprise morph for a subtle chest/face expansion
         self.target_name = "Fcl_ALL_Surprised" 
 
-    def update(self, gn):
-        t = time.time()
+    def update(self, gn, t, dt):
         # Slow, rhythmic breathing cycle (roughly 3 seconds)
         # We keep the weight very low (0.05) for a subtle "alive" look
-        weight = (math.sin(t * 2.0) + 1.0) * 0.5 * 0.05
-        return { self.target_name: weight }
\ No newline at end of file
+        self.values[0] = (math.sin(t * 2.0) + 1.0) * 0.5 * 0.05
\ No newline at end of file
@@ -1,184 +1,105 @@
 #import core.greko_native as gn
-import time
 from pathlib import Path
 
-from core.behaviours_manager import BehaviorBase
+from core.behaviours_manager import EVENT, BehaviorBase
+from core.gpseq import HOLD_PHONEMES, SequencePlayer, load_gpseq
 
 
-class PhonemeEvent:
-    def __init__(self, phoneme: str, duration: float):
-        self.phoneme = phoneme
-        self.duration = duration
-
+# Vowels drive the VRM mouth expressions, so expressions that override the
+# mouth (VRM 1.0 overrideMouth) can close over them
 PHONEME_MAP = {
-    "A":        "Fcl_MTH_A",
-    "E":        "Fcl_MTH_E",
-    "I":        "Fcl_MTH_I",
-    "O":        "Fcl_MTH_O",
-    "U":        "Fcl_MTH_U",
+    "A":        "aa",
+    "E":        "ee",
+    "I":        "ih",
+    "O":        "oh",
+    "U":        "ou",
     "REST":     "Fcl_MTH_Close",  # You must have this morph
     "PAUSE":    "HOLD"
 }
 
 
 class MouthSequencer(BehaviorBase):
-    def __init__(self):
-        #self.phrase = ["Fcl_MTH_A", "Fcl_MTH_E", "Fcl_MTH_I", "Fcl_MTH_O", "Fcl_MTH_U"]
-        #self.step_duration = 0.5  # Seconds per vowel
-        self.last_update_time = time.time()
-        self.current_time = 0.0
-        self.playing = False
-        self.current_index = 0
-        self.current_mapped_name = None
-
-        # We need access to the full library of morph arrays
-        self.morph_library = {} 
-        self.timeline = []
-        self.face_indices = []
+    outputs = tuple(dict.fromkeys(name for name in PHONEME_MAP.values() if name != "HOLD"))
+    # Asleep (and free) until load() starts a sequence
+    rate = EVENT
+    awake = False
 
+    def __init__(self):
+        self.player = None
+        self.stream = None       # core.viseme_stream.VisemeStream, when live
+        self.viseme_slots = []   # sequence viseme id → index in outputs (-1: none)
 
-        self.target_slot = 2  # Slot reserved for phoneme morphs
+        # Injected once the face streams in; only used to know it's there
+        self.morph_library = {}
+        self.slots = {name: i for i, name in enumerate(self.outputs)}
 
         # Project root resolution
         self.project_root = Path(__file__).resolve().parents[2]
         self.gpseq_dir = self.project_root / "GEN_PHENOME_SEQ"
 
 
-    def load(self, filename):
+    def load(self, filename, loop=False, rate=1.0):
+        """A text .gpseq (compiled here) or a binary .gpseqb (mapped)."""
         path = self.gpseq_dir / filename
 
         if not path.exists():
             print(f"[GPSEQ] File not found: {path}")
             return
 
-        text = path.read_text()
-        self.timeline = self.parse_gpseq(text)
+        known = [p for p in PHONEME_MAP if p not in HOLD_PHONEMES]
+        sequence = load_gpseq(path, known=known)
+        print(f"[GPSEQ] Loaded {sequence.count} events ({sequence.duration:.2f}s)")
+
+        self.viseme_slots = [
+            self.slots.get(PHONEME_MAP.get(name), -1) for name in sequence.names
+        ]
+        self.player = SequencePlayer(sequence, rate=rate, loop=loop)
+        self.wake()
+
+    def attach_stream(self, stream):
+        """Live visemes (e.g. from TTS); they take over from any loaded sequence."""
+        self.stream = stream
+        self.wake()
+
+    def detach_stream(self):
+        self.stream = None
+
+    def seek(self, t):
+        if self.player is not None:
+            self.player.seek(t)
+            self.wake()
+
+    def update(self, gn, t, dt):
+
+        if self.stream is not None:
+            # Sampled even before the face is in, so its buffer keeps draining
+            visemes = self.stream.sample(dt)
+            if not self.morph_library:
+                return
+            self.values.fill(0.0)
+            for phoneme, weight in visemes:
+                slot = self.slots.get(PHONEME_MAP.get(phoneme), -1)
+                if slot >= 0:
+                    self.values[slot] = max(self.values[slot], weight)
+            return
 
-        print(f"[GPSEQ] Loaded {len(self.timeline)} events")
+        if not self.morph_library:
+            return
 
-        self.current_index = 0
-        self.current_time = 0.0
-        self.playing = True
+        player = self.player
+        self.values.fill(0.0)
 
-    def parse_gpseq(self, text):
-        events = []
+        if player is None or not player.playing:
+            # Sequence over: mouth back to neutral, then sleep
+            self.awake = False
+            return
 
-        for line in text.splitlines():
-            line = line.strip()
-
-            if not line or line.startswith("#"):
-                continue
-
-            parts = line.split(";")
-
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-
-                tokens = part.split()
-                if len(tokens) != 2:
-                    continue
-
-                phoneme, duration = tokens
-
-                try:
-                    duration = float(duration)
-                except ValueError:
-                    continue
-
-                events.append(PhonemeEvent(phoneme, duration))
- 
-        return events
-
-    def update(self, gn):
-
-        if not self.morph_library or not self.face_indices:
-            return {}
-
-        if not self.playing or not self.timeline:
-            return {"PHONEME_ACTIVE": 0.0}
-
-        now = time.time()
-        dt = now - self.last_update_time
-        self.last_update_time = now
-
-        if self.current_index >= len(self.timeline):
-            self.playing = False
-            #self.current_mapped_name = None
-            #return {"PHONEME_ACTIVE": 0.0}
-
-            close_name = PHONEME_MAP["REST"]
-            if close_name in self.morph_library:
-                for idx in self.face_indices:
-                    gn.update_morph_data(
-                        idx,
-                        self.target_slot,
-                        self.morph_library[close_name]
-                    )
-                self.current_mapped_name = close_name
-
-            return {"PHONEME_ACTIVE": 0.0}
-
-
-        event = self.timeline[self.current_index]
-        # Apply morph swap if exists
-        mapped_name = PHONEME_MAP.get(event.phoneme)
-
-        #PAUSE or HOLD - we just skip morph changes but keep the timing
-        if mapped_name == "HOLD": pass
-
-        # REST or unknown phoneme
-        elif mapped_name:
-            if mapped_name != self.current_mapped_name:
-                if mapped_name in self.morph_library:
-                    for idx in self.face_indices:
-                        gn.update_morph_data(
-                            idx,
-                            self.target_slot,
-                            self.morph_library[mapped_name]
-                        )
-
-                self.current_mapped_name = mapped_name
-
-        else: pass
-
-        self.current_time += dt
-
-        if self.current_time >= event.duration:
-            self.current_time = 0.0
-            self.current_index += 1
-
-        return {"PHONEME_ACTIVE": 1.0}
-#
-#
-#            if self.current_mapped_name is not None:
-#                self.current_mapped_name = None
-#
-#            self.current_time += dt
-#            if self.current_time >= event.duration:
-#                self.current_time = 0.0
-#                self.current_index += 1
-#
-#            #return {"PHONEME_ACTIVE": 0.0}
-#        
-#        if mapped_name != self.current_mapped_name:
-#            
-#
-#            if mapped_name in self.morph_library:
-#                for idx in self.face_indices:
-#                    gn.update_morph_data(
-#                        idx,
-#                        self.target_slot,
-#                        self.morph_library[mapped_name]
-#                    )
-#                self.current_mapped_name = mapped_name
-#
-#        self.current_time += dt
-#
-#        if self.current_time >= event.duration:
-#            self.current_time = 0.0
-#            self.current_index += 1
-#
-#        return {"PHONEME_ACTIVE": 1.0}
-#
\ No newline at end of file
+        # FLAG: Absolute Time
+        # The player keeps playback time and bisects into the compiled
+        # arrays, so a long frame lands on the right event instead of
+        # stepping one event per frame.
+        player.advance(dt)
+        for viseme, weight in player.sample():
+            slot = self.viseme_slots[viseme]
+            if slot >= 0:
+                self.values[slot] = max(self.values[slot], weight)
@@ -4,13 +4,95 @@ import os
 import importlib
 import inspect
 
+import numpy as np
+
+from core.clock import FixedStep
+
+# Behaviour update rates
+EVERY_FRAME = None
+EVENT = "event"   # only while awake; wake() to start, set awake = False when settled
+
 class BehaviorBase:
-    pass
+    # FLAG: Frame Time
+    # update(gn, t, dt) gets the main loop's clock; nobody reads the OS time.
+    # Set fixed_step (seconds) to also get fixed_update(gn, step) calls at
+    # that rate, however fast or slow the frames are.
+    fixed_step = None
+
+    # FLAG: Declared Outputs
+    # A behaviour names what it drives up front (expression or morph names)
+    # and writes into self.values, one float per output, instead of
+    # returning a dict. Values hold between updates, so a behaviour can run
+    # at `rate` Hz or only when woken (EVENT) and still look continuous.
+    outputs = ()
+    rate = EVERY_FRAME
+    awake = True
+    values = None     # (len(outputs),) float32, allocated by the manager
+
+    def wake(self):
+        self.awake = True
+
+    def update(self, gn, t, dt):
+        """Writes self.values. Behaviours without outputs may instead return
+        {expression or morph name: weight}; unknown names are ignored."""
+        return {}
+
+    def fixed_update(self, gn, step):
+        pass
+
+
+class _Schedule:
+    """Manager-side bookkeeping for one behaviour."""
+
+    def __init__(self, behavior):
+        self.behavior = behavior
+        self.last_t = None
+        self.next_t = 0.0
+        self.held = {}   # last dict from a behaviour without declared outputs
+        # values[source] → expressions.weights[index] / morph_weights[index]
+        self.expression_index = self.expression_source = np.zeros(0, dtype=np.intp)
+        self.morph_index = self.morph_source = np.zeros(0, dtype=np.intp)
+
+    def resolve(self, expressions):
+        e_index, e_source, m_index, m_source = [], [], [], []
+        for source, name in enumerate(self.behavior.outputs):
+            entry = expressions.resolve(name)
+            if entry is None:
+                continue
+            is_expression, indices = entry
+            index, sources = (e_index, e_source) if is_expression else (m_index, m_source)
+            index.extend(indices)
+            sources.extend([source] * len(indices))
+
+        self.expression_index = np.array(e_index, dtype=np.intp)
+        self.expression_source = np.array(e_source, dtype=np.intp)
+        self.morph_index = np.array(m_index, dtype=np.intp)
+        self.morph_source = np.array(m_source, dtype=np.intp)
+
+    def due(self, t):
+        rate = self.behavior.rate
+        if rate is EVERY_FRAME:
+            return True
+        if rate == EVENT:
+            return self.behavior.awake
+        if t < self.next_t:
+            return False
+        # Don't try to catch up after a stall; just resume the cadence
+        self.next_t = max(self.next_t + 1.0 / rate, t)
+        return True
 
 class BehaviorManager:
     def __init__(self):
         self.active_behaviors = []
-        self.face_mesh_indices = []
+        self.expressions = None   # core.expressions.ExpressionSet
+        self.morph_meshes = []    # (uploaded mesh index, glTF mesh index)
+        self.steppers = {}
+        self.schedules = {}
+
+        # What native currently has, to send only what changed
+        self._submitted = None
+        self._last_inputs = None
+        self.native_calls = 0
 
     def load_behaviors(self):
         """Scans core/behaviours and imports everything"""
@@ -25,7 +107,36 @@ class BehaviorManager:
                 for name, obj in inspect.getmembers(module):
                     if inspect.isclass(obj) and issubclass(obj, BehaviorBase) and obj is not BehaviorBase:
                         print(f"🧩 Loaded Behavior: {name} from {filename}")
-                        self.active_behaviors.append(obj())
+                        self.add_behavior(obj())
+
+    def add_behavior(self, behavior):
+        self.active_behaviors.append(behavior)
+        if behavior.fixed_step:
+            self.steppers[id(behavior)] = FixedStep(behavior.fixed_step)
+
+        behavior.values = np.zeros(len(behavior.outputs), dtype=np.float32)
+        schedule = _Schedule(behavior)
+        if self.expressions is not None:
+            schedule.resolve(self.expressions)
+        self.schedules[id(behavior)] = schedule
+
+    def set_expressions(self, expressions):
+        self.expressions = expressions
+        for schedule in self.schedules.values():
+            schedule.resolve(expressions)
+
+        self._submitted = np.full(expressions.target_count, np.nan, dtype=np.float32)
+        self._last_inputs = None
+        print(f"🎭 {len(expressions.expressions)} expressions over {expressions.target_count} morph targets")
+
+    def add_morph_mesh(self, mesh_index, gltf_mesh):
+        """Registers an uploaded primitive; it gets its glTF mesh's slice of the weights."""
+        self.morph_meshes.append((mesh_index, gltf_mesh))
+        # A new primitive has nothing yet: make its mesh look changed
+        if self._submitted is not None and gltf_mesh in self.expressions.offsets:
+            offset = self.expressions.offsets[gltf_mesh]
+            self._submitted[offset:offset + self.expressions.counts[gltf_mesh]] = np.nan
+            self._last_inputs = None
 
     def inject_morph_library(self, library):
         for b in self.active_behaviors:
@@ -34,33 +145,81 @@ class BehaviorManager:
                 b.morph_library = library
                 print(f"📖 Library injected into {type(b).__name__}")
 
-            if hasattr(b, "face_indices"):
-                b.face_indices = self.face_mesh_indices
-                print(f"🎯 Assigned Face Indices {self.face_mesh_indices} to {type(b).__name__}")
-
     def trigger_mouth_sequence(self, filename):
         for b in self.active_behaviors:
             if type(b).__name__ == "MouthSequencer":
                 b.load(filename)
                 print(f"🎬 Triggered mouth sequence: {filename}")
 
+    def attach_viseme_stream(self, stream):
+        for b in self.active_behaviors:
+            if type(b).__name__ == "MouthSequencer":
+                b.attach_stream(stream)
+                print(f"📡 Mouth following live visemes: {stream.address}")
+
 
 
-    def update_all(self, gn):
-        """Runs the logic for every behavior found"""
+    def update_all(self, gn, clock):
+        """Runs the logic for every behavior found, at the clock's t / dt"""
 
-        current_weights = [0.0, 0.0, 0.0, 0.0]
+        t = clock.t
 
         for behavior in self.active_behaviors:
-            weights_to_apply = behavior.update(gn)
-            
-            if "Fcl_EYE_Close" in weights_to_apply:
-                current_weights[0] = max(current_weights[0], weights_to_apply["Fcl_EYE_Close"])
-
-            if "Fcl_ALL_Surprised" in weights_to_apply:
-                current_weights[1] = max(current_weights[1], weights_to_apply["Fcl_ALL_Surprised"])
-
-            if "PHONEME_ACTIVE" in weights_to_apply:
-                current_weights[2] = max(current_weights[2], weights_to_apply["PHONEME_ACTIVE"])
-        
-        gn.set_morph_weights(*current_weights)
\ No newline at end of file
+            stepper = self.steppers.get(id(behavior))
+            if stepper is not None:
+                for _ in range(stepper.advance(clock.dt)):
+                    behavior.fixed_update(gn, stepper.step)
+
+            schedule = self.schedules[id(behavior)]
+            if not schedule.due(t):
+                continue
+
+            # Rate-limited behaviours see the time since their own last run
+            dt = clock.dt
+            if behavior.rate not in (EVERY_FRAME, EVENT) and schedule.last_t is not None:
+                dt = t - schedule.last_t
+            schedule.last_t = t
+
+            result = behavior.update(gn, t, dt)
+            if result is not None and not behavior.outputs:
+                schedule.held = result
+
+        expressions = self.expressions
+        if expressions is None:
+            return
+
+        # Gather every behaviour's held values; two on one name: the stronger wins
+        expressions.clear()
+        weights, morph_weights = expressions.weights, expressions.morph_weights
+        for schedule in self.schedules.values():
+            values = schedule.behavior.values
+            if len(schedule.expression_index):
+                index = schedule.expression_index
+                weights[index] = np.maximum(weights[index], values[schedule.expression_source])
+            if len(schedule.morph_index):
+                index = schedule.morph_index
+                morph_weights[index] = np.maximum(morph_weights[index], values[schedule.morph_source])
+            for name, weight in schedule.held.items():
+                expressions.set(name, weight)
+
+        # FLAG: Nothing Moved
+        # Same inputs as last frame → same output; skip the evaluation too.
+        if self._last_inputs is not None and np.array_equal(weights, self._last_inputs[0]) \
+                and np.array_equal(morph_weights, self._last_inputs[1]):
+            return
+        self._last_inputs = (weights.copy(), morph_weights.copy())
+
+        # FLAG: Weights, Not Vertex Data
+        # One sparse mat-vec resolves every expression; only meshes whose
+        # slice differs from what native has are re-sent.
+        output = expressions.evaluate()
+        changed = output != self._submitted
+        for mesh_index, gltf_mesh in self.morph_meshes:
+            offset = expressions.offsets.get(gltf_mesh)
+            if offset is None:
+                continue
+            end = offset + expressions.counts[gltf_mesh]
+            if changed[offset:end].any():
+                gn.set_morph_weights(mesh_index, output[offset:end])
+                self.native_calls += 1
+        np.copyto(self._submitted, output)
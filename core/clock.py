@@ -0,0 +1,110 @@
+"""
+One clock per frame, owned by the main loop.
+
+The loop calls tick() once; everything else (behaviours, animation, spring
+bones) reads clock.t / clock.dt instead of asking the OS, so a frame is
+evaluated at a single instant and nothing drifts. The time source is
+pluggable:
+
+    MonotonicTime()            default, immune to wall-clock jumps
+    WallTime()                 time.time(), if you need epoch seconds
+    ManualTime(auto_step=1/60) deterministic: every tick is exactly one
+                               step, for offline replay and benchmarks
+"""
+import time
+from typing import Callable, Optional
+
+
+class MonotonicTime:
+    def __call__(self) -> float:
+        return time.perf_counter()
+
+
+class WallTime:
+    def __call__(self) -> float:
+        return time.time()
+
+
+class ManualTime:
+    def __init__(self, start: float = 0.0, auto_step: Optional[float] = None):
+        """auto_step advances the time by that much on every read."""
+        self.now = start
+        self.auto_step = auto_step
+
+    def advance(self, dt: float) -> None:
+        self.now += dt
+
+    def set(self, t: float) -> None:
+        self.now = t
+
+    def __call__(self) -> float:
+        if self.auto_step is not None:
+            self.now += self.auto_step
+        return self.now
+
+
+class FixedStep:
+    """
+    Fixed-timestep accumulator: feed it frame dt, get back how many whole
+    steps to run. `alpha` is the leftover fraction, for interpolating
+    between the last two simulated states.
+    """
+
+    def __init__(self, step: float, max_steps: int = 4):
+        if step <= 0.0:
+            raise ValueError("FixedStep needs a positive step")
+        self.step = step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, dt: float) -> int:
+        self.accumulator += dt
+        steps = int(self.accumulator / self.step)
+
+        if steps > self.max_steps:
+            # Fell too far behind (breakpoint, hitch): drop the backlog
+            # instead of spiralling
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.step
+
+    def reset(self) -> None:
+        self.accumulator = 0.0
+
+
+class FrameClock:
+    def __init__(self, source: Optional[Callable[[], float]] = None, max_dt: float = 0.25):
+        """
+        max_dt clamps a single frame's dt so a stall (window drag, loading
+        hitch) doesn't launch simulations across the room.
+        """
+        self.source = source if source is not None else MonotonicTime()
+        self.max_dt = max_dt
+
+        self._start = self.source()
+        self._last = self._start
+        self.t = 0.0       # seconds since the clock started (sum of clamped dts)
+        self.dt = 0.0      # this frame
+        self.frame = 0
+
+    def tick(self) -> float:
+        """Reads the source once and advances t / dt. Returns dt."""
+        now = self.source()
+        dt = now - self._last
+        self._last = now
+
+        if dt < 0.0:
+            dt = 0.0
+        elif dt > self.max_dt:
+            dt = self.max_dt
+
+        self.dt = dt
+        self.t += dt
+        self.frame += 1
+        return dt
@@ -0,0 +1,153 @@
+"""
+CPU reference for what Textest.vert does to a vertex, for headless use
+(hit-testing, bounds, thumbnails, regression checks without a GPU).
+
+Same math as the shader, same order:
+
+    morphed = position + Σ weight[t] * delta[t]        (non-zero weights only)
+    skin    = Σ aWeights[k] * palette[aJoints[k]]      (identity if Σ < 0.01)
+    out     = model * skin * morphed
+
+Morphs are positions only, like the shader. Everything is batched over
+vertices; the only Python loops are over active morph targets and the four
+influences. Scratch space is allocated once per mesh, and every method takes
+an optional `out` to reuse across calls.
+"""
+from typing import Optional
+
+import numpy as np
+
+
+_STATIC_WEIGHT = 0.01  # below this total the shader leaves the vertex unskinned
+
+
+class MeshDeformer:
+    def __init__(self, packed):
+        """`packed` is one primitive as produced by the loader / asset cache."""
+        self.positions = np.ascontiguousarray(packed["vertices"], dtype=np.float32).reshape(-1, 3)
+        self.normals = np.ascontiguousarray(packed["normals"], dtype=np.float32).reshape(-1, 3)
+        self.joints = np.ascontiguousarray(packed["joints"]).reshape(-1, 4).astype(np.intp)
+        self.weights = np.ascontiguousarray(packed["weights"], dtype=np.float32).reshape(-1, 4)
+        self.morphs = packed.get("morph_targets")
+
+        vertex_count = len(self.positions)
+        self.static_vertices = np.flatnonzero(self.weights.sum(axis=1) < _STATIC_WEIGHT)
+
+        # Row-vector form of the shader's column-major palette: rows 0-2 are
+        # the 3x3 part, row 3 the translation (see blend)
+        self._blended = np.empty((vertex_count, 4, 3), dtype=np.float32)
+        self._gathered = np.empty((vertex_count, 4, 3), dtype=np.float32)
+        self._morphed = np.empty((vertex_count, 3), dtype=np.float32)
+        self._scratch = np.empty((vertex_count, 3), dtype=np.float32)
+        self._influence = [np.ascontiguousarray(self.weights[:, k, None, None]) for k in range(4)]
+        self._joint_columns = [np.ascontiguousarray(self.joints[:, k]) for k in range(4)]
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.positions)
+
+    # ---- morphs ----
+    def morph(self, weights, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Base positions plus the weighted deltas of every non-zero target.
+        Each target only touches its MorphStack.ranges span of vertices.
+        """
+        if out is None:
+            out = np.empty_like(self.positions)
+        np.copyto(out, self.positions)
+
+        morphs = self.morphs
+        if weights is None or morphs is None or morphs.target_count == 0:
+            return out
+
+        weights = np.asarray(weights, dtype=np.float32)
+        count = min(len(weights), morphs.target_count)
+        for t in np.flatnonzero(weights[:count]):
+            start, end = morphs.ranges[t]
+            if start >= end:
+                continue
+            scratch = self._scratch[start:end]
+            np.multiply(morphs.deltas[t, start:end], weights[t], out=scratch)
+            out[start:end] += scratch
+        return out
+
+    # ---- skinning ----
+    def blend(self, palette) -> np.ndarray:
+        """
+        Per-vertex blend of the four influences, (V,4,3). `palette` is what
+        goes to gn.update_joints: Skeleton.palette, or 16 floats per joint
+        column-major. Kept for normals() until the next call.
+        """
+        # Column-major mat4 read row-major is the transpose, so p @ P works
+        # on row vectors; only the first three columns matter for xyz.
+        columns = np.ascontiguousarray(
+            np.asarray(palette, dtype=np.float32).reshape(-1, 4, 4)[:, :, :3]
+        )
+
+        blended = self._blended
+        gathered = self._gathered
+        for k in range(4):
+            np.take(columns, self._joint_columns[k], axis=0, out=gathered)
+            np.multiply(gathered, self._influence[k], out=gathered)
+            if k == 0:
+                np.copyto(blended, gathered)
+            else:
+                blended += gathered
+
+        if len(self.static_vertices):
+            blended[self.static_vertices] = np.eye(4, 3, dtype=np.float32)
+        return blended
+
+    def skin(self, palette, positions: Optional[np.ndarray] = None,
+             out: Optional[np.ndarray] = None, model=None) -> np.ndarray:
+        """
+        4-influence linear blend skinning of `positions` (default: the bind
+        pose). `model` is an optional row-major 4x4 world transform.
+        """
+        if positions is None:
+            positions = self.positions
+        if out is None:
+            out = np.empty_like(self.positions)
+
+        blended = self.blend(palette)
+        np.matmul(positions[:, None, :], blended[:, :3, :], out=out[:, None, :])
+        out += blended[:, 3, :]
+
+        if model is not None:
+            model = np.asarray(model, dtype=np.float32).reshape(4, 4)
+            np.matmul(out, model[:3, :3].T, out=out)
+            out += model[:3, 3]
+        return out
+
+    def normals_from_last_blend(self, out: Optional[np.ndarray] = None, model=None) -> np.ndarray:
+        """
+        Normals through the inverse transpose of model * skin, as the shader
+        does (and, like it, not renormalized). Uses the last blend().
+        """
+        # blended[:, :3, :] is skin3x3 transposed
+        skin = np.swapaxes(self._blended[:, :3, :], 1, 2)
+        if model is not None:
+            model = np.asarray(model, dtype=np.float32).reshape(4, 4)
+            skin = np.matmul(model[:3, :3], skin)
+
+        inverse = np.linalg.inv(skin).astype(np.float32, copy=False)
+        if out is None:
+            out = np.empty_like(self.normals)
+        # (inverse^T n) as a row vector is n @ inverse
+        np.matmul(self.normals[:, None, :], inverse, out=out[:, None, :])
+        return out
+
+    # ---- both ----
+    def evaluate(self, weights=None, palette=None,
+                 out: Optional[np.ndarray] = None, model=None) -> np.ndarray:
+        """Morph then skin, the full vertex shader. palette=None skips skinning."""
+        if palette is None:
+            morphed = self.morph(weights, out)
+            if model is not None:
+                model = np.asarray(model, dtype=np.float32).reshape(4, 4)
+                np.matmul(morphed, model[:3, :3].T, out=morphed)
+                morphed += model[:3, 3]
+            return morphed
+
+        morphed = self.morph(weights, self._morphed)
+        return self.skin(palette, morphed, out, model)
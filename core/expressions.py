@@ -0,0 +1,247 @@
+"""
+VRM expressions (0.x blendShapeGroups, 1.0 VRMC_vrm.expressions) compiled
+into one sparse matrix.
+
+Columns are every morph target of every glTF mesh laid end to end, so a
+frame is:
+
+    expression weights (E,)  →  overrides (blink / lookAt / mouth)
+                             →  one sparse mat-vec  →  target weights (N,)
+
+and each uploaded primitive takes its mesh's slice of the result. The cost
+depends on the number of binds, not on how many expressions are driven.
+
+Raw morph names (Fcl_EYE_Close, ...) can be set too; they land directly in
+their columns, for models without expressions and for behaviours that want
+a single target. Material color / texture transform binds are not applied.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.morph_stack import resolve_target_names
+
+
+OVERRIDE_NONE, OVERRIDE_BLOCK, OVERRIDE_BLEND = 0, 1, 2
+_OVERRIDE_MODES = {"none": OVERRIDE_NONE, "block": OVERRIDE_BLOCK, "blend": OVERRIDE_BLEND}
+
+# Expressions each override category acts on (VRM 1.0 preset names)
+OVERRIDE_GROUPS = {
+    "blink": ("blink", "blinkLeft", "blinkRight"),
+    "look_at": ("lookUp", "lookDown", "lookLeft", "lookRight"),
+    "mouth": ("aa", "ih", "ou", "ee", "oh"),
+}
+
+# VRM 0.x presetName → VRM 1.0 preset, so behaviours use one vocabulary
+_VRM0_PRESETS = {
+    "a": "aa", "i": "ih", "u": "ou", "e": "ee", "o": "oh",
+    "blink": "blink", "blink_l": "blinkLeft", "blink_r": "blinkRight",
+    "joy": "happy", "angry": "angry", "sorrow": "sad", "fun": "relaxed",
+    "lookup": "lookUp", "lookdown": "lookDown", "lookleft": "lookLeft", "lookright": "lookRight",
+    "neutral": "neutral",
+}
+
+
+@dataclass
+class Expression:
+    name: str
+    preset: Optional[str]        # VRM 1.0 preset name, None for custom
+    is_binary: bool = False      # snaps to 0 / 1 at 0.5
+    override_blink: int = OVERRIDE_NONE
+    override_look_at: int = OVERRIDE_NONE
+    override_mouth: int = OVERRIDE_NONE
+
+
+class _Compiler:
+    """Collects (expression, column, weight) triples from either spec version."""
+
+    def __init__(self, offsets: Dict[int, int], counts: Dict[int, int]):
+        self.offsets = offsets
+        self.counts = counts
+        self.expressions: List[Expression] = []
+        self.rows: List[int] = []
+        self.cols: List[int] = []
+        self.values: List[float] = []
+
+    def add(self, expression: Expression, binds) -> None:
+        row = len(self.expressions)
+        self.expressions.append(expression)
+        for mesh, target, weight in binds:
+            if mesh not in self.offsets or not 0 <= target < self.counts[mesh]:
+                continue
+            self.rows.append(row)
+            self.cols.append(self.offsets[mesh] + target)
+            self.values.append(weight)
+
+
+def _parse_vrm0(master, compiler: _Compiler) -> None:
+    for group in master.get("blendShapeGroups", []):
+        preset = _VRM0_PRESETS.get(group.get("presetName", "unknown"))
+        name = group.get("name") or preset or f"expression_{len(compiler.expressions)}"
+        # 0.x bind weights are percentages
+        binds = [(b.get("mesh"), b.get("index", -1), b.get("weight", 100.0) / 100.0)
+                 for b in group.get("binds", [])]
+        compiler.add(Expression(name, preset, bool(group.get("isBinary", False))), binds)
+
+
+def _parse_vrm1(expressions, gltf_json, compiler: _Compiler) -> None:
+    nodes = gltf_json.get("nodes", [])
+    for kind in ("preset", "custom"):
+        for name, spec in expressions.get(kind, {}).items():
+            binds = []
+            for b in spec.get("morphTargetBinds", []):
+                node = b.get("node", -1)
+                mesh = nodes[node].get("mesh") if 0 <= node < len(nodes) else None
+                binds.append((mesh, b.get("index", -1), b.get("weight", 0.0)))
+
+            compiler.add(Expression(
+                name,
+                name if kind == "preset" else None,
+                bool(spec.get("isBinary", False)),
+                _OVERRIDE_MODES.get(spec.get("overrideBlink", "none"), OVERRIDE_NONE),
+                _OVERRIDE_MODES.get(spec.get("overrideLookAt", "none"), OVERRIDE_NONE),
+                _OVERRIDE_MODES.get(spec.get("overrideMouth", "none"), OVERRIDE_NONE),
+            ), binds)
+
+
+class ExpressionSet:
+    def __init__(self, gltf_json):
+        # Column layout: glTF mesh m owns [offsets[m], offsets[m] + counts[m])
+        self.offsets: Dict[int, int] = {}
+        self.counts: Dict[int, int] = {}
+        morph_columns: Dict[str, List[int]] = {}
+        total = 0
+        for m, mesh in enumerate(gltf_json.get("meshes", [])):
+            primitives = mesh.get("primitives", [])
+            count = max((len(p.get("targets", [])) for p in primitives), default=0)
+            if count == 0:
+                continue
+            self.offsets[m] = total
+            self.counts[m] = count
+            for t, name in enumerate(resolve_target_names(gltf_json, m, primitives[0], count)):
+                morph_columns.setdefault(name, []).append(total + t)
+            total += count
+        self.target_count = total
+
+        compiler = _Compiler(self.offsets, self.counts)
+        extensions = gltf_json.get("extensions", {})
+        if "VRMC_vrm" in extensions:
+            _parse_vrm1(extensions["VRMC_vrm"].get("expressions", {}), gltf_json, compiler)
+        elif "blendShapeMaster" in extensions.get("VRM", {}):
+            _parse_vrm0(extensions["VRM"]["blendShapeMaster"], compiler)
+
+        self.expressions = compiler.expressions
+        self._rows = np.array(compiler.rows, dtype=np.intp)
+        self._cols = np.array(compiler.cols, dtype=np.intp)
+        self._values = np.array(compiler.values, dtype=np.float32)
+
+        count = len(self.expressions)
+        self.weights = np.zeros(count, dtype=np.float32)              # inputs, this frame
+        self.morph_weights = np.zeros(total, dtype=np.float32)        # raw morph inputs
+        self.output = np.zeros(total, dtype=np.float32)               # per target
+
+        self._binary = np.array([e.is_binary for e in self.expressions], dtype=bool)
+        self._overrides = {
+            "blink": np.array([e.override_blink for e in self.expressions], dtype=np.int8),
+            "look_at": np.array([e.override_look_at for e in self.expressions], dtype=np.int8),
+            "mouth": np.array([e.override_mouth for e in self.expressions], dtype=np.int8),
+        }
+
+        # Names → what they drive. Expression names win over morph names.
+        self._lookup: Dict[str, Tuple[bool, np.ndarray]] = {
+            name: (False, np.array(columns, dtype=np.intp)) for name, columns in morph_columns.items()
+        }
+        for i, e in enumerate(self.expressions):
+            for key in filter(None, (e.name, e.preset)):
+                self._lookup[key] = (True, np.array([i], dtype=np.intp))
+        self._lookup_lower = {name.lower(): entry for name, entry in self._lookup.items()}
+
+        self._groups = {
+            category: np.array([i for i, e in enumerate(self.expressions) if e.preset in presets], dtype=np.intp)
+            for category, presets in OVERRIDE_GROUPS.items()
+        }
+
+    @property
+    def names(self) -> List[str]:
+        return [e.name for e in self.expressions]
+
+    def __contains__(self, name) -> bool:
+        return self.resolve(name) is not None
+
+    def resolve(self, name: str) -> Optional[Tuple[bool, np.ndarray]]:
+        """(is_expression, indices into weights / morph_weights), or None."""
+        entry = self._lookup.get(name)
+        if entry is None:
+            entry = self._lookup_lower.get(name.lower())
+        return entry
+
+    def set_override(self, name: str, blink: Optional[str] = None,
+                     look_at: Optional[str] = None, mouth: Optional[str] = None) -> None:
+        """Changes an expression's override rules ("none" / "block" / "blend"),
+        e.g. to give VRM 0.x emotions the 1.0 behaviour of closing over blinks."""
+        entry = self.resolve(name)
+        if entry is None:
+            raise KeyError(name)
+        is_expression, index = entry
+        if not is_expression:
+            raise KeyError(f"{name!r} is a morph target, not an expression")
+        for category, mode in (("blink", blink), ("look_at", look_at), ("mouth", mouth)):
+            if mode is not None:
+                self._overrides[category][index] = _OVERRIDE_MODES[mode]
+
+    # ---- per frame ----
+    def clear(self) -> None:
+        self.weights.fill(0.0)
+        self.morph_weights.fill(0.0)
+
+    def set(self, name: str, weight: float) -> bool:
+        """
+        Drives an expression (by name or preset) or a raw morph target. When
+        several callers set the same name in a frame the strongest wins.
+        Returns False if the model has nothing by that name.
+        """
+        entry = self.resolve(name)
+        if entry is None:
+            return False
+
+        is_expression, index = entry
+        target = self.weights if is_expression else self.morph_weights
+        target[index] = np.maximum(target[index], weight)
+        return True
+
+    def evaluate(self) -> np.ndarray:
+        """Resolved per-target weights, (target_count,) in [0, 1]."""
+        w = np.clip(self.weights, 0.0, 1.0)
+        if self._binary.any():
+            w[self._binary] = (w[self._binary] > 0.5).astype(np.float32)
+
+        # FLAG: Overrides
+        # An expression that overrides blink/lookAt/mouth scales that group
+        # down. As in VRM 1.0 the amounts add up, clamped to 1: "block"
+        # counts 1 while active, "blend" its weight.
+        for category, group in self._groups.items():
+            if len(group) == 0:
+                continue
+            modes = self._overrides[category]
+            amount = np.where(modes == OVERRIDE_BLOCK, (w > 0.0).astype(np.float32),
+                              np.where(modes == OVERRIDE_BLEND, w, 0.0))
+            amount[group] = 0.0  # a group never overrides itself
+            w[group] *= 1.0 - min(1.0, float(amount.sum()))
+
+        # FLAG: One Sparse Mat-Vec
+        if len(self._rows):
+            contributions = self._values * w[self._rows]
+            combined = np.bincount(self._cols, weights=contributions, minlength=self.target_count)
+        else:
+            combined = 0.0
+
+        np.clip(combined + self.morph_weights, 0.0, 1.0, out=self.output)
+        return self.output
+
+    def mesh_weights(self, gltf_mesh: int) -> Optional[np.ndarray]:
+        """The slice of output for one glTF mesh (a view), None if it has no targets."""
+        offset = self.offsets.get(gltf_mesh)
+        if offset is None:
+            return None
+        return self.output[offset:offset + self.counts[gltf_mesh]]
@@ -1,4 +1,5 @@
 import json
+import mmap as mmap_module
 import struct
 from dataclasses import dataclass
 from pathlib import Path
@@ -15,23 +16,49 @@ class ParsedGLB:
     json: dict
     bin_blob: Optional[memoryview]
     header: dict
+    # Only set in mmap mode. Every view sliced from bin_blob (including
+    # NumPy accessor views) holds a reference, so the file stays mapped
+    # for as long as anything still points into it.
+    mapping: Optional[mmap_module.mmap] = None
+    # Where the GLB came from (lets worker processes re-map the same file)
+    path: Optional[Path] = None
+
+    def close(self) -> None:
+        """Drops our references to the BIN data; the OS unmaps it once no view is left."""
+        self.bin_blob = None
+        self.mapping = None
 
 class GLBParseError(RuntimeError):
     pass
 
 
-def parse_glb(path: str | Path) -> ParsedGLB:
+def _map_file(path: Path) -> mmap_module.mmap:
+    # FLAG: Read-Only Mapping
+    # Pages are faulted in on first touch, so resident memory follows what
+    # the loader actually reads instead of the file size. The descriptor can
+    # be closed right away; the mapping outlives it.
+    with open(path, "rb") as f:
+        return mmap_module.mmap(f.fileno(), 0, access=mmap_module.ACCESS_READ)
+
+
+def parse_glb(path: str | Path, mmap: bool = False) -> ParsedGLB:
     path = Path(path)
 
     if not path.exists():
         raise GLBParseError(f"GLB file not found: {path}")
 
-    data = path.read_bytes()
-    size = len(data)
-
-    if size < 12:
+    if path.stat().st_size < 12:
         raise GLBParseError("File too small to be a valid GLB")
 
+    mapping = None
+    if mmap:
+        mapping = _map_file(path)
+        data = mapping
+    else:
+        data = path.read_bytes()
+
+    size = len(data)
+
     # ---- Header ----
     magic, version, length = struct.unpack_from("<III", data, 0)
 
@@ -73,6 +100,7 @@ def parse_glb(path: str | Path) -> ParsedGLB:
             if json_chunk is not None:
                 raise GLBParseError("Multiple JSON chunks found")
             try:
+                # The only chunk we decode eagerly
                 json_text = chunk_data.tobytes().decode("utf-8")
                 json_chunk = json.loads(json_text)
             except Exception as e:
@@ -81,7 +109,7 @@ def parse_glb(path: str | Path) -> ParsedGLB:
         elif chunk_type == CHUNK_TYPE_BIN:
             if bin_chunk is not None:
                 raise GLBParseError("Multiple BIN chunks found")
-            bin_chunk = chunk_data  # memoryview, zero-copy
+            bin_chunk = chunk_data  # memoryview, zero-copy (bytes or mmap)
 
         else:
             # Unknown chunk — allowed by spec, but log loudly
@@ -100,7 +128,8 @@ def parse_glb(path: str | Path) -> ParsedGLB:
     print("[GLB] Extensions used:", json_chunk.get("extensionsUsed", []))
 
     if bin_chunk:
-        print("[GLB] BIN chunk size:", len(bin_chunk))
+        mode = "mmap" if mapping is not None else "heap"
+        print(f"[GLB] BIN chunk size: {len(bin_chunk)} ({mode})")
     else:
         print("[GLB] No BIN chunk present")
 
@@ -108,4 +137,6 @@ def parse_glb(path: str | Path) -> ParsedGLB:
         json=json_chunk,
         bin_blob=bin_chunk,
         header=header,
+        mapping=mapping,
+        path=path,
     )
@@ -1,15 +1,20 @@
-import struct
+from dataclasses import dataclass
 from typing import List, Tuple, Union
 
+import numpy as np
+
 class GLTFValidationError(RuntimeError):
     pass
 
-# componentType → (struct format char, byte size)
+# componentType → (numpy dtype, byte size)
+# Explicit little-endian dtypes: glTF binary data is always LE.
 _COMPONENT_TYPE_MAP = {
-    5126: ("f", 4),  # FLOAT
-    5125: ("I", 4),  # UNSIGNED_INT (32-bit indices)  <-- ADD THIS
-    5123: ("H", 2),  # UNSIGNED_SHORT (16-bit indices)
-    5121: ("B", 1),  # UNSIGNED_BYTE (rarely used for indices)
+    5120: (np.dtype("<i1"), 1),  # BYTE
+    5121: (np.dtype("<u1"), 1),  # UNSIGNED_BYTE
+    5122: (np.dtype("<i2"), 2),  # SHORT
+    5123: (np.dtype("<u2"), 2),  # UNSIGNED_SHORT (16-bit indices)
+    5125: (np.dtype("<u4"), 4),  # UNSIGNED_INT (32-bit indices)
+    5126: (np.dtype("<f4"), 4),  # FLOAT
 }
 
 # accessor.type → number of components
@@ -18,9 +23,29 @@ _TYPE_COMPONENT_COUNT = {
     "VEC2": 2,
     "VEC3": 3,
     "VEC4": 4,
+    "MAT2": 4,
+    "MAT3": 9,
     "MAT4": 16,
 }
 
+# FLAG: Matrix Column Padding
+# glTF pads every matrix column to 4 bytes. These combos end up with
+# gaps inside a single element, so they are read column by column.
+# (type, component size) → (columns, column stride in bytes)
+_PADDED_MATRIX_LAYOUTS = {
+    ("MAT2", 1): (2, 4),
+    ("MAT3", 1): (3, 4),
+    ("MAT3", 2): (3, 8),
+}
+
+# normalized int → float, per the glTF 2.0 spec (section 3.11)
+_NORMALIZE_DIVISOR = {
+    5120: 127.0,
+    5121: 255.0,
+    5122: 32767.0,
+    5123: 65535.0,
+}
+
 def validate_gltf(json_data: dict) -> None:
     if "buffers" not in json_data:
         raise GLTFValidationError("Missing 'buffers'")
@@ -57,23 +82,164 @@ def get_buffer_view(
     return bin_blob[offset:end], bv
 
 
-def read_accessor(
+def normalize_integers(values: np.ndarray, component_type: int) -> np.ndarray:
+    """Converts normalized integer data to float32 (glTF spec rules)."""
+    divisor = _NORMALIZE_DIVISOR.get(component_type)
+    if divisor is None:
+        raise GLTFValidationError(
+            f"componentType {component_type} cannot be normalized"
+        )
+
+    out = values.astype(np.float32)
+    out *= np.float32(1.0 / divisor)
+
+    # Signed types: both -128 and -127 map to -1.0
+    if component_type in (5120, 5122):
+        np.maximum(out, -1.0, out=out)
+
+    return out
+
+
+def _read_dense(
     json_data: dict,
     bin_blob: memoryview,
-    accessor_index: int
-) -> List[Union[int, Tuple[float, ...]]]:
+    buffer_view_index: int,
+    byte_offset: int,
+    component_type: int,
+    accessor_type: str,
+    count: int
+) -> np.ndarray:
+    raw_view, bv = get_buffer_view(json_data, bin_blob, buffer_view_index)
+
+    if component_type not in _COMPONENT_TYPE_MAP:
+        raise GLTFValidationError(f"Unsupported componentType {component_type}")
+
+    if accessor_type not in _TYPE_COMPONENT_COUNT:
+        raise GLTFValidationError(f"Unsupported accessor type {accessor_type}")
+
+    dtype, component_size = _COMPONENT_TYPE_MAP[component_type]
+    component_count = _TYPE_COMPONENT_COUNT[accessor_type]
 
+    padded = _PADDED_MATRIX_LAYOUTS.get((accessor_type, component_size))
+
+    stride = bv.get("byteStride")
+
+    element_size = component_size * component_count
+    if padded is not None:
+        columns, column_stride = padded
+        element_size = columns * column_stride
+    if stride is None:
+        stride = element_size
+
+    if stride < element_size:
+        raise GLTFValidationError(
+            f"byteStride {stride} is smaller than element size {element_size}"
+        )
+
+    if count > 0:
+        end = byte_offset + (count - 1) * stride + element_size
+        if end > len(raw_view):
+            raise GLTFValidationError(
+                "Accessor read exceeds bufferView bounds"
+            )
+
+    if padded is not None:
+        # View each column at its padded stride, then compact to (count, N)
+        rows = component_count // columns
+        columns_view = np.ndarray(
+            shape=(count, columns, rows),
+            dtype=dtype,
+            buffer=raw_view,
+            offset=byte_offset,
+            strides=(stride, column_stride, component_size),
+        )
+        return columns_view.reshape(count, component_count)
+
+    # FLAG: Zero-Copy View
+    # The array's base keeps raw_view (and therefore the BIN buffer) alive.
+    values = np.ndarray(
+        shape=(count, component_count),
+        dtype=dtype,
+        buffer=raw_view,
+        offset=byte_offset,
+        strides=(stride, component_size),
+    )
+
+    # Interleaved or unaligned → one contiguous, aligned copy
+    if not (values.flags.c_contiguous and values.flags.aligned):
+        values = values.copy()
+
+    return values
+
+
+def _apply_sparse(
+    json_data: dict,
+    bin_blob: memoryview,
+    acc: dict,
+    base: np.ndarray
+) -> np.ndarray:
+    sparse = acc["sparse"]
+    sparse_count = sparse["count"]
+
+    indices_info = sparse["indices"]
+    if indices_info["componentType"] not in (5121, 5123, 5125):
+        raise GLTFValidationError(
+            f"Invalid sparse index componentType {indices_info['componentType']}"
+        )
+
+    indices = _read_dense(
+        json_data, bin_blob,
+        indices_info["bufferView"],
+        indices_info.get("byteOffset", 0),
+        indices_info["componentType"],
+        "SCALAR",
+        sparse_count,
+    ).reshape(sparse_count)
+
+    values_info = sparse["values"]
+    values = _read_dense(
+        json_data, bin_blob,
+        values_info["bufferView"],
+        values_info.get("byteOffset", 0),
+        acc["componentType"],
+        acc["type"],
+        sparse_count,
+    )
+
+    if sparse_count and int(indices.max()) >= len(base):
+        raise GLTFValidationError("Sparse index exceeds accessor count")
+
+    # FLAG: Vectorized Scatter
+    # A zero-copy base is a view into the BIN chunk and gets its own copy;
+    # zeros and strided copies are already ours to scatter into.
+    if not (base.flags.owndata and base.flags.writeable):
+        base = base.copy()
+    base[indices] = values
+    return base
+
+
+def read_accessor_array(
+    json_data: dict,
+    bin_blob: memoryview,
+    accessor_index: int,
+    normalize: bool = True
+) -> np.ndarray:
+    """
+    Returns the accessor as a NumPy array shaped (count,) for SCALAR and
+    (count, components) otherwise.
+
+    Tightly packed data comes back as a zero-copy (read-only) view over
+    bin_blob. Interleaved (byteStride), column-padded MAT2/MAT3 or
+    misaligned data is copied once into a contiguous array, and sparse
+    accessors are scattered into their base (zeros when there is no
+    bufferView; copied first if it is a view over bin_blob). Normalized ints are expanded to float32 unless
+    normalize=False.
+    """
     try:
         acc = json_data["accessors"][accessor_index]
     except IndexError:
         raise GLTFValidationError(f"Accessor {accessor_index} out of range")
 
-    if "bufferView" not in acc:
-        raise GLTFValidationError("Sparse accessors are not supported")
-
-    buffer_view_index = acc["bufferView"]
-    raw_view, bv = get_buffer_view(json_data, bin_blob, buffer_view_index)
-
     component_type = acc["componentType"]
     accessor_type = acc["type"]
     count = acc["count"]
@@ -84,35 +250,98 @@ def read_accessor(
     if accessor_type not in _TYPE_COMPONENT_COUNT:
         raise GLTFValidationError(f"Unsupported accessor type {accessor_type}")
 
-    fmt_char, component_size = _COMPONENT_TYPE_MAP[component_type]
     component_count = _TYPE_COMPONENT_COUNT[accessor_type]
 
-    accessor_offset = acc.get("byteOffset", 0)
-    stride = bv.get("byteStride")
+    if "bufferView" in acc:
+        values = _read_dense(
+            json_data, bin_blob,
+            acc["bufferView"],
+            acc.get("byteOffset", 0),
+            component_type,
+            accessor_type,
+            count,
+        )
+    elif "sparse" in acc:
+        # No bufferView → the sparse values sit on top of zeros
+        dtype, _ = _COMPONENT_TYPE_MAP[component_type]
+        values = np.zeros((count, component_count), dtype=dtype)
+    else:
+        raise GLTFValidationError(
+            f"Accessor {accessor_index} has neither bufferView nor sparse"
+        )
 
-    element_size = component_size * component_count
-    if stride is None:
-        stride = element_size
+    if "sparse" in acc:
+        values = _apply_sparse(json_data, bin_blob, acc, values)
 
-    fmt = "<" + fmt_char * component_count
+    if normalize and acc.get("normalized", False):
+        values = normalize_integers(values, component_type)
 
-    results = []
+    if component_count == 1:
+        return values.reshape(count)
 
-    for i in range(count):
-        start = accessor_offset + i * stride
-        end = start + element_size
+    return values
+
+
+@dataclass
+class QuantizedAttribute:
+    """Attribute data kept in its stored (KHR_mesh_quantization) form."""
+    data: np.ndarray
+    component_type: int
+    normalized: bool
+
+    def dequantize(self) -> np.ndarray:
+        if self.normalized:
+            return normalize_integers(self.data, self.component_type)
+        return self.data.astype(np.float32, copy=False)
 
-        if end > len(raw_view):
-            raise GLTFValidationError(
-                "Accessor read exceeds bufferView bounds"
-            )
 
-        values = struct.unpack_from(fmt, raw_view, start)
+def read_attribute(
+    json_data: dict,
+    bin_blob: memoryview,
+    accessor_index: int,
+    keep_quantized: bool = False
+) -> Union[np.ndarray, QuantizedAttribute]:
+    """
+    Reads a float-valued vertex attribute (POSITION, NORMAL, TEXCOORD_n,
+    WEIGHTS_n, morph deltas, ...) whatever componentType it was stored as.
+
+    By default the result is always float32: normalized ints are scaled,
+    plain quantized ints (KHR_mesh_quantization) are cast. With
+    keep_quantized=True the stored integers are returned untouched together
+    with what is needed to expand them later.
+    """
+    try:
+        acc = json_data["accessors"][accessor_index]
+    except IndexError:
+        raise GLTFValidationError(f"Accessor {accessor_index} out of range")
+
+    raw = read_accessor_array(
+        json_data, bin_blob, accessor_index, normalize=False
+    )
+    quantized = QuantizedAttribute(
+        data=raw,
+        component_type=acc["componentType"],
+        normalized=acc.get("normalized", False),
+    )
+
+    if keep_quantized:
+        return quantized
+
+    return quantized.dequantize()
+
+
+def read_accessor(
+    json_data: dict,
+    bin_blob: memoryview,
+    accessor_index: int
+) -> List[Union[int, Tuple[float, ...]]]:
+    """Compatibility wrapper: the accessor as a list of scalars / tuples."""
+    values = read_accessor_array(
+        json_data, bin_blob, accessor_index, normalize=False
+    )
 
-        # SCALAR returns int, vectors return tuple
-        if component_count == 1:
-            results.append(values[0])
-        else:
-            results.append(values)
+    # SCALAR returns int, vectors return tuple
+    if values.ndim == 1:
+        return values.tolist()
 
-    return results
+    return [tuple(v) for v in values.tolist()]
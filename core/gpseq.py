@@ -0,0 +1,346 @@
+"""
+GPSEQ phoneme timelines, compiled to flat arrays.
+
+Text form (GEN_PHENOME_SEQ/*.gpseq), `;` or newline separated:
+
+    # GPSEQ v1
+    REST 5.00; A 1.00; PAUSE 0.5; E 1.00;
+
+compiles to three columns: absolute start times, durations and viseme ids
+(into `names`). PAUSE and unknown phonemes hold the previous viseme, as the
+sequencer always did. Sampling is a binary search on absolute playback
+time, so seeking anywhere, looping and rate changes cost the same as
+playing, and a long frame can't skip or drift past events.
+
+Binary form (.gpseqb) is the same columns on disk behind a small header.
+load_gpseq maps it instead of parsing it, so a multi-hour sequence opens
+instantly and only the pages a bisect touches are read.
+"""
+import argparse
+import mmap
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+GPSEQ_MAGIC = b"GPSEQB\0\0"
+GPSEQ_FORMAT_VERSION = 1
+GPSEQ_BINARY_SUFFIX = ".gpseqb"
+
+# magic, version, name count, event count, names block length
+_HEADER = struct.Struct("<8sIIQQ")
+_ALIGN = 8
+
+HOLD_PHONEMES = ("PAUSE", "HOLD")
+
+
+class GpseqError(RuntimeError):
+    pass
+
+
+@dataclass
+class CompiledSequence:
+    names: List[str]            # viseme id → phoneme name (A, E, REST, ...)
+    starts: np.ndarray          # (N,) float64 absolute start, seconds
+    durations: np.ndarray       # (N,) float32
+    visemes: np.ndarray         # (N,) uint16 into names
+    # Keeps the file mapped while the views above are alive
+    mapping: Optional[mmap.mmap] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return float(self.starts[-1] + self.durations[-1])
+
+    def locate(self, t: float) -> int:
+        """Index of the event playing at time t (clamped to the ends)."""
+        i = int(np.searchsorted(self.starts, t, side="right")) - 1
+        return min(max(i, 0), self.count - 1)
+
+
+# ==========================
+# Text → compiled
+# ==========================
+def parse_tokens(lines: Iterable[str]):
+    """(phoneme, duration) pairs from GPSEQ lines; malformed entries are skipped."""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        for part in line.split(";"):
+            tokens = part.split()
+            if len(tokens) != 2:
+                continue
+            phoneme, duration = tokens
+            try:
+                yield phoneme, float(duration)
+            except ValueError:
+                continue
+
+
+def compile_gpseq(lines: Iterable[str], known: Optional[Iterable[str]] = None) -> CompiledSequence:
+    """
+    Compiles GPSEQ text (a string or any iterable of lines, e.g. an open
+    file, so big files stream). `known` limits which phonemes are visemes;
+    anything else holds the previous one. Leading holds become REST.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    known = None if known is None else set(known)
+
+    names: List[str] = []
+    ids = {}
+    starts, durations, visemes = [], [], []
+    t = 0.0
+    current = None
+
+    for phoneme, duration in parse_tokens(lines):
+        if phoneme not in HOLD_PHONEMES and (known is None or phoneme in known):
+            current = phoneme
+        elif current is None:
+            current = "REST"
+
+        if current not in ids:
+            ids[current] = len(names)
+            names.append(current)
+
+        starts.append(t)
+        durations.append(duration)
+        visemes.append(ids[current])
+        t += duration
+
+    return CompiledSequence(
+        names=names,
+        starts=np.array(starts, dtype=np.float64),
+        durations=np.array(durations, dtype=np.float32),
+        visemes=np.array(visemes, dtype=np.uint16),
+    )
+
+
+# ==========================
+# Binary form
+# ==========================
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(names_length: int, count: int) -> Tuple[int, int, int, int]:
+    starts = _aligned(_HEADER.size + names_length)
+    durations = starts + 8 * count
+    visemes = _aligned(durations + 4 * count)
+    end = visemes + 2 * count
+    return starts, durations, visemes, end
+
+
+def write_gpseq_binary(sequence: CompiledSequence, path: str | Path) -> Path:
+    path = Path(path)
+    names_block = "\n".join(sequence.names).encode("utf-8")
+    count = sequence.count
+    starts_at, durations_at, visemes_at, _ = _layout(len(names_block), count)
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(GPSEQ_MAGIC, GPSEQ_FORMAT_VERSION, len(sequence.names), count, len(names_block)))
+        f.write(names_block)
+
+        for offset, column, dtype in (
+            (starts_at, sequence.starts, "<f8"),
+            (durations_at, sequence.durations, "<f4"),
+            (visemes_at, sequence.visemes, "<u2"),
+        ):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+
+    tmp_path.replace(path)
+    return path
+
+
+def _map_binary(path: Path) -> CompiledSequence:
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapping) < _HEADER.size:
+        raise GpseqError(f"File too small: {path}")
+
+    magic, version, name_count, count, names_length = _HEADER.unpack_from(mapping, 0)
+    if magic != GPSEQ_MAGIC:
+        raise GpseqError(f"Not a binary GPSEQ file: {path}")
+    if version != GPSEQ_FORMAT_VERSION:
+        raise GpseqError(f"GPSEQ format {version} != expected {GPSEQ_FORMAT_VERSION}")
+
+    starts_at, durations_at, visemes_at, end = _layout(names_length, count)
+    if end > len(mapping):
+        raise GpseqError(f"Truncated GPSEQ file: {path}")
+
+    names_block = mapping[_HEADER.size:_HEADER.size + names_length].decode("utf-8")
+    names = names_block.split("\n") if name_count else []
+
+    view = memoryview(mapping)
+    return CompiledSequence(
+        names=names,
+        starts=np.ndarray((count,), dtype="<f8", buffer=view, offset=starts_at),
+        durations=np.ndarray((count,), dtype="<f4", buffer=view, offset=durations_at),
+        visemes=np.ndarray((count,), dtype="<u2", buffer=view, offset=visemes_at),
+        mapping=mapping,
+    )
+
+
+def _resolve_holds(sequence: CompiledSequence, known: Iterable[str]) -> CompiledSequence:
+    """
+    Applies `known` to a sequence compiled without it: events whose viseme
+    isn't known take the previous known one (REST before the first), as
+    compile_gpseq would have done. A no-op, still zero-copy, when every
+    name is known.
+    """
+    known = set(known)
+    unknown = np.array([name not in known for name in sequence.names], dtype=bool)
+    if not unknown.any() or sequence.count == 0:
+        return sequence
+
+    names = list(sequence.names)
+    if "REST" not in names:
+        names.append("REST")
+    rest = names.index("REST")
+
+    # Forward-fill: each event points at the last event with a known viseme
+    keep = ~unknown[sequence.visemes]
+    source = np.where(keep, np.arange(sequence.count), -1)
+    np.maximum.accumulate(source, out=source)
+    visemes = np.where(source >= 0, sequence.visemes[np.maximum(source, 0)], rest).astype(np.uint16)
+
+    return CompiledSequence(
+        names=names,
+        starts=sequence.starts,
+        durations=sequence.durations,
+        visemes=visemes,
+        mapping=sequence.mapping,
+    )
+
+
+def load_gpseq(path: str | Path, known: Optional[Iterable[str]] = None) -> CompiledSequence:
+    """
+    Maps a .gpseqb, or compiles a text .gpseq line by line. `known` means
+    the same for both: a binary baked without it gets its holds resolved here.
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        is_binary = f.read(len(GPSEQ_MAGIC)) == GPSEQ_MAGIC
+
+    if is_binary:
+        sequence = _map_binary(path)
+        return sequence if known is None else _resolve_holds(sequence, known)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_gpseq(f, known)
+
+
+# ==========================
+# Playback
+# ==========================
+class SequencePlayer:
+    def __init__(self, sequence: CompiledSequence, rate: float = 1.0,
+                 loop: bool = False, crossfade: float = 0.08):
+        """
+        crossfade: seconds the outgoing and incoming visemes overlap,
+        centred on the boundary (0 for hard cuts).
+        """
+        self.sequence = sequence
+        self.rate = rate
+        self.loop = loop
+        self.crossfade = crossfade
+        self.time = 0.0
+        self.playing = sequence.count > 0
+
+    def seek(self, t: float) -> None:
+        duration = self.sequence.duration
+        if self.loop and duration > 0.0:
+            t %= duration
+        self.time = min(max(t, 0.0), duration)
+        self.playing = self.sequence.count > 0 and (self.loop or self.time < duration)
+
+    def advance(self, dt: float) -> None:
+        if not self.playing:
+            return
+
+        self.time += dt * self.rate
+        duration = self.sequence.duration
+        if self.loop and duration > 0.0:
+            self.time %= duration
+        elif self.time >= duration or self.time < 0.0:
+            self.time = min(max(self.time, 0.0), duration)
+            self.playing = False
+
+    def sample(self) -> List[Tuple[int, float]]:
+        """
+        [(viseme id, weight), ...] at the current time: one entry, or two
+        while crossing a boundary (weights sum to 1).
+        """
+        seq = self.sequence
+        if seq.count == 0:
+            return []
+
+        t = self.time
+        i = seq.locate(t)
+        current = int(seq.visemes[i])
+        half = self.crossfade * 0.5
+        if half <= 0.0:
+            return [(current, 1.0)]
+
+        start = float(seq.starts[i])
+        end = start + float(seq.durations[i])
+
+        # Fading into the next event, or still fading out of the previous one
+        if t > end - half and i + 1 < seq.count:
+            other = int(seq.visemes[i + 1])
+            x = (t - (end - half)) / self.crossfade
+        elif t < start + half and i > 0:
+            other = int(seq.visemes[i - 1])
+            x = 1.0 - (t - (start - half)) / self.crossfade
+        else:
+            return [(current, 1.0)]
+
+        x = min(max(x, 0.0), 1.0)
+        x = x * x * (3.0 - 2.0 * x)  # smoothstep
+        if other == current:
+            return [(current, 1.0)]
+        return [(current, 1.0 - x), (other, x)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.gpseq",
+        description="Compile text .gpseq timelines to the mapped binary form",
+    )
+    parser.add_argument("sources", nargs="+")
+    parser.add_argument("--known", default=None,
+                        help="Comma-separated visemes; other phonemes hold (default: all)")
+    args = parser.parse_args(argv)
+    known = args.known.split(",") if args.known else None
+    status = 0
+
+    for source in args.sources:
+        source = Path(source)
+        if not source.exists():
+            print(f"❌ Source not found: {source}")
+            status = 1
+            continue
+
+        sequence = load_gpseq(source, known)
+        out = write_gpseq_binary(sequence, source.with_suffix(GPSEQ_BINARY_SUFFIX))
+        print(f"✅ {out} ({sequence.count} events, {sequence.duration:.2f}s)")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+Audio → viseme weights, for speech that has no hand-authored GPSEQ.
+
+PCM (a WAV file or chunks from a live source) is cut into fixed hops; each
+hop gets a Hann-windowed FFT over the last `window` seconds, and per frame:
+
+    level    RMS energy mapped from [silence_db, full_db] to [0, 1]
+    voicing  share of energy below 3 kHz (fricatives and noise sit above)
+    F1, F2   strongest frequency in the first / second formant bands
+
+The formant pair is matched against a prototype per vowel in log-frequency
+space; the soft match times openness (level × voicing) gives A/E/I/O/U and
+the rest goes to REST (closure). Every hop in a chunk is analysed in one
+batch of array ops; a second of audio costs a few milliseconds.
+
+Offline, the dominant viseme per hop is run-length encoded into a .gpseq
+so results can be cached and played back like authored sequences:
+
+    python -m core.lipsync voice.wav -o GEN_PHENOME_SEQ/voice.gpseq
+"""
+import argparse
+import queue
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from core.gpseq import GPSEQ_BINARY_SUFFIX, compile_gpseq, write_gpseq_binary
+
+
+# Column order of every weights array; names are PHONEME_MAP keys
+VISEMES = ("A", "E", "I", "O", "U", "REST")
+REST = VISEMES.index("REST")
+
+# (F1, F2) in Hz, adult average
+_VOWEL_FORMANTS = np.array([
+    (750.0, 1250.0),   # A
+    (500.0, 1850.0),   # E
+    (320.0, 2300.0),   # I
+    (500.0, 900.0),    # O
+    (330.0, 850.0),    # U
+], dtype=np.float32)
+_F1_BAND = (200.0, 1000.0)
+_F2_BAND = (700.0, 2800.0)
+_F2_MIN_GAP = 250.0
+_VOICED_BAND = 3000.0
+
+
+def _decode_pcm(frames: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Interleaved PCM bytes → mono float32 in [-1, 1]."""
+    raw = np.frombuffer(frames, dtype=np.uint8)
+    if sample_width == 1:
+        samples = (raw.astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = raw.view("<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        # Widen to int32 with the sample in the top three bytes
+        wide = np.zeros((len(raw) // 3, 4), dtype=np.uint8)
+        wide[:, 1:] = raw.reshape(-1, 3)
+        samples = wide.view("<i4").ravel().astype(np.float32) / 2147483648.0
+    elif sample_width == 4:
+        samples = raw.view("<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported PCM sample width: {sample_width} bytes")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def read_wav_chunks(path: str | Path, chunk_seconds: float = 0.1) -> Tuple[int, Iterator[np.ndarray]]:
+    """(sample rate, generator of mono float32 chunks), read incrementally."""
+    wav = wave.open(str(path), "rb")
+    sample_rate = wav.getframerate()
+    frames_per_chunk = max(1, int(sample_rate * chunk_seconds))
+
+    def chunks():
+        with wav:
+            while True:
+                frames = wav.readframes(frames_per_chunk)
+                if not frames:
+                    return
+                yield _decode_pcm(frames, wav.getsampwidth(), wav.getnchannels())
+
+    return sample_rate, chunks()
+
+
+def read_wav(path: str | Path) -> Tuple[int, np.ndarray]:
+    sample_rate, chunks = read_wav_chunks(path, chunk_seconds=10.0)
+    parts = list(chunks)
+    samples = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    return sample_rate, samples
+
+
+class LipSyncAnalyzer:
+    def __init__(self, sample_rate: int, hop: float = 0.01, window: float = 0.032,
+                 silence_db: float = -50.0, full_db: float = -20.0,
+                 attack: float = 0.02, release: float = 0.06):
+        """
+        hop / window in seconds. attack / release are the smoothing time
+        constants for weights rising / falling, so the jaw doesn't chatter.
+        """
+        self.sample_rate = sample_rate
+        self.hop = max(1, int(round(hop * sample_rate)))
+        self.window = max(self.hop, int(round(window * sample_rate)))
+        self.hop_seconds = self.hop / sample_rate
+        self.silence_db = silence_db
+        self.full_db = full_db
+
+        n_fft = 1 << (self.window - 1).bit_length()
+        self.n_fft = n_fft
+        self._hann = np.hanning(self.window).astype(np.float32)
+        freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate).astype(np.float32)
+        self._f1_bins = (freqs >= _F1_BAND[0]) & (freqs <= _F1_BAND[1])
+        self._f2_bins = (freqs >= _F2_BAND[0]) & (freqs <= _F2_BAND[1])
+        self._voiced_bins = freqs <= _VOICED_BAND
+        self._f1_freqs = freqs[self._f1_bins]
+        self._f2_freqs = freqs[self._f2_bins]
+        self._log_prototypes = np.log(_VOWEL_FORMANTS)
+
+        self._attack = 1.0 - np.exp(-self.hop_seconds / attack) if attack > 0 else 1.0
+        self._release = 1.0 - np.exp(-self.hop_seconds / release) if release > 0 else 1.0
+
+        # Carry: the last window - hop samples, so hops line up across chunks
+        self._pending = np.zeros(self.window - self.hop, dtype=np.float32)
+        self._state = np.zeros(len(VISEMES), dtype=np.float32)
+        self._state[REST] = 1.0
+
+    def reset(self) -> None:
+        self._pending = np.zeros(self.window - self.hop, dtype=np.float32)
+        self._state.fill(0.0)
+        self._state[REST] = 1.0
+
+    def feed(self, pcm: np.ndarray) -> np.ndarray:
+        """
+        Mono float32 samples, any length. Returns (hops, len(VISEMES)) weights
+        for every hop completed by this chunk; leftovers wait for the next.
+        """
+        buffer = np.concatenate((self._pending, np.asarray(pcm, dtype=np.float32).ravel()))
+        count = (len(buffer) - self.window) // self.hop + 1
+        if count <= 0:
+            self._pending = buffer
+            return np.zeros((0, len(VISEMES)), dtype=np.float32)
+
+        # FLAG: Strided Framing
+        # Every hop is a view into one buffer; no per-frame copies or loops.
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.window)[::self.hop][:count]
+        self._pending = buffer[count * self.hop:]
+
+        targets = self._frame_targets(frames)
+        return self._smooth(targets)
+
+    def _frame_targets(self, frames: np.ndarray) -> np.ndarray:
+        rms = np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+        db = 20.0 * np.log10(rms)
+        level = np.clip((db - self.silence_db) / (self.full_db - self.silence_db), 0.0, 1.0)
+
+        power = np.abs(np.fft.rfft(frames * self._hann, n=self.n_fft, axis=1)) ** 2
+        total = power.sum(axis=1) + 1e-12
+        voicing = np.clip(power[:, self._voiced_bins].sum(axis=1) / total, 0.0, 1.0)
+
+        # Strongest bin per band; F2 is searched above F1 so back vowels,
+        # whose formants sit close together, don't report F1 twice
+        f1 = self._f1_freqs[np.argmax(power[:, self._f1_bins], axis=1)]
+        f2_power = power[:, self._f2_bins]
+        f2_power = np.where(self._f2_freqs[None, :] > (f1[:, None] + _F2_MIN_GAP), f2_power, 0.0)
+        f2 = self._f2_freqs[np.argmax(f2_power, axis=1)]
+
+        # Soft nearest vowel in log (F1, F2)
+        formants = np.log(np.stack((np.maximum(f1, 1.0), np.maximum(f2, 1.0)), axis=1))
+        distance = ((formants[:, None, :] - self._log_prototypes[None, :, :]) / 0.18) ** 2
+        match = np.exp(-0.5 * distance.sum(axis=2))
+        match /= match.sum(axis=1, keepdims=True) + 1e-12
+
+        openness = level * np.clip((voicing - 0.5) * 2.0, 0.0, 1.0)
+        targets = np.empty((len(frames), len(VISEMES)), dtype=np.float32)
+        targets[:, :REST] = match * openness[:, None]
+        targets[:, REST] = 1.0 - openness
+        return targets
+
+    def _smooth(self, targets: np.ndarray) -> np.ndarray:
+        # A one-pole filter is inherently sequential; one row per hop (100/s)
+        out = np.empty_like(targets)
+        state = self._state
+        for i, target in enumerate(targets):
+            rate = np.where(target > state, self._attack, self._release)
+            state += (target - state) * rate
+            out[i] = state
+        return out
+
+
+def analyze_wav(path: str | Path, **options) -> Tuple[np.ndarray, float]:
+    """(hops, len(VISEMES)) weights for a whole file, and the hop in seconds."""
+    sample_rate, chunks = read_wav_chunks(path, chunk_seconds=1.0)
+    analyzer = LipSyncAnalyzer(sample_rate, **options)
+    parts = [analyzer.feed(chunk) for chunk in chunks]
+    weights = np.concatenate(parts) if parts else np.zeros((0, len(VISEMES)), dtype=np.float32)
+    return weights, analyzer.hop_seconds
+
+
+def weights_to_gpseq(weights: np.ndarray, hop_seconds: float, min_duration: float = 0.05) -> str:
+    """Dominant viseme per hop, run-length encoded; runs shorter than
+    min_duration fold into the previous one so the mouth doesn't flicker."""
+    lines = ["# GPSEQ v1"]
+    if len(weights) == 0:
+        return "\n".join(lines) + "\n"
+
+    dominant = np.argmax(weights, axis=1)
+    edges = np.flatnonzero(np.diff(dominant)) + 1
+    starts = np.concatenate(([0], edges))
+    lengths = np.diff(np.concatenate((starts, [len(dominant)])))
+
+    runs: List[List] = []
+    for start, length in zip(starts, lengths):
+        viseme, duration = VISEMES[dominant[start]], length * hop_seconds
+        if runs and (duration < min_duration or runs[-1][0] == viseme):
+            runs[-1][1] += duration
+        else:
+            runs.append([viseme, duration])
+
+    lines.extend(f"{viseme} {duration:.3f};" for viseme, duration in runs)
+    return "\n".join(lines) + "\n"
+
+
+# ==========================
+# Live source
+# ==========================
+class AudioVisemeSource:
+    """
+    Live audio for MouthSequencer.attach_stream: push() PCM from any thread
+    (e.g. an audio callback), sample(dt) on the render thread. Analysis runs
+    in sample(), a hop batch at a time; playback trails the audio by what
+    has not been analysed yet, at most one chunk.
+    """
+
+    def __init__(self, sample_rate: int, **options):
+        self.analyzer = LipSyncAnalyzer(sample_rate, **options)
+        self.address = f"audio@{sample_rate}Hz"
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._weights = np.zeros((0, len(VISEMES)), dtype=np.float32)
+        self.time = 0.0           # playback position within _weights
+        self.underruns = 0
+
+    def push(self, pcm: np.ndarray) -> None:
+        self._queue.put(pcm)
+
+    def sample(self, dt: float) -> List[Tuple[str, float]]:
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if chunks:
+            fresh = self.analyzer.feed(np.concatenate(chunks))
+            if len(fresh):
+                hop = self.analyzer.hop_seconds
+                played = min(int(self.time / hop), len(self._weights))
+                self._weights = np.concatenate((self._weights[played:], fresh))
+                self.time -= played * hop
+
+        if len(self._weights) == 0:
+            return []
+
+        self.time += dt
+        index = int(self.time / self.analyzer.hop_seconds)
+        if index >= len(self._weights):
+            # Audio hasn't caught up; hold the last frame
+            self.underruns += 1
+            index = len(self._weights) - 1
+            self.time = index * self.analyzer.hop_seconds
+
+        frame = self._weights[index]
+        return [(VISEMES[i], float(frame[i])) for i in np.flatnonzero(frame > 0.01)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.lipsync",
+        description="Analyse speech WAVs into .gpseq viseme sequences",
+    )
+    parser.add_argument("sources", nargs="+")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Output .gpseq (single source; default: next to the WAV)")
+    parser.add_argument("--binary", action="store_true", help="Also write the mapped .gpseqb")
+    parser.add_argument("--min-duration", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.sources) > 1:
+        parser.error("--output takes a single source")
+
+    status = 0
+    for source in args.sources:
+        source = Path(source)
+        if not source.exists():
+            print(f"❌ Source not found: {source}")
+            status = 1
+            continue
+
+        began = time.perf_counter()
+        weights, hop = analyze_wav(source)
+        elapsed = time.perf_counter() - began
+        audio_seconds = len(weights) * hop
+
+        text = weights_to_gpseq(weights, hop, args.min_duration)
+        out = Path(args.output) if args.output else source.with_suffix(".gpseq")
+        out.write_text(text, encoding="utf-8")
+        if args.binary:
+            write_gpseq_binary(compile_gpseq(text), out.with_suffix(GPSEQ_BINARY_SUFFIX))
+
+        speed = audio_seconds / elapsed if elapsed > 0 else float("inf")
+        print(f"✅ {out} ({audio_seconds:.2f}s of audio, {speed:.0f}x real time)")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Concurrent primitive packaging.
+
+Every primitive of a ParsedGLB is independent, so package_mesh runs on a
+pool and the results are handed back in mesh/primitive order. Threads
+share the parser's BIN buffer directly (the heavy NumPy work releases the
+GIL). Processes each map the same file read-only, so the page cache is
+shared and only the finished arrays travel back.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from core.glb_parser import ParsedGLB, parse_glb
+from core.mesh_data import package_mesh, read_image_bytes
+
+
+@dataclass
+class PackagedPrimitive:
+    mesh_index: int
+    prim_index: int
+    mesh_name: str
+    packed: dict
+    seconds: float
+
+
+def iter_primitives(gltf_json: dict):
+    """Yields (mesh_index, prim_index, mesh_name, primitive) in file order."""
+    for mesh_idx, mesh in enumerate(gltf_json.get("meshes", [])):
+        mesh_name = mesh.get("name", f"Mesh_{mesh_idx}")
+        for prim_idx, primitive in enumerate(mesh["primitives"]):
+            yield mesh_idx, prim_idx, mesh_name, primitive
+
+
+def _package_timed(gltf_json, bin_blob, primitive, mesh_idx):
+    start = time.perf_counter()
+    packed = package_mesh(gltf_json, bin_blob, primitive, mesh_index=mesh_idx)
+    return packed, time.perf_counter() - start
+
+
+# ---- Process pool worker state (one mapping per worker) ----
+_WORKER_PARSED: Optional[ParsedGLB] = None
+
+
+def _init_worker(path):
+    global _WORKER_PARSED
+    _WORKER_PARSED = parse_glb(path, mmap=True)
+
+
+def _package_in_worker(mesh_idx, prim_idx):
+    gltf_json = _WORKER_PARSED.json
+    primitive = gltf_json["meshes"][mesh_idx]["primitives"][prim_idx]
+    packed, seconds = _package_timed(gltf_json, _WORKER_PARSED.bin_blob, primitive, mesh_idx)
+
+    # Views into the worker's mapping can't be pickled; the parent
+    # re-slices the image from its own BIN buffer.
+    packed["texture"] = None
+    return packed, seconds
+
+
+def package_all_primitives(
+    parsed: ParsedGLB,
+    max_workers: Optional[int] = None,
+    mode: str = "thread",
+    report: bool = True
+) -> List[PackagedPrimitive]:
+    """
+    Packages every primitive of `parsed` concurrently.
+
+    mode: "thread" (default), "process" (needs parsed.path) or "serial".
+    Results are always in mesh/primitive order, each with its own timing.
+    """
+    if mode not in ("thread", "process", "serial"):
+        raise ValueError(f"Unknown packaging mode: {mode}")
+
+    gltf_json = parsed.json
+    work = list(iter_primitives(gltf_json))
+
+    if max_workers is None:
+        max_workers = min(len(work), os.cpu_count() or 1) or 1
+
+    # A pool of one is just overhead
+    if max_workers <= 1:
+        mode = "serial"
+        max_workers = 1
+
+    wall_start = time.perf_counter()
+
+    if mode == "serial":
+        outputs = [
+            _package_timed(gltf_json, parsed.bin_blob, primitive, mesh_idx)
+            for mesh_idx, _, _, primitive in work
+        ]
+
+    elif mode == "thread":
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(_package_timed, gltf_json, parsed.bin_blob, primitive, mesh_idx)
+                for mesh_idx, _, _, primitive in work
+            ]
+            outputs = [f.result() for f in futures]
+
+    else:  # process
+        if parsed.path is None:
+            raise ValueError("mode='process' needs a ParsedGLB loaded from a path")
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(str(parsed.path),),
+        ) as pool:
+            futures = [
+                pool.submit(_package_in_worker, mesh_idx, prim_idx)
+                for mesh_idx, prim_idx, _, _ in work
+            ]
+            outputs = [f.result() for f in futures]
+
+        for packed, _ in outputs:
+            if packed["image_index"] is not None:
+                packed["texture"] = read_image_bytes(
+                    gltf_json, parsed.bin_blob, packed["image_index"]
+                )
+
+    wall = time.perf_counter() - wall_start
+
+    results = [
+        PackagedPrimitive(
+            mesh_index=mesh_idx,
+            prim_index=prim_idx,
+            mesh_name=mesh_name,
+            packed=packed,
+            seconds=seconds,
+        )
+        for (mesh_idx, prim_idx, mesh_name, _), (packed, seconds) in zip(work, outputs)
+    ]
+
+    if report:
+        print_timing_report(results, wall, mode, max_workers)
+
+    return results
+
+
+def print_timing_report(results: List[PackagedPrimitive], wall: float, mode: str, workers: int):
+    if not results:
+        print("[LOADER] No primitives to package")
+        return
+
+    total = sum(r.seconds for r in results)
+    slowest = max(results, key=lambda r: r.seconds)
+
+    print(
+        f"[LOADER] {len(results)} primitives in {wall * 1000:.1f} ms wall "
+        f"({mode} x{workers}, sum {total * 1000:.1f} ms, "
+        f"critical path {slowest.seconds * 1000:.1f} ms: "
+        f"{slowest.mesh_name}/{slowest.prim_index})"
+    )
+
+    for r in sorted(results, key=lambda r: r.seconds, reverse=True)[:5]:
+        print(f"[LOADER]   {r.seconds * 1000:8.2f} ms  {r.mesh_name}/{r.prim_index}")
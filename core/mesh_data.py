@@ -1,57 +1,57 @@
 import numpy as np
-from core.gltf_accessors import read_accessor
+from core.gltf_accessors import read_accessor_array, read_attribute
+from core.morph_stack import MorphStack
 
-def package_mesh(gltf_json, bin_blob, primitive_data):
+
+def find_mesh_index(gltf_json, primitive_data):
+    for mesh_idx, mesh in enumerate(gltf_json.get("meshes", [])):
+        if any(p is primitive_data for p in mesh["primitives"]):
+            return mesh_idx
+    return None
+
+
+def package_mesh(gltf_json, bin_blob, primitive_data, mesh_index=None):
     attrs = primitive_data["attributes"]
 
     # === Geometry ===
-    pos = np.array(
-        read_accessor(gltf_json, bin_blob, attrs["POSITION"]),
-        dtype=np.float32
-    )
+    # read_attribute expands quantized / normalized storage to float32
+    pos = read_attribute(gltf_json, bin_blob, attrs["POSITION"])
 
     if "NORMAL" in attrs:
-        normals = np.array(
-            read_accessor(gltf_json, bin_blob, attrs["NORMAL"]),
-            dtype=np.float32
-        )
+        normals = read_attribute(gltf_json, bin_blob, attrs["NORMAL"])
     else:
         normals = np.zeros_like(pos, dtype=np.float32)
         normals[:, 1] = 1.0
 
-    uv = np.array(
-        read_accessor(gltf_json, bin_blob, attrs["TEXCOORD_0"]),
-        dtype=np.float32
-    )
-    # Morph Target Extraction    
-    target_names = gltf_json.get("meshes", [{}])[0].get("extras", {}).get("targetNames", [])
-    all_morphs = {}
+    uv = read_attribute(gltf_json, bin_blob, attrs["TEXCOORD_0"])
+    # Morph Target Extraction
+    # Names come from the mesh that owns this primitive, not meshes[0]
+    if mesh_index is None:
+        mesh_index = find_mesh_index(gltf_json, primitive_data)
 
-    if "targets" in primitive_data:
-        for i, target in enumerate(primitive_data["targets"]):
-            name = target_names[i] if i < len(target_names) else f"target_{i}"
-            all_morphs[name] = read_accessor(gltf_json, bin_blob, target["POSITION"])
+    all_morphs = MorphStack.from_primitive(
+        gltf_json, bin_blob, primitive_data, len(pos), mesh_index=mesh_index
+    )
 
     # === Skinning ===
-    joints = np.array(
-        read_accessor(gltf_json, bin_blob, attrs["JOINTS_0"]),
-        dtype=np.uint32
-    )
-    weights = np.array(
-        read_accessor(gltf_json, bin_blob, attrs["WEIGHTS_0"]),
-        dtype=np.float32
-    )
+    # JOINTS_0 is usually u8/u16 on disk; the native side wants uint32
+    joints = read_accessor_array(
+        gltf_json, bin_blob, attrs["JOINTS_0"]
+    ).astype(np.uint32)
+    weights = read_attribute(gltf_json, bin_blob, attrs["WEIGHTS_0"])
 
     # === Indices ===
-    indices = np.array(
-        read_accessor(gltf_json, bin_blob, primitive_data["indices"]),
-        dtype=np.uint32
-    )
+    indices = read_accessor_array(
+        gltf_json, bin_blob, primitive_data["indices"]
+    ).astype(np.uint32, copy=False)
 
     # === Material ===
-    texture_bytes, base_color_factor = extract_base_color_texture(
-        gltf_json, bin_blob, primitive_data
+    image_index, sampler_index, base_color_factor = resolve_base_color_texture(
+        gltf_json, primitive_data
     )
+    texture_bytes = None
+    if image_index is not None:
+        texture_bytes = read_image_bytes(gltf_json, bin_blob, image_index)
 
     return {
         "vertices": pos,
@@ -64,15 +64,18 @@ def package_mesh(gltf_json, bin_blob, primitive_data):
         "morph_targets": all_morphs,
 
         # MATERIAL
+        "image_index": image_index,
+        "sampler_index": sampler_index,
         "texture": texture_bytes,
         "base_color_factor": base_color_factor,
     }
 
 
-def extract_base_color_texture(gltf_json, bin_blob, primitive):
+def resolve_base_color_texture(gltf_json, primitive):
+    """Returns (image index, sampler index, baseColorFactor); indices may be None."""
     mat_idx = primitive.get("material")
     if mat_idx is None:
-        return None, [1.0, 1.0, 1.0, 1.0]
+        return None, None, [1.0, 1.0, 1.0, 1.0]
 
     material = gltf_json["materials"][mat_idx]
     pbr = material.get("pbrMetallicRoughness", {})
@@ -81,10 +84,13 @@ def extract_base_color_texture(gltf_json, bin_blob, primitive):
 
     tex_info = pbr.get("baseColorTexture")
     if not tex_info:
-        return None, base_color_factor
+        return None, None, base_color_factor
+
+    texture = gltf_json["textures"][tex_info["index"]]
+    return texture.get("source"), texture.get("sampler"), base_color_factor
 
-    tex_idx = tex_info["index"]
-    image_idx = gltf_json["textures"][tex_idx]["source"]
+
+def read_image_bytes(gltf_json, bin_blob, image_idx):
     image = gltf_json["images"][image_idx]
 
     # Embedded image (VRM standard)
@@ -92,11 +98,19 @@ def extract_base_color_texture(gltf_json, bin_blob, primitive):
         bv = gltf_json["bufferViews"][image["bufferView"]]
         start = bv.get("byteOffset", 0)
         end = start + bv["byteLength"]
-        return bin_blob[start:end], base_color_factor
+        return bin_blob[start:end]
 
     # External image (rare)
     if "uri" in image:
         with open(image["uri"], "rb") as f:
-            return f.read(), base_color_factor
+            return f.read()
+
+    return None
+
+
+def extract_base_color_texture(gltf_json, bin_blob, primitive):
+    image_idx, _, base_color_factor = resolve_base_color_texture(gltf_json, primitive)
+    if image_idx is None:
+        return None, base_color_factor
 
-    return None, base_color_factor
+    return read_image_bytes(gltf_json, bin_blob, image_idx), base_color_factor
@@ -0,0 +1,128 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from core.gltf_accessors import read_attribute
+
+
+def resolve_target_names(gltf_json, mesh_index, primitive, target_count):
+    """
+    Morph names for one primitive. glTF keeps them on the owning mesh
+    (mesh.extras.targetNames); some exporters (older UniVRM) put them on the
+    primitive instead. Anything unnamed becomes target_<i>.
+    """
+    names = []
+    if mesh_index is not None:
+        mesh = gltf_json.get("meshes", [])[mesh_index]
+        names = mesh.get("extras", {}).get("targetNames", [])
+
+    if not names:
+        names = primitive.get("extras", {}).get("targetNames", [])
+
+    return [
+        names[i] if i < len(names) else f"target_{i}"
+        for i in range(target_count)
+    ]
+
+
+def compute_active_ranges(deltas: np.ndarray) -> np.ndarray:
+    """(targets, 2) int32 [start, end) vertex range each target actually moves."""
+    target_count, vertex_count = deltas.shape[:2]
+    ranges = np.zeros((target_count, 2), dtype=np.int32)
+    if target_count == 0 or vertex_count == 0:
+        return ranges
+
+    moving = np.any(deltas != 0.0, axis=2)
+    has_any = moving.any(axis=1)
+
+    first = np.argmax(moving, axis=1)
+    last = vertex_count - np.argmax(moving[:, ::-1], axis=1)
+
+    ranges[:, 0] = np.where(has_any, first, 0)
+    ranges[:, 1] = np.where(has_any, last, 0)
+    return ranges
+
+
+@dataclass
+class MorphStack:
+    """
+    Every morph target of one primitive in a single contiguous block.
+
+    Reads like the old {name: deltas} dict (`stack[name]`, `in`, `keys()`,
+    `values()`, `items()`), but each value is a view into `deltas`, so
+    handing targets to behaviours or the native side never copies.
+    """
+    names: List[str]
+    deltas: np.ndarray                          # (targets, vertices, 3) float32
+    normal_deltas: Optional[np.ndarray] = None  # same shape, if the file has them
+    ranges: Optional[np.ndarray] = None         # (targets, 2) int32 [start, end)
+    index: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.index = {name: i for i, name in enumerate(self.names)}
+        if self.ranges is None:
+            self.ranges = compute_active_ranges(self.deltas)
+
+    @classmethod
+    def from_primitive(cls, gltf_json, bin_blob, primitive, vertex_count, mesh_index=None):
+        targets = primitive.get("targets", [])
+        names = resolve_target_names(gltf_json, mesh_index, primitive, len(targets))
+
+        # FLAG: One Allocation
+        # Targets are separate accessors, so each is copied once into its slot.
+        deltas = np.zeros((len(targets), vertex_count, 3), dtype=np.float32)
+        normal_deltas = None
+        if any("NORMAL" in t for t in targets):
+            normal_deltas = np.zeros_like(deltas)
+
+        for i, target in enumerate(targets):
+            if "POSITION" in target:
+                deltas[i] = read_attribute(gltf_json, bin_blob, target["POSITION"])
+            if normal_deltas is not None and "NORMAL" in target:
+                normal_deltas[i] = read_attribute(gltf_json, bin_blob, target["NORMAL"])
+
+        return cls(names=names, deltas=deltas, normal_deltas=normal_deltas)
+
+    @property
+    def target_count(self) -> int:
+        return self.deltas.shape[0]
+
+    @property
+    def vertex_count(self) -> int:
+        return self.deltas.shape[1]
+
+    # ---- dict-style access (views, never copies) ----
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.deltas[self.index[name]]
+
+    def __contains__(self, name) -> bool:
+        return name in self.index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def get(self, name: str, default=None):
+        i = self.index.get(name)
+        return default if i is None else self.deltas[i]
+
+    def keys(self) -> List[str]:
+        return list(self.names)
+
+    def values(self) -> List[np.ndarray]:
+        return [self.deltas[i] for i in range(len(self.names))]
+
+    def items(self):
+        return [(name, self.deltas[i]) for i, name in enumerate(self.names)]
+
+    def normals(self, name: str) -> Optional[np.ndarray]:
+        if self.normal_deltas is None:
+            return None
+        return self.normal_deltas[self.index[name]]
+
+    def active_range(self, name: str) -> tuple:
+        start, end = self.ranges[self.index[name]]
+        return int(start), int(end)
@@ -0,0 +1,207 @@
+"""
+Joint-local poses as TRS arrays, and a layered blender on top of them.
+
+A Pose is (J,3) translations, (J,4) xyzw rotations and (J,3) scales in
+skin.joints order. Poses blend component-wise (lerp / nlerp or slerp),
+which never shears the way blending baked matrices does. The blender
+stacks layers over the rest pose, e.g.
+
+    idle clip (override) → talking gesture (override, arms mask)
+                         → head look (additive, head mask)
+
+and converts the result to local matrices with one batched call.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from core.animation import nlerp, quaternion_conjugate, quaternion_multiply, slerp
+
+
+_IDENTITY_QUAT = np.array([0.0, 0.0, 0.0, 1.0], dtype=np.float32)
+
+
+@dataclass
+class Pose:
+    translations: np.ndarray   # (J, 3)
+    rotations: np.ndarray      # (J, 4) xyzw
+    scales: np.ndarray         # (J, 3)
+
+    @classmethod
+    def rest(cls, skeleton) -> "Pose":
+        return cls(
+            skeleton.bind_translations.copy(),
+            skeleton.bind_rotations.copy(),
+            skeleton.bind_scales.copy(),
+        )
+
+    @classmethod
+    def identity(cls, joint_count: int) -> "Pose":
+        """The neutral additive pose: no offset, no rotation, unit scale."""
+        return cls(
+            np.zeros((joint_count, 3), dtype=np.float32),
+            np.tile(_IDENTITY_QUAT, (joint_count, 1)),
+            np.ones((joint_count, 3), dtype=np.float32),
+        )
+
+    @property
+    def joint_count(self) -> int:
+        return len(self.translations)
+
+    def copy(self) -> "Pose":
+        return Pose(self.translations.copy(), self.rotations.copy(), self.scales.copy())
+
+    def copy_from(self, other: "Pose") -> None:
+        np.copyto(self.translations, other.translations)
+        np.copyto(self.rotations, other.rotations)
+        np.copyto(self.scales, other.scales)
+
+
+def make_additive(pose: Pose, reference: Pose) -> Pose:
+    """
+    The delta that turns `reference` into `pose`, in joint-local space:
+    translation difference, reference⁻¹ * rotation, scale ratio.
+    """
+    return Pose(
+        pose.translations - reference.translations,
+        quaternion_multiply(quaternion_conjugate(reference.rotations), pose.rotations).astype(np.float32),
+        pose.scales / np.where(reference.scales == 0.0, 1.0, reference.scales),
+    )
+
+
+def joint_mask(skeleton, joints: Iterable[int], include_children: bool = True) -> np.ndarray:
+    """(J,) float32 mask, 1.0 on `joints` (and everything below them)."""
+    mask = np.zeros(len(skeleton.joint_nodes), dtype=np.float32)
+    mask[list(joints)] = 1.0
+
+    if include_children:
+        # Parents sit one level up, so walking levels top-down propagates
+        for level, parents in zip(skeleton.levels[1:], skeleton.level_parents[1:]):
+            mask[level] = np.maximum(mask[level], mask[parents])
+    return mask
+
+
+@dataclass
+class PoseLayer:
+    name: str
+    pose: Pose
+    weight: float = 1.0
+    mask: Optional[np.ndarray] = None   # (J,) per-joint weight, None = every joint
+    additive: bool = False              # pose is a delta (see make_additive)
+    space: str = "local"                # additive rotations: "local" or "parent"
+
+
+class PoseBlender:
+    def __init__(self, skeleton, rotation_blend: str = "nlerp"):
+        """
+        rotation_blend: "nlerp" (cheaper, fine for blending nearby poses) or
+        "slerp" (constant angular velocity).
+        """
+        if rotation_blend not in ("nlerp", "slerp"):
+            raise ValueError(f"Unknown rotation blend {rotation_blend!r}")
+
+        self.skeleton = skeleton
+        self.joint_count = len(skeleton.joint_nodes)
+        self.base = Pose.rest(skeleton)
+        self.output = self.base.copy()
+        self.layers: List[PoseLayer] = []
+        self.by_name: Dict[str, PoseLayer] = {}
+        self._blend_rotations = nlerp if rotation_blend == "nlerp" else slerp
+
+    # ---- layers ----
+    def add_layer(
+        self,
+        name: str,
+        pose: Optional[Pose] = None,
+        weight: float = 1.0,
+        mask: Optional[np.ndarray] = None,
+        additive: bool = False,
+        space: str = "local",
+    ) -> PoseLayer:
+        """Appends a layer (evaluated after every existing one). Omitting `pose`
+        gives a rest pose, or the identity delta for additive layers.
+
+        space picks the frame an additive rotation turns about: "local"
+        applies it after the joint's rotation (rotation * delta, what
+        make_additive produces), "parent" before it (delta * rotation), so
+        e.g. a yaw delta turns about the parent's up axis whatever the
+        joint's own orientation."""
+        if name in self.by_name:
+            raise ValueError(f"Pose layer {name!r} already exists")
+        if space not in ("local", "parent"):
+            raise ValueError(f"Unknown additive space {space!r}")
+
+        if pose is None:
+            pose = Pose.identity(self.joint_count) if additive else Pose.rest(self.skeleton)
+
+        layer = PoseLayer(
+            name=name, pose=pose, weight=weight, mask=mask, additive=additive, space=space
+        )
+        self.layers.append(layer)
+        self.by_name[name] = layer
+        return layer
+
+    def layer(self, name: str) -> PoseLayer:
+        return self.by_name[name]
+
+    def remove_layer(self, name: str) -> None:
+        layer = self.by_name.pop(name)
+        self.layers.remove(layer)
+
+    def mask(self, joints: Iterable[int], include_children: bool = True) -> np.ndarray:
+        return joint_mask(self.skeleton, joints, include_children)
+
+    # ---- evaluation ----
+    def evaluate(self) -> Pose:
+        """Blends every layer over the base pose into self.output."""
+        out = self.output
+        out.copy_from(self.base)
+
+        for layer in self.layers:
+            if layer.weight <= 0.0:
+                continue
+
+            if layer.mask is None:
+                joints = slice(None)
+                w = np.float32(min(layer.weight, 1.0))
+                w_col = w
+            else:
+                weights = np.minimum(layer.mask * layer.weight, 1.0)
+                joints = np.flatnonzero(weights > 0.0)
+                if len(joints) == 0:
+                    continue
+                w = weights[joints].astype(np.float32)
+                w_col = w[:, None]
+
+            src = layer.pose
+            t = out.translations[joints]
+            r = out.rotations[joints]
+            s = out.scales[joints]
+
+            if layer.additive:
+                # Scale the delta by the weight, then stack it on top
+                delta_r = self._blend_rotations(
+                    np.broadcast_to(_IDENTITY_QUAT, r.shape), src.rotations[joints], w
+                )
+                out.translations[joints] = t + src.translations[joints] * w_col
+                if layer.space == "parent":
+                    out.rotations[joints] = quaternion_multiply(delta_r, r)
+                else:
+                    out.rotations[joints] = quaternion_multiply(r, delta_r)
+                out.scales[joints] = s * (1.0 + (src.scales[joints] - 1.0) * w_col)
+            else:
+                out.translations[joints] = t + (src.translations[joints] - t) * w_col
+                out.rotations[joints] = self._blend_rotations(r, src.rotations[joints], w)
+                out.scales[joints] = s + (src.scales[joints] - s) * w_col
+
+        return out
+
+    def apply(self) -> None:
+        """evaluate(), then one batched TRS → matrix into the skeleton."""
+        pose = self.evaluate()
+        skeleton = self.skeleton
+        np.copyto(skeleton.translations, pose.translations)
+        np.copyto(skeleton.rotations, pose.rotations)
+        np.copyto(skeleton.scales, pose.scales)
+        skeleton.compose_locals()
@@ -0,0 +1,281 @@
+"""
+Progressive background asset loading.
+
+A worker thread turns a VRM into GPU-ready packets (from the .grekocache
+when it is valid, otherwise straight from the GLB) and pushes them onto a
+bounded queue. The render loop calls pump() once per frame; it hands over
+at most N packets or as many as fit in a time budget, so the window keeps
+drawing whatever has arrived while the rest streams in.
+
+Packet order:
+    "asset"      once, first: glTF JSON + inverse-bind matrices
+    "primitive"  one per primitive, in mesh/primitive order; carries the
+                 RGBA mip chain of its image the first time it is used
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.asset_cache import build_mip_chain, hash_file, load_cache, write_cache
+from core.glb_parser import parse_glb
+from core.gltf_accessors import read_accessor_array
+from core.loader import iter_primitives
+from core.mesh_data import package_mesh, read_image_bytes
+
+
+@dataclass
+class LoadPacket:
+    kind: str                                # "asset" | "primitive"
+    index: int = 0                           # primitive number (0-based)
+    total: int = 0                           # primitives in the asset
+    gltf: Optional[dict] = None              # "asset" only
+    inverse_bind: Optional[np.ndarray] = None
+    primitive: Optional[dict] = None         # package_mesh output + mesh/prim ids
+    # image index → mip chain, only for images not sent before
+    images: Dict[int, List[np.ndarray]] = field(default_factory=dict)
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class ProgressiveLoader:
+    def __init__(
+        self,
+        source: str | Path,
+        max_queued: int = 4,
+        on_progress: Optional[Callable[[int, int, LoadPacket], None]] = None,
+        cook_when_done: bool = True,
+        decode_image=None,
+    ):
+        """
+        max_queued bounds how far the worker can run ahead of the GPU (and
+        therefore how much packaged data sits in memory).
+        on_progress(done, total, packet) runs on the render thread in pump().
+        cook_when_done writes the .grekocache after a cold load so the next
+        launch is warm. It is built from the parts already streamed, after
+        `done` has turned True.
+        """
+        self.source = Path(source)
+        self.on_progress = on_progress
+        self.cook_when_done = cook_when_done
+        self.decode_image = decode_image
+
+        self._queue: "queue.Queue[LoadPacket]" = queue.Queue(maxsize=max_queued)
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+        self.total = 0
+        self.delivered = 0
+        # Mip chains delivered so far; dropped once the last part is handled
+        self.images: Dict[int, List[np.ndarray]] = {}
+
+    # ---- control (render thread) ----
+    def start(self) -> "ProgressiveLoader":
+        self._thread = threading.Thread(
+            target=self._run, name=f"loader:{self.source.name}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def cancel(self, wait: bool = True) -> None:
+        self._cancel.set()
+        # Unblock a worker stuck on a full queue
+        while not self._queue.empty():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def take_image(self, image_index: int) -> Optional[List[np.ndarray]]:
+        """
+        TextureRegistry(load_levels=...) hook. The chain stays available
+        until the stream ends, so a second sampler/sRGB variant of the same
+        image can still upload; after that only the GL textures hold it.
+        """
+        return self.images.get(image_index)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        """
+        True once every packet has been produced *and* delivered. Stays
+        False while a worker error is pending, so the next pump() raises it.
+        """
+        return self._finished.is_set() and self._queue.empty() and self._error is None
+
+    @property
+    def progress(self) -> float:
+        return self.delivered / self.total if self.total else 0.0
+
+    def pump(
+        self,
+        handle: Callable[[LoadPacket], None],
+        max_packets: int = 4,
+        budget_ms: float = 4.0
+    ) -> int:
+        """
+        Delivers queued packets to `handle` (uploads happen in there) until
+        max_packets or budget_ms is used up. Never blocks. Returns the number
+        of packets handled. Worker errors are re-raised here.
+        """
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        handled = 0
+
+        while handled < max_packets and time.perf_counter() < deadline:
+            try:
+                packet = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            self.images.update(packet.images)
+            handle(packet)
+            handled += 1
+
+            if packet.kind == "primitive":
+                self.delivered += 1
+                if self.on_progress is not None:
+                    self.on_progress(self.delivered, self.total, packet)
+                if self.delivered == self.total:
+                    # Every part is uploaded; nothing asks for pixels again
+                    self.images.clear()
+
+        return handled
+
+    # ---- worker thread ----
+    def _put(self, packet: LoadPacket) -> None:
+        while True:
+            if self._cancel.is_set():
+                raise LoadCancelled()
+            try:
+                self._queue.put(packet, timeout=0.05)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self) -> None:
+        try:
+            cooked = load_cache(self.source)
+            if cooked is not None:
+                self._stream_cooked(cooked)
+            else:
+                self._stream_glb()
+        except LoadCancelled:
+            print(f"[LOADER] Cancelled {self.source.name}")
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._finished.set()
+
+    def _stream_cooked(self, cooked) -> None:
+        self.total = len(cooked.primitives)
+        self._put(LoadPacket(
+            kind="asset",
+            total=self.total,
+            gltf=cooked.gltf,
+            inverse_bind=cooked.inverse_bind,
+        ))
+
+        sent = set()
+        for i, packed in enumerate(cooked.primitives):
+            images = {}
+            image_index = packed["image_index"]
+            if image_index is not None and image_index not in sent:
+                if image_index in cooked.textures:
+                    images[image_index] = cooked.textures[image_index]
+                sent.add(image_index)
+
+            self._put(LoadPacket(
+                kind="primitive", index=i, total=self.total,
+                primitive=packed, images=images,
+            ))
+
+    def _stream_glb(self) -> None:
+        decode_image = self.decode_image
+        if decode_image is None:
+            import core.greko_native as gn
+            decode_image = gn.decode_texture  # releases the GIL
+
+        stat = self.source.stat()
+        parsed = parse_glb(self.source, mmap=True)
+        gltf = parsed.json
+        work = list(iter_primitives(gltf))
+        self.total = len(work)
+
+        inverse_bind = None
+        if gltf.get("skins") and "inverseBindMatrices" in gltf["skins"][0]:
+            ibm = read_accessor_array(gltf, parsed.bin_blob, gltf["skins"][0]["inverseBindMatrices"])
+            inverse_bind = np.ascontiguousarray(ibm.reshape(-1, 4, 4).transpose(0, 2, 1))
+
+        self._put(LoadPacket(kind="asset", total=self.total, gltf=gltf, inverse_bind=inverse_bind))
+
+        # Kept for the cache when cooking, so nothing is packaged twice
+        parts: List[dict] = []
+        chains: Dict[int, List[np.ndarray]] = {}
+
+        sent = set()
+        for i, (mesh_idx, prim_idx, mesh_name, primitive) in enumerate(work):
+            if self._cancel.is_set():
+                raise LoadCancelled()
+
+            packed = package_mesh(gltf, parsed.bin_blob, primitive, mesh_index=mesh_idx)
+            packed.update(mesh_index=mesh_idx, prim_index=prim_idx, mesh_name=mesh_name)
+
+            images = {}
+            image_index = packed["image_index"]
+            if image_index is not None and image_index not in sent:
+                sent.add(image_index)
+                data = read_image_bytes(gltf, parsed.bin_blob, image_index)
+                rgba = decode_image(data) if data is not None else None
+                if rgba is not None:
+                    images[image_index] = build_mip_chain(rgba, srgb=True)
+
+            if self.cook_when_done:
+                parts.append(packed)
+                chains.update(images)
+
+            self._put(LoadPacket(
+                kind="primitive", index=i, total=self.total,
+                primitive=packed, images=images,
+            ))
+
+        if self.cook_when_done and not self._cancel.is_set():
+            # Everything is queued: the render thread can call it done
+            # while the cache is written
+            self._finished.set()
+            self._cook(gltf, parts, chains, inverse_bind, stat)
+
+    def _cook(self, gltf, parts, chains, inverse_bind, stat) -> None:
+        # FLAG: Cook From The Stream
+        # The parts and mip chains are the ones just uploaded; only the
+        # source hash is new work. A cook failure costs the next launch
+        # its warm start, nothing more.
+        try:
+            source_hash = hash_file(self.source)
+            now = self.source.stat()
+            if (now.st_size, now.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                print(f"[LOADER] {self.source.name} changed while loading, not cooking")
+                return
+            write_cache(
+                self.source, gltf, parts, inverse_bind,
+                lambda image_indices: {i: chains[i] for i in image_indices if i in chains},
+                source_hash=source_hash, stat=stat,
+            )
+        except Exception as e:
+            print(f"[LOADER] ⚠ Could not cook {self.source.name}: {e}")
@@ -0,0 +1,210 @@
+"""
+Shared assets and the avatars placed from them.
+
+An asset is one VRM uploaded once: geometry, textures and morph data. Each
+avatar in the scene is an instance of an asset with its own transform,
+skeleton pose and morph weights. The renderer draws every instance of an
+asset with one instanced draw per mesh, so a crowd costs roughly what a
+single avatar does in draw calls.
+
+Asset 0 / instance 0 are created by gn.init_renderer() and are what the
+single-avatar calls (upload_mesh without asset=, update_joints,
+set_morph_weights) talk to.
+
+GL-thread only.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.asset_cache import load_or_cook
+from core.skeleton import Skeleton
+from core.texture_registry import TextureRegistry
+
+
+def upload_part(gn, packed, textures, asset_id=0):
+    """Uploads one packaged primitive into an asset; returns its mesh index."""
+    mesh_name = packed["mesh_name"]
+
+    # FLAG: Check for transparency tags
+    # We look at the mesh name or the material index to identify face parts
+    is_transparent = False
+    if "Face" in mesh_name or "Eye" in mesh_name or "Hair" in mesh_name:
+        is_transparent = True
+
+    tex_id = textures.acquire(packed["image_index"], packed["sampler_index"])
+
+    # Every target goes up once; expressions are weights from then on
+    morphs = packed["morph_targets"]
+
+    # FLAG: The Sorting Logic
+    # Opaque draws first and Transparent draws last; the renderer does the
+    # ordering now, because parts arrive in file order while streaming.
+    return gn.upload_mesh(
+        packed["vertices"],
+        packed["normals"],
+        packed["uvs"],
+        packed["joints"],
+        packed["weights"],
+        packed["indices"],
+        morphs.deltas if morphs.target_count else None,
+        tex_id,
+        transparent=is_transparent,
+        asset=asset_id,
+    )
+
+
+@dataclass
+class SceneAsset:
+    path: Path
+    asset_id: int
+    gltf: dict
+    inverse_bind: Optional[np.ndarray]
+    textures: TextureRegistry
+    mesh_indices: List[int] = field(default_factory=list)
+    face_mesh_indices: List[int] = field(default_factory=list)
+    instances: int = 0
+    # Keeps the cache mapping (and so every view above) alive
+    cooked: object = None
+
+    @property
+    def joint_count(self) -> int:
+        return 0 if self.inverse_bind is None else len(self.inverse_bind)
+
+
+class AvatarInstance:
+    """One avatar in the scene. The pose is private; the asset is shared."""
+
+    def __init__(self, gn, asset: SceneAsset, instance_id: int):
+        self.gn = gn
+        self.asset = asset
+        self.instance_id = instance_id
+
+        # Own local/global matrices; inverse binds are a view into the asset
+        self.skeleton = Skeleton(asset.gltf, None, inverse_bind=asset.inverse_bind)
+        self.transform = np.identity(4, dtype=np.float32)
+        self.visible = True
+
+    def set_transform(self, matrix) -> None:
+        """Row-major 4x4 world transform, like everything else on the Python side."""
+        self.transform = np.asarray(matrix, dtype=np.float32).reshape(4, 4)
+        # Native side wants column-major
+        self.gn.set_instance_transform(self.instance_id, self.transform.T.ravel())
+
+    def set_position(self, x: float, y: float, z: float) -> None:
+        matrix = self.transform.copy()
+        matrix[:3, 3] = (x, y, z)
+        self.set_transform(matrix)
+
+    def set_morph_weights(self, mesh_index: int, weights) -> None:
+        """One weight per morph target of that mesh, in MorphStack order."""
+        self.gn.set_instance_morph_weights(self.instance_id, mesh_index, weights)
+
+    def set_visible(self, visible: bool) -> None:
+        self.visible = visible
+        self.gn.set_instance_visible(self.instance_id, visible)
+
+    def update(self) -> None:
+        """Re-solves the skeleton and sends the joints that moved."""
+        self.skeleton.update()
+        palette = self.skeleton.get_skinning_buffer()
+        first, count = self.skeleton.palette_range
+        if count:
+            self.gn.update_instance_joints(self.instance_id, palette, first, count)
+
+
+class AssetLibrary:
+    """
+    Loads each VRM once (through the .grekocache) and spawns any number of
+    avatars from it.
+    """
+
+    def __init__(self, gn):
+        self.gn = gn
+        self.assets: Dict[Path, SceneAsset] = {}
+        self.avatars: Dict[int, AvatarInstance] = {}
+
+    def load(self, path: str | Path) -> SceneAsset:
+        key = Path(path).resolve()
+        asset = self.assets.get(key)
+        if asset is not None:
+            return asset
+
+        cooked = load_or_cook(key)
+        joint_count = 0 if cooked.inverse_bind is None else len(cooked.inverse_bind)
+
+        asset = SceneAsset(
+            path=key,
+            asset_id=self.gn.create_asset(max(joint_count, 1)),
+            gltf=cooked.gltf,
+            inverse_bind=cooked.inverse_bind,
+            textures=TextureRegistry.from_cooked(self.gn, cooked),
+            cooked=cooked,
+        )
+
+        for packed in cooked.primitives:
+            mesh_index = upload_part(self.gn, packed, asset.textures, asset.asset_id)
+            asset.mesh_indices.append(mesh_index)
+            if "Face" in packed["mesh_name"]:
+                asset.face_mesh_indices.append(mesh_index)
+
+        print(f"📦 Asset {asset.asset_id}: {key.name} ({len(asset.mesh_indices)} meshes, {joint_count} joints)")
+        self.assets[key] = asset
+        return asset
+
+    def adopt(
+        self,
+        path: str | Path,
+        gltf: dict,
+        inverse_bind: Optional[np.ndarray],
+        textures: TextureRegistry,
+        asset_id: int = 0,
+    ) -> SceneAsset:
+        """
+        Registers a VRM that is already on the GPU, e.g. asset 0 filled by
+        the ProgressiveLoader, so spawn(path) instances it instead of
+        uploading a second copy. The caller appends mesh indices as parts
+        arrive.
+        """
+        key = Path(path).resolve()
+        asset = SceneAsset(
+            path=key,
+            asset_id=asset_id,
+            gltf=gltf,
+            inverse_bind=inverse_bind,
+            textures=textures,
+        )
+        self.assets[key] = asset
+        return asset
+
+    def spawn(self, path: str | Path, position=(0.0, 0.0, 0.0)) -> AvatarInstance:
+        asset = self.load(path)
+
+        instance_id = self.gn.create_instance(asset.asset_id)
+        if instance_id < 0:
+            raise RuntimeError(f"Renderer refused an instance of asset {asset.asset_id}")
+
+        avatar = AvatarInstance(self.gn, asset, instance_id)
+        avatar.set_position(*position)
+        avatar.update()  # bind pose until something animates it
+
+        asset.instances += 1
+        self.avatars[instance_id] = avatar
+        return avatar
+
+    def despawn(self, avatar: AvatarInstance) -> None:
+        """
+        Removes the avatar from the scene. The asset stays resident so the
+        next spawn is free; its GPU data lives as long as the renderer.
+        """
+        if self.avatars.pop(avatar.instance_id, None) is None:
+            return
+        self.gn.destroy_instance(avatar.instance_id)
+        avatar.asset.instances -= 1
+
+    def update_all(self) -> None:
+        for avatar in self.avatars.values():
+            if avatar.visible:
+                avatar.update()
@@ -1,60 +1,120 @@
 import numpy as np
-from core.gltf_accessors import read_accessor
+from core.gltf_accessors import read_accessor_array
+
+
+def trs_to_matrices(translations, rotations, scales, out=None):
+    """
+    (N,3) T, (N,4) xyzw unit quaternions and (N,3) S into (N,4,4)
+    row-major T @ R @ S, written into `out` if given. No 4x4 products:
+    each element is written directly.
+    """
+    n = len(translations)
+    if out is None:
+        out = np.empty((n, 4, 4), dtype=np.float32)
+
+    x, y, z, w = rotations[:, 0], rotations[:, 1], rotations[:, 2], rotations[:, 3]
+    sx, sy, sz = scales[:, 0], scales[:, 1], scales[:, 2]
+
+    xx, yy, zz = x * x, y * y, z * z
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+
+    # R @ diag(S): column j of the rotation scaled by S[j]
+    out[:, 0, 0] = (1 - 2 * (yy + zz)) * sx
+    out[:, 0, 1] = 2 * (xy - wz) * sy
+    out[:, 0, 2] = 2 * (xz + wy) * sz
+    out[:, 1, 0] = 2 * (xy + wz) * sx
+    out[:, 1, 1] = (1 - 2 * (xx + zz)) * sy
+    out[:, 1, 2] = 2 * (yz - wx) * sz
+    out[:, 2, 0] = 2 * (xz - wy) * sx
+    out[:, 2, 1] = 2 * (yz + wx) * sy
+    out[:, 2, 2] = (1 - 2 * (xx + yy)) * sz
+
+    out[:, :3, 3] = translations
+    out[:, 3, :3] = 0.0
+    out[:, 3, 3] = 1.0
+    return out
 
 
 def compose_matrix(translation, rotation, scale):
     # translation: [x, y, z]
     # rotation: [x, y, z, w] (quaternion)
     # scale: [x, y, z]
-
-    t = np.identity(4, dtype=np.float32)
-    t[:3, 3] = translation
-
-    x, y, z, w = rotation
-    r = np.array([
-        [1 - 2*y*y - 2*z*z, 2*x*y - 2*z*w,     2*x*z + 2*y*w,     0],
-        [2*x*y + 2*z*w,     1 - 2*x*x - 2*z*z, 2*y*z - 2*x*w,     0],
-        [2*x*z - 2*y*w,     2*y*z + 2*x*w,     1 - 2*x*x - 2*y*y, 0],
-        [0,                 0,                 0,                 1]
-    ], dtype=np.float32)
-
-    s = np.identity(4, dtype=np.float32)
-    s[0, 0] = scale[0]
-    s[1, 1] = scale[1]
-    s[2, 2] = scale[2]
-
-    return t @ r @ s
+    return trs_to_matrices(
+        np.asarray([translation], dtype=np.float32),
+        np.asarray([rotation], dtype=np.float32),
+        np.asarray([scale], dtype=np.float32),
+    )[0]
 
 
 class Skeleton:
-    def __init__(self, gltf_json, bin_blob):
+    def __init__(self, gltf_json, bin_blob, inverse_bind=None):
         self.nodes = gltf_json["nodes"]
         self.skin = gltf_json["skins"][0]  # VRM uses one skin
 
         self.joint_nodes = self.skin["joints"]
 
-        # Read inverse bind matrices
-        ibm_accessor = self.skin["inverseBindMatrices"]
-        ibm_raw = read_accessor(gltf_json, bin_blob, ibm_accessor)
+        # Read inverse bind matrices (or take the pre-cooked ones)
+        if inverse_bind is not None:
+            self.inverse_bind = inverse_bind
+        else:
+            ibm_accessor = self.skin["inverseBindMatrices"]
+            ibm_raw = read_accessor_array(gltf_json, bin_blob, ibm_accessor)
 
-        self.inverse_bind = (
-            np.array(ibm_raw, dtype=np.float32)
-            .reshape(-1, 4, 4)
-            .transpose(0, 2, 1)
-        )
+            self.inverse_bind = np.ascontiguousarray(
+                ibm_raw.reshape(-1, 4, 4).transpose(0, 2, 1)
+            )
 
 
-        self.local_matrices = []
-        self.global_matrices = []
         self.parent_map = {}
         self.joint_index_map = {
             node_index: i for i, node_index in enumerate(self.joint_nodes)
         }
 
+        joint_count = len(self.joint_nodes)
+
+        # FLAG: Contiguous Pose
+        # (J, 4, 4) arrays instead of lists of matrices. Row i is joint i in
+        # skin.joints order, so `local_matrices[HEAD] = m` still works.
+        self.local_matrices = np.zeros((joint_count, 4, 4), dtype=np.float32)
+        self.global_matrices = np.zeros((joint_count, 4, 4), dtype=np.float32)
+        self.global_matrices[:] = np.identity(4, dtype=np.float32)
+
+        # FLAG: Local TRS
+        # What animation writes into; compose_locals() bakes it into
+        # local_matrices. Code that pokes local_matrices directly (the head
+        # sway) keeps working as long as nothing re-composes that joint.
+        self.translations = np.zeros((joint_count, 3), dtype=np.float32)
+        self.rotations = np.zeros((joint_count, 4), dtype=np.float32)
+        self.scales = np.ones((joint_count, 3), dtype=np.float32)
+
         self._build_hierarchy()
         self._init_local_matrices()
 
-        self.bind_locals = [m.copy() for m in self.local_matrices]
+        self.bind_locals = self.local_matrices.copy()
+        self.bind_translations = self.translations.copy()
+        self.bind_rotations = self.rotations.copy()
+        self.bind_scales = self.scales.copy()
+
+        # FLAG: Preallocated Palette
+        # palette[i] = (global[i] @ inverse_bind[i]).T, i.e. the column-major
+        # mat4 GL wants, written in place. Computed as IB^T @ G^T so the
+        # transpose is folded into the matmul instead of a copy.
+        self._inverse_bind_t = np.ascontiguousarray(
+            np.asarray(self.inverse_bind, dtype=np.float32).transpose(0, 2, 1)
+        )
+        self.palette = np.zeros((joint_count, 4, 4), dtype=np.float32)
+        self._palette_flat = self.palette.reshape(-1)
+
+        # Joints whose global changed since the palette was last rebuilt.
+        # NaN "previous" globals make the first frame fully dirty.
+        self.dirty = np.ones(joint_count, dtype=bool)
+        self._prev_globals = np.full_like(self.global_matrices, np.nan)
+        self._changed = np.zeros((joint_count, 4, 4), dtype=bool)
+        self._joint_changed = np.zeros(joint_count, dtype=bool)
+
+        # (first joint, joint count) rewritten by the last get_skinning_buffer()
+        self.palette_range = (0, 0)
 
 
         #for i, node_index in enumerate(self.joint_nodes):
@@ -69,40 +129,123 @@ class Skeleton:
             for child in node.get("children", []):
                 self.parent_map[child] = parent_index
 
+        # Parent joint per joint (-1 = root: no parent, or the parent is not
+        # a joint of this skin)
+        joint_count = len(self.joint_nodes)
+        self.parent_indices = np.full(joint_count, -1, dtype=np.int32)
+        for i, node_index in enumerate(self.joint_nodes):
+            parent_node = self.parent_map.get(node_index)
+            if parent_node is not None:
+                self.parent_indices[i] = self.joint_index_map.get(parent_node, -1)
+
+        # FLAG: Depth Levels
+        # skin.joints is not guaranteed to list parents first, so joints are
+        # grouped by depth once here. Every joint in a level only depends on
+        # the level above, which makes each level one batched matmul.
+        depth = np.full(joint_count, -1, dtype=np.int32)
+        for i in range(joint_count):
+            chain = []
+            j = i
+            while j != -1 and depth[j] == -1:
+                if j in chain:
+                    raise ValueError(f"Joint hierarchy has a cycle at joint {j}")
+                chain.append(j)
+                j = self.parent_indices[j]
+
+            d = -1 if j == -1 else depth[j]
+            for j in reversed(chain):
+                d += 1
+                depth[j] = d
+
+        self.depth = depth
+        level_count = int(depth.max()) + 1 if joint_count else 0
+        self.levels = [np.flatnonzero(depth == d).astype(np.intp) for d in range(level_count)]
+        self.level_parents = [self.parent_indices[level].astype(np.intp) for level in self.levels]
+
+        # Per-level scratch (parent globals, locals, product) so update()
+        # gathers and multiplies with out= and allocates nothing
+        self._level_scratch = [
+            tuple(np.empty((len(level), 4, 4), dtype=np.float32) for _ in range(3))
+            for level in self.levels
+        ]
+
     def _init_local_matrices(self):
-        for node_index in self.joint_nodes:
+        for i, node_index in enumerate(self.joint_nodes):
             node = self.nodes[node_index]
 
-            t = node.get("translation", [0, 0, 0])
-            r = node.get("rotation", [0, 0, 0, 1])
-            s = node.get("scale", [1, 1, 1])
-
-            local = compose_matrix(t, r, s)
+            self.translations[i] = node.get("translation", [0, 0, 0])
+            self.rotations[i] = node.get("rotation", [0, 0, 0, 1])
+            self.scales[i] = node.get("scale", [1, 1, 1])
 
-            self.local_matrices.append(local)
-            self.global_matrices.append(np.identity(4, dtype=np.float32))
+        # One batched TRS → matrix for the whole bind pose
+        self.compose_locals()
 
-    def update(self):
-        for i, node_index in enumerate(self.joint_nodes):
-            parent_node = self.parent_map.get(node_index)
+    def compose_locals(self, joints=None):
+        """Rebuilds local_matrices from the TRS arrays (all joints, or an index array)."""
+        if joints is None:
+            trs_to_matrices(self.translations, self.rotations, self.scales, out=self.local_matrices)
+            return
 
-            if parent_node is not None:
-                parent_joint_index = self.joint_index_map.get(parent_node)
-
-                if parent_joint_index is not None:
-                    self.global_matrices[i] = (
-                        self.global_matrices[parent_joint_index] @ self.local_matrices[i]
-                    )
-                    continue
+        self.local_matrices[joints] = trs_to_matrices(
+            self.translations[joints], self.rotations[joints], self.scales[joints]
+        )
 
-            # No parent in joint list → root
-            self.global_matrices[i] = self.local_matrices[i]
+    def update(self):
+        if not self.levels:
+            return
+
+        # Roots: no parent in the joint list
+        roots = self.levels[0]
+        _, root_locals, _ = self._level_scratch[0]
+        np.take(self.local_matrices, roots, axis=0, out=root_locals)
+        self.global_matrices[roots] = root_locals
+
+        # One matmul per depth level instead of one per joint
+        for level, parents, (parent_globals, level_locals, product) in zip(
+            self.levels[1:], self.level_parents[1:], self._level_scratch[1:]
+        ):
+            np.take(self.global_matrices, parents, axis=0, out=parent_globals)
+            np.take(self.local_matrices, level, axis=0, out=level_locals)
+            np.matmul(parent_globals, level_locals, out=product)
+            self.global_matrices[level] = product
+
+        # FLAG: Dirty Tracking
+        # Compare against last frame into preallocated scratch; only joints
+        # that actually moved are re-multiplied and re-sent.
+        np.not_equal(self.global_matrices, self._prev_globals, out=self._changed)
+        np.any(self._changed, axis=(1, 2), out=self._joint_changed)
+        np.logical_or(self.dirty, self._joint_changed, out=self.dirty)
+        np.copyto(self._prev_globals, self.global_matrices)
+
+    def mark_all_dirty(self):
+        self.dirty[:] = True
 
     def get_skinning_buffer(self):
-        final = []
-
-        for i in range(len(self.joint_nodes)):
-            mat = self.global_matrices[i] @ self.inverse_bind[i]
-            final.append(mat.T.flatten())
+        """
+        Flat float32 palette (16 floats per joint, column-major), straight
+        from self.palette - pass it to gn.update_joints as is, no copy.
+        Only dirty joints are recomputed; self.palette_range says which
+        (first, count) changed so the native side can copy just those.
+        The array is reused every frame: copy it if you need to keep it.
+        """
+        dirty = self.dirty
+        dirty_joints = np.flatnonzero(dirty)
+
+        if len(dirty_joints) == 0:
+            self.palette_range = (0, 0)
+            return self._palette_flat
+
+        first = int(dirty_joints[0])
+        end = int(dirty_joints[-1]) + 1
+
+        # The whole [first, end) range in place: slices are views, so this
+        # allocates nothing (clean joints inside it just get rewritten)
+        np.matmul(
+            self._inverse_bind_t[first:end],
+            self.global_matrices[first:end].transpose(0, 2, 1),
+            out=self.palette[first:end],
+        )
 
-        return np.concatenate(final).astype(np.float32)
+        dirty[:] = False
+        self.palette_range = (first, end - first)
+        return self._palette_flat
@@ -0,0 +1,172 @@
+"""
+Image-level texture cache shared by every primitive and material.
+
+VRM exporters put most of a character on one or two atlases, so many
+primitives point at the same glTF image. The registry decodes and uploads
+each (image, sampler state, colour space) combination exactly once and
+hands the same GL texture to every user. Textures are reference counted
+and deleted when their last user releases them.
+
+GL-thread only (uploads and deletes go straight to the native renderer).
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# glTF sampler defaults are "implementation defined"; these match what the
+# native loader has always used.
+GL_LINEAR = 0x2601
+GL_LINEAR_MIPMAP_LINEAR = 0x2703
+GL_REPEAT = 0x2901
+
+_DEFAULT_SAMPLER = (GL_LINEAR_MIPMAP_LINEAR, GL_LINEAR, GL_REPEAT, GL_REPEAT)
+
+
+@dataclass
+class TextureEntry:
+    key: Tuple
+    tex_id: int
+    nbytes: int
+    refcount: int = 0
+
+
+class TextureRegistry:
+    def __init__(
+        self,
+        gn,
+        samplers: Optional[List[dict]] = None,
+        load_levels: Optional[Callable[[int], Optional[List[np.ndarray]]]] = None,
+        load_bytes: Optional[Callable[[int], Optional[memoryview]]] = None,
+    ):
+        """
+        load_levels(image_index) → pre-built RGBA mip chain (asset cache), or
+        load_bytes(image_index)  → encoded PNG/JPEG to decode natively.
+        """
+        if load_levels is None and load_bytes is None:
+            raise ValueError("TextureRegistry needs load_levels or load_bytes")
+
+        self.gn = gn
+        self.samplers = samplers or []
+        self.load_levels = load_levels
+        self.load_bytes = load_bytes
+
+        self.entries: Dict[Tuple, TextureEntry] = {}
+        self.by_tex_id: Dict[int, TextureEntry] = {}
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.bytes_resident = 0
+
+    @classmethod
+    def from_cooked(cls, gn, cooked):
+        return cls(
+            gn,
+            samplers=cooked.gltf.get("samplers", []),
+            load_levels=cooked.textures.get,
+        )
+
+    @classmethod
+    def from_parsed(cls, gn, parsed):
+        from core.mesh_data import read_image_bytes
+        return cls(
+            gn,
+            samplers=parsed.json.get("samplers", []),
+            load_bytes=lambda idx: read_image_bytes(parsed.json, parsed.bin_blob, idx),
+        )
+
+    def _sampler_state(self, sampler_index: Optional[int]) -> Tuple[int, int, int, int]:
+        if sampler_index is None or sampler_index >= len(self.samplers):
+            return _DEFAULT_SAMPLER
+
+        s = self.samplers[sampler_index]
+        return (
+            s.get("minFilter", _DEFAULT_SAMPLER[0]),
+            s.get("magFilter", _DEFAULT_SAMPLER[1]),
+            s.get("wrapS", _DEFAULT_SAMPLER[2]),
+            s.get("wrapT", _DEFAULT_SAMPLER[3]),
+        )
+
+    def _upload(self, image_index: int, srgb: bool) -> Tuple[int, int]:
+        if self.load_levels is not None:
+            levels = self.load_levels(image_index)
+            if levels:
+                tex_id = self.gn.upload_texture_levels(levels, srgb=srgb)
+                return tex_id, sum(level.nbytes for level in levels)
+
+        if self.load_bytes is not None:
+            data = self.load_bytes(image_index)
+            if data is not None:
+                rgba = self.gn.decode_texture(data)
+                if rgba is not None:
+                    tex_id = self.gn.upload_texture_rgba(rgba, srgb=srgb)
+                    # Driver-built mip chain adds roughly a third
+                    return tex_id, rgba.nbytes * 4 // 3
+
+        return 0, 0
+
+    def acquire(
+        self,
+        image_index: Optional[int],
+        sampler_index: Optional[int] = None,
+        srgb: bool = True
+    ) -> int:
+        """Returns a GL texture id for the image (0 if there is none) and takes a reference."""
+        if image_index is None:
+            return 0
+
+        sampler = self._sampler_state(sampler_index)
+        key = (image_index, sampler, srgb)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            entry.refcount += 1
+            return entry.tex_id
+
+        self.misses += 1
+        tex_id, nbytes = self._upload(image_index, srgb)
+        if tex_id == 0:
+            print(f"[TEX] ⚠ Image {image_index} could not be loaded")
+            return 0
+
+        if sampler != _DEFAULT_SAMPLER:
+            self.gn.set_texture_sampler(tex_id, *sampler)
+
+        entry = TextureEntry(key=key, tex_id=tex_id, nbytes=nbytes, refcount=1)
+        self.entries[key] = entry
+        self.by_tex_id[tex_id] = entry
+        self.bytes_resident += nbytes
+        return tex_id
+
+    def release(self, tex_id: int) -> None:
+        """Drops one reference; the GL texture is deleted with the last one."""
+        entry = self.by_tex_id.get(tex_id)
+        if entry is None:
+            return
+
+        entry.refcount -= 1
+        if entry.refcount > 0:
+            return
+
+        self.gn.delete_texture(tex_id)
+        del self.entries[entry.key]
+        del self.by_tex_id[tex_id]
+        self.bytes_resident -= entry.nbytes
+
+    def release_all(self) -> None:
+        for entry in list(self.entries.values()):
+            self.gn.delete_texture(entry.tex_id)
+        self.entries.clear()
+        self.by_tex_id.clear()
+        self.bytes_resident = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "textures_resident": len(self.entries),
+            "bytes_resident": self.bytes_resident,
+        }
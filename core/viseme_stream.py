@@ -0,0 +1,393 @@
+"""
+Live viseme input, e.g. from a TTS process, over a Unix socket or a FIFO.
+
+    producer ──bytes──▶ reader thread (parse, stamp arrival) ──queue──▶
+    render thread: sample(dt) drains the queue into a jitter buffer and
+    returns the visemes to show this frame
+
+The render thread never blocks on I/O. Playback runs `delay` seconds
+behind the newest data so uneven delivery doesn't reach the mouth; if the
+producer falls behind anyway the buffer underruns, the mouth goes neutral
+and playback resumes once `delay` seconds are buffered again.
+
+Wire formats:
+    text    GPSEQ tokens, `;` or newline terminated: "A 0.12; E 0.08;\\n"
+    binary  12-byte records: 8-byte phoneme (ASCII, NUL padded) + float32 duration
+
+PAUSE holds the previous viseme, as in .gpseq files.
+
+A stand-in producer for tests and local runs:
+
+    python -m core.viseme_stream produce /tmp/greko-visemes.sock GEN_PHENOME_SEQ/test.gpseq
+"""
+import argparse
+import os
+import queue
+import random
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from core.clock import MonotonicTime
+from core.gpseq import HOLD_PHONEMES, parse_tokens
+
+
+BINARY_RECORD = struct.Struct("<8sf")
+_POLL_SECONDS = 0.1
+_READ_SIZE = 4096
+
+
+@dataclass
+class StreamEvent:
+    phoneme: str
+    duration: float
+    arrival: float        # time_source() when the reader parsed it
+    start: float = 0.0    # position in the stream timeline
+
+
+@dataclass
+class StreamStats:
+    received: int = 0
+    played: int = 0
+    underruns: int = 0          # playback caught up with a live producer
+    latency_last: float = 0.0   # arrival → shown, seconds
+    latency_max: float = 0.0
+    latency_total: float = 0.0
+    buffered: float = 0.0       # seconds of data ahead of playback
+
+    @property
+    def latency_mean(self) -> float:
+        return self.latency_total / self.played if self.played else 0.0
+
+
+class _Parser:
+    """Incremental: keeps partial tokens / records until the rest arrives."""
+
+    def __init__(self, binary: bool):
+        self.binary = binary
+        self.pending = b""
+
+    def feed(self, data: bytes) -> List[Tuple[str, float]]:
+        self.pending += data
+
+        if self.binary:
+            usable = len(self.pending) // BINARY_RECORD.size * BINARY_RECORD.size
+            chunk, self.pending = self.pending[:usable], self.pending[usable:]
+            return [
+                (name.rstrip(b"\0").decode("ascii", "replace"), float(duration))
+                for name, duration in BINARY_RECORD.iter_unpack(chunk)
+            ]
+
+        cut = max(self.pending.rfind(b";"), self.pending.rfind(b"\n"))
+        if cut < 0:
+            return []
+        complete, self.pending = self.pending[:cut + 1], self.pending[cut + 1:]
+        text = complete.decode("utf-8", "replace").replace(";", ";\n")
+        return list(parse_tokens(text.splitlines()))
+
+
+class VisemeStream:
+    def __init__(
+        self,
+        address: str | Path,
+        kind: str = "socket",
+        binary: bool = False,
+        delay: float = 0.12,
+        crossfade: float = 0.08,
+        time_source: Optional[Callable[[], float]] = None,
+    ):
+        """
+        kind: "socket" listens on a Unix socket at `address` (one producer
+        at a time, reconnects welcome); "fifo" reads a named pipe, created
+        if missing. delay is the jitter buffer depth in seconds.
+        """
+        if kind not in ("socket", "fifo"):
+            raise ValueError(f"Unknown stream kind {kind!r}")
+
+        self.address = Path(address)
+        self.kind = kind
+        self.binary = binary
+        self.delay = delay
+        self.crossfade = crossfade
+        self.time_source = time_source if time_source is not None else MonotonicTime()
+
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+        # Render-thread state
+        self.connected = False
+        self.stats = StreamStats()
+        self.time = 0.0             # playback position in the stream timeline
+        self._end = 0.0             # end of the newest buffered event
+        self._events: "deque[StreamEvent]" = deque()
+        self._previous: Optional[StreamEvent] = None
+        self._last_phoneme = "REST"
+        self._buffering = True
+
+    # ---- control (render thread) ----
+    def start(self) -> "VisemeStream":
+        self._thread = threading.Thread(
+            target=self._run, name=f"visemes:{self.address.name}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def close(self, wait: bool = True) -> None:
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+        if self.kind == "socket" and self.address.exists():
+            self.address.unlink()
+
+    def pump(self) -> int:
+        """Moves everything the reader has parsed into the jitter buffer. Never blocks."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+        received = 0
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "event":
+                phoneme, duration, arrival = payload
+                if phoneme in HOLD_PHONEMES:
+                    phoneme = self._last_phoneme
+                self._last_phoneme = phoneme
+
+                self._events.append(StreamEvent(phoneme, duration, arrival, self._end))
+                self._end += duration
+                received += 1
+            else:
+                self.connected = kind == "connected"
+
+        self.stats.received += received
+        self.stats.buffered = self._end - self.time
+        return received
+
+    def sample(self, dt: float) -> List[Tuple[str, float]]:
+        """
+        Advances playback by dt and returns [(phoneme, weight), ...]: one
+        entry, two while crossfading, none while buffering or idle.
+        """
+        self.pump()
+
+        if self._buffering:
+            ahead = self._end - self.time
+            # A closed producer won't send more, so play out what's left
+            if ahead <= 0.0 or (ahead < self.delay and self.connected):
+                return []
+            self._buffering = False
+
+        self.time += dt
+        if self.time >= self._end:
+            self.time = self._end
+            if self.connected:
+                self.stats.underruns += 1
+            self._buffering = True
+            self.stats.buffered = 0.0
+            return []
+        self.stats.buffered = self._end - self.time
+
+        # Drop what has finished; keep one behind for the fade-out
+        events = self._events
+        while len(events) > 1 and events[1].start <= self.time:
+            self._previous = events.popleft()
+        current = events[0]
+
+        if current.start <= self.time and current.arrival >= 0.0:
+            latency = self.time_source() - current.arrival
+            stats = self.stats
+            stats.played += 1
+            stats.latency_last = latency
+            stats.latency_max = max(stats.latency_max, latency)
+            stats.latency_total += latency
+            current.arrival = -1.0  # counted
+
+        return self._blend(current)
+
+    def _blend(self, current: StreamEvent) -> List[Tuple[str, float]]:
+        half = self.crossfade * 0.5
+        t = self.time
+        end = current.start + current.duration
+
+        other = None
+        if half > 0.0 and t > end - half and len(self._events) > 1:
+            other = self._events[1]
+            x = (t - (end - half)) / self.crossfade
+        elif half > 0.0 and t < current.start + half and self._previous is not None:
+            other = self._previous
+            x = 1.0 - (t - (current.start - half)) / self.crossfade
+
+        if other is None or other.phoneme == current.phoneme:
+            return [(current.phoneme, 1.0)]
+
+        x = min(max(x, 0.0), 1.0)
+        x = x * x * (3.0 - 2.0 * x)  # smoothstep
+        return [(current.phoneme, 1.0 - x), (other.phoneme, x)]
+
+    # ---- reader thread ----
+    def _run(self) -> None:
+        try:
+            if self.kind == "socket":
+                self._serve_socket()
+            else:
+                self._read_fifo()
+        except BaseException as e:  # surfaced on the render thread by pump()
+            self._error = e
+
+    def _read_until_closed(self, fileno: int, read: Callable[[int], bytes]) -> None:
+        parser = _Parser(self.binary)
+        connected = False
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fileno], [], [], _POLL_SECONDS)
+                if not ready:
+                    continue
+                data = read(_READ_SIZE)
+                if not data:
+                    return
+                arrival = self.time_source()
+                # On first data: a FIFO opened with no writer "connects" too
+                if not connected:
+                    connected = True
+                    self._queue.put(("connected", None))
+                for phoneme, duration in parser.feed(data):
+                    self._queue.put(("event", (phoneme, duration, arrival)))
+        finally:
+            if connected:
+                self._queue.put(("closed", None))
+
+    def _serve_socket(self) -> None:
+        if self.address.exists():
+            self.address.unlink()  # stale socket from a crashed run
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(str(self.address))
+            server.listen(1)
+            while not self._stop.is_set():
+                ready, _, _ = select.select([server], [], [], _POLL_SECONDS)
+                if not ready:
+                    continue
+                conn, _ = server.accept()
+                with conn:
+                    self._read_until_closed(conn.fileno(), conn.recv)
+
+    def _read_fifo(self) -> None:
+        if not self.address.exists():
+            os.mkfifo(self.address)
+
+        while not self._stop.is_set():
+            # Non-blocking open so close() isn't stuck waiting for a writer
+            fd = os.open(self.address, os.O_RDONLY | os.O_NONBLOCK)
+            try:
+                self._read_until_closed(fd, lambda n: os.read(fd, n))
+            finally:
+                os.close(fd)
+            # No writer (or it left): EOF straight away, so don't spin
+            self._stop.wait(_POLL_SECONDS)
+
+
+# ==========================
+# Stand-in producer
+# ==========================
+def produce(
+    address: str | Path,
+    events: Iterable[Tuple[str, float]],
+    kind: str = "socket",
+    binary: bool = False,
+    realtime: bool = True,
+    jitter: float = 0.0,
+    connect_timeout: float = 5.0,
+    seed: Optional[int] = None,
+) -> int:
+    """
+    Sends (phoneme, duration) events the way a TTS engine would: each one
+    about as it is "generated", i.e. after the previous one's duration,
+    late or early by up to `jitter` seconds. Returns the number sent.
+    """
+    rng = random.Random(seed)
+
+    def encode(phoneme: str, duration: float) -> bytes:
+        if binary:
+            return BINARY_RECORD.pack(phoneme.encode("ascii")[:8], duration)
+        return f"{phoneme} {duration:.4f};\n".encode("utf-8")
+
+    if kind == "socket":
+        sink = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            try:
+                sink.connect(str(address))
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    sink.close()
+                    raise
+                time.sleep(0.05)
+        send = sink.sendall
+        close = sink.close
+    else:
+        pipe = open(address, "wb", buffering=0)
+        send = pipe.write
+        close = pipe.close
+
+    sent = 0
+    try:
+        due = time.monotonic()
+        for phoneme, duration in events:
+            if realtime:
+                wait = due + rng.uniform(-jitter, jitter) - time.monotonic()
+                if wait > 0.0:
+                    time.sleep(wait)
+            send(encode(phoneme, duration))
+            sent += 1
+            due += duration
+    finally:
+        close()
+    return sent
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.viseme_stream",
+        description="Stand-in viseme producer: streams a .gpseq file in real time",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_produce = sub.add_parser("produce", help="Send a .gpseq file to a running engine")
+    p_produce.add_argument("address", help="Unix socket (or FIFO with --fifo)")
+    p_produce.add_argument("source", help="Text .gpseq file")
+    p_produce.add_argument("--fifo", action="store_true")
+    p_produce.add_argument("--binary", action="store_true", help="Send 12-byte binary records")
+    p_produce.add_argument("--jitter", type=float, default=0.0, help="Delivery jitter, seconds")
+    p_produce.add_argument("--fast", action="store_true", help="Send everything at once")
+
+    args = parser.parse_args(argv)
+    with open(args.source, "r", encoding="utf-8") as f:
+        sent = produce(
+            args.address,
+            parse_tokens(f),
+            kind="fifo" if args.fifo else "socket",
+            binary=args.binary,
+            realtime=not args.fast,
+            jitter=args.jitter,
+        )
+    print(f"✅ Sent {sent} visemes to {args.address}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
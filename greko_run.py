@@ -1,5 +1,4 @@
 from datetime import time
-import time as timen
 import math
 import sys
 import os
@@ -7,10 +6,18 @@ import numpy as np
 
 import core.greko_native as gn
 
-from core.glb_parser import parse_glb
+from core.progressive_loader import ProgressiveLoader
+from core.viseme_stream import VisemeStream
 from core.skeleton import Skeleton
 from core.behaviours_manager import BehaviorManager
-from core.mesh_data import package_mesh
+from core.texture_registry import TextureRegistry
+from core.scene import AssetLibrary, upload_part
+from core.animation import AnimationPlayer, load_animations
+from core.pose import PoseBlender
+from core.spring_bones import SpringBoneSimulator
+from core.clock import FrameClock, ManualTime, MonotonicTime
+from core.expressions import ExpressionSet
+from core.glb_parser import parse_glb
 
 def run_engine():
     # Initialize renderer
@@ -27,62 +34,15 @@ def run_engine():
     
     print(f"📂 Loading VRM: {vrm_path}")
 
-    parsed_data = parse_glb(vrm_path)
-    print("🦴 Building Skeleton...")
-    skeleton = Skeleton(parsed_data.json, parsed_data.bin_blob)
-    print("Joint count:", len(skeleton.joint_nodes))
-
-    
-    # FLAG: Render Parts List
-    # We store each mesh piece separately instead of combining them.
-    render_parts = []
-    primitive_count = 0
-    
-    for mesh_idx, mesh in enumerate(parsed_data.json["meshes"]):
-        mesh_name = mesh.get("name", f"Mesh_{mesh_idx}")
-        
-        for prim_idx, primitive in enumerate(mesh["primitives"]):
-            packed = package_mesh(parsed_data.json, parsed_data.bin_blob, primitive)
-
-            # FLAG: Check for transparency tags
-            # We look at the mesh name or the material index to identify face parts
-            is_transparent = False
-            #texture_id = 0
-            if "Face" in mesh_name or "Eye" in mesh_name or "Hair" in mesh_name:
-                is_transparent = True
-
-            tex_id = 0
-            if packed.get('texture') is not None:
-                tex_id = gn.upload_texture(bytes(packed['texture']), srgb=True)
-                #print(f"     ✅ Texture ID: {tex_id}")
-
-            render_parts.append({
-                "name": mesh_name,
-                "vertices": packed['vertices'],
-                "normals": packed['normals'],
-                "uvs": packed['uvs'],
-                "joints": packed['joints'],
-                "weights": packed['weights'],
-                "indices": packed['indices'],
-                "morph_targets": packed['morph_targets'],
-                "tex_id": tex_id,
-                "transparent": is_transparent # Tag it for sorting
-            })
-
-            primitive_count += 1
-            #print(f"   ✅ Packed {mesh_name} - Primitive {prim_idx} (Vertices: {len(packed['vertices'])})") 
-        
+    # FLAG: Progressive Loading
+    # Parts stream in on a background thread (from <vrm>.grekocache when it
+    # is valid) and the loop below uploads a few per frame, so the window is
+    # live from the first frame.
+    def report_progress(done, total, packet):
+        if done == total:
+            print(f"📦 Streamed {total} parts")
 
-
-    # FLAG: The Sorting Logic
-    # We create two groups so Opaque draws first and Transparent draws last.
-    opaque_parts = [p for p in render_parts if not p["transparent"]]
-    transparent_parts = [p for p in render_parts if p["transparent"]]
-    
-    # Combine them: Opaque first, then Transparent
-    sorted_parts = opaque_parts + transparent_parts
-
-    print(f"📦 Sorting Complete: {len(opaque_parts)} opaque, {len(transparent_parts)} transparent.")
+    loader = ProgressiveLoader(vrm_path, on_progress=report_progress).start()
 
     # Position camera to view Kisayo
     gn.set_camera_position(0.0, 1.5, 3.0)
@@ -90,102 +50,176 @@ def run_engine():
     
     print("\n🚀 Multi-Draw Engine Ready!")
     print("🎮 Use WASD + mouse to navigate. ESC to toggle mouse.")
-    
-   # 1. During Setup (ONLY ONCE)
-    MORPH_SLOTS = ["Fcl_EYE_Close", "Fcl_ALL_Surprised", "Fcl_MTH_E", "Fcl_MTH_I"]
-    #face_mesh_index = -1
-    face_mesh_indices = []
-    face_morph_library = {} 
-    
-
-    for i, part in enumerate(sorted_parts):
-        if "Face" in part["name"]:
-            # Save every morph the VRM has into our library
-            face_mesh_indices.append(i)
-            face_morph_library = part["morph_targets"]
-            #print(f"🎯 Face detected at index {i}")
-            
-
-        #if "Fcl_MTH_A" in part["morph_targets"]:
-        #    face_mesh_index = i
-            
-
-
-        all_morphs = part["morph_targets"]
-        upload_list = []
-
-        #print(f"\n📦 Part: {part.get('name', 'Unknown')}")
-        for i, slot_name in enumerate(MORPH_SLOTS):
-            if slot_name in all_morphs:
-                data = all_morphs[slot_name]
-                # FLAG: Print the "Energy" of the morph
-                #print(f"  Slot {i} ({slot_name}): Size {len(data)}, Sum {np.sum(np.abs(data)):.2f}")
-                upload_list.append(data)
-            else:
-                #print(f"  Slot {i} ({slot_name}): EMPTY (Zeros)")
-                upload_list.append(np.zeros_like(part["vertices"]))
-        #blink_array = all_morphs.get("Fcl_EYE_Close", None)
-        #if blink_array is None:
-        #    blink_array = np.zeros_like(part["vertices"], dtype=np.float32)
-
-        gn.upload_mesh(
-            part["vertices"], 
-            part["normals"], 
-            part["uvs"],
-            part["joints"], 
-            part["weights"], 
-            part["indices"],
-            upload_list,
-            part["tex_id"]
-        )
 
     manager = BehaviorManager()
     manager.load_behaviors()
-
-    # Pass THIS index to the manager/sequencer
-    manager.face_mesh_indices = face_mesh_indices # Set it here
-    manager.inject_morph_library(face_morph_library)
-
     manager.trigger_mouth_sequence("test.gpseq")
 
-    
+    # FLAG: Live Visemes
+    # With GREKO_VISEME_SOCKET set, a TTS process (or
+    # `python -m core.viseme_stream produce <socket> <file>`) drives the mouth.
+    viseme_stream = None
+    viseme_socket = os.environ.get("GREKO_VISEME_SOCKET")
+    if viseme_socket:
+        viseme_stream = VisemeStream(viseme_socket).start()
+        manager.attach_viseme_stream(viseme_stream)
+
+    skeleton = None
+    textures = None
+    streamed = None
+
+    # FLAG: Background Crowd
+    # GREKO_CROWD=N spawns N extra instances of the avatar once it has
+    # streamed in. They are instances of the streamed asset 0, so they
+    # share its GPU data and draw instanced.
+    crowd_size = int(os.environ.get("GREKO_CROWD", "0"))
+    library = AssetLibrary(gn)
+
+    # FLAG: Clip Playback
+    # GREKO_ANIMATION=<file.glb> plays that file's first clip (joints
+    # matched by node name) as the base layer under the head sway.
+    animation_path = os.environ.get("GREKO_ANIMATION")
+    HEAD_INDEX = 18
+
+    player = None
+    blender = None
+    head_look = None
+    springs = None
+
+    # FLAG: One Clock
+    # Read once per frame and handed to everything. GREKO_FIXED_FPS=60 makes
+    # every frame exactly 1/60 s, so a run replays identically offline.
+    fixed_fps = float(os.environ.get("GREKO_FIXED_FPS", "0"))
+    clock = FrameClock(ManualTime(auto_step=1.0 / fixed_fps) if fixed_fps > 0 else MonotonicTime())
+
+    def on_packet(packet):
+        nonlocal skeleton, textures, streamed, player, blender, head_look, springs
+
+        if packet.kind == "asset":
+            print("🦴 Building Skeleton...")
+            skeleton = Skeleton(packet.gltf, None, inverse_bind=packet.inverse_bind)
+            print("Joint count:", len(skeleton.joint_nodes))
+
+            # FLAG: Pose Layers
+            # [clip] → head look (additive, head and below)
+            blender = PoseBlender(skeleton)
+            if animation_path:
+                anim = parse_glb(animation_path)
+                clips = load_animations(anim.json, anim.bin_blob, skeleton, by_name=True)
+                if clips:
+                    base = blender.add_layer("clip")
+                    player = AnimationPlayer(skeleton, clips[0], target=base.pose)
+                    print(f"🎞️  Playing '{clips[0].name}' ({clips[0].duration:.2f}s)")
+
+            # Parent space: the sway yaws about the neck's up axis, as the
+            # old rot3 @ bind did, not about the head's own bind-rotated axis
+            head_look = blender.add_layer(
+                "head_look", additive=True, space="parent", mask=blender.mask([HEAD_INDEX])
+            )
+
+            # Hair / skirt secondary motion (no-op if the VRM has none)
+            springs = SpringBoneSimulator(skeleton, packet.gltf)
+
+            # FLAG: Expressions
+            # blendShapeGroups / VRMC_vrm.expressions, compiled once
+            manager.set_expressions(ExpressionSet(packet.gltf))
+
+            # FLAG: One Upload Per Image
+            # Primitives sharing an atlas get the same GL texture.
+            textures = TextureRegistry(
+                gn,
+                samplers=packet.gltf.get("samplers", []),
+                load_levels=loader.take_image,
+            )
+            streamed = library.adopt(vrm_path, packet.gltf, packet.inverse_bind, textures)
+            return
+
+        packed = packet.primitive
+        mesh_index = upload_part(gn, packed, textures)
+        streamed.mesh_indices.append(mesh_index)
+
+        if packed["morph_targets"].target_count:
+            manager.add_morph_mesh(mesh_index, packed["mesh_index"])
+
+        if "Face" in packed["mesh_name"]:
+            streamed.face_mesh_indices.append(mesh_index)
+            manager.inject_morph_library(packed["morph_targets"])
+
+        if packet.index == packet.total - 1:
+            tex_stats = textures.stats()
+            print(
+                f"🖼️  Textures: {tex_stats['textures_resident']} resident "
+                f"({tex_stats['bytes_resident'] / (1024 * 1024):.1f} MB), "
+                f"{tex_stats['hits']} hits / {tex_stats['misses']} misses"
+            )
+
+    load_error = None
+
     # Main Loop remains the same
     while not gn.should_close():
+        dt = clock.tick()
+        t = clock.t
+
         gn.clear_screen()
 
+        # At most a few uploads per frame, inside a ~4 ms budget
+        if not loader.done:
+            # FLAG: Load Failure
+            # A corrupt or unreadable VRM surfaces here instead of leaving
+            # an empty window.
+            try:
+                loader.pump(on_packet, max_packets=4, budget_ms=4.0)
+            except Exception as e:
+                load_error = e
+                print(f"❌ Failed to load {vrm_path}: {e}")
+                break
+        elif crowd_size and not library.avatars:
+            # vrm_path is adopted as asset 0: no second upload
+            columns = 10
+            for i in range(crowd_size):
+                row, col = divmod(i, columns)
+                library.spawn(vrm_path, position=((col - columns / 2) * 0.8, 0.0, -1.5 - row * 1.0))
+            print(f"👥 Spawned {crowd_size} background avatars")
+
+        if skeleton is None:
+            gn.draw_scene()
+            gn.swap_buffers()
+            continue
+
+        if player is not None:
+            player.advance(dt)
+
         # --- Procedural Head Sway Test ---
-        t = timen.time()
         angle = math.sin(t) * 0.6  # smooth left-right
-        
-        c = math.cos(angle)
-        s = math.sin(angle)
+        head_look.pose.rotations[HEAD_INDEX] = (0.0, math.sin(angle / 2), 0.0, math.cos(angle / 2))
 
-        HEAD_INDEX = 18
-
-        bind = skeleton.bind_locals[HEAD_INDEX].copy()
-        
-        rot3 = np.array([
-                [ c, 0,  s],
-                [ 0, 1,  0],
-                [-s, 0,  c]
-            ], dtype=np.float32)
-        
-        bind[:3, :3] = rot3 @ bind[:3, :3]
-        skeleton.local_matrices[HEAD_INDEX] = bind # Apply rotation on top of bind pose
-        
+        blender.apply()
         skeleton.update()
+        springs.update(dt)
         
+        # Same buffer every frame; only the joints that moved are re-sent
         joint_buffer = skeleton.get_skinning_buffer()
-        gn.update_joints(joint_buffer)
+        first, count = skeleton.palette_range
+        if count:
+            gn.update_joints(joint_buffer, first, count)
 
 
 
-        manager.update_all(gn)
+        manager.update_all(gn, clock)
     
         gn.draw_scene() 
         gn.swap_buffers()
 
+    loader.cancel()
+    if viseme_stream is not None:
+        stats = viseme_stream.stats
+        print(f"📡 Visemes: {stats.played}/{stats.received} played, {stats.underruns} underruns, "
+              f"latency {stats.latency_mean * 1000:.0f} ms mean / {stats.latency_max * 1000:.0f} ms max")
+        viseme_stream.close()
     gn.terminate()
 
+    if load_error is not None:
+        sys.exit(1)
+
 if __name__ == "__main__":
     run_engine()
\ No newline at end of file
@@ -2,25 +2,14 @@
 #include <glm/gtc/type_ptr.hpp>
 #include <vector>
 
-// FLAG: The Global Skeleton
-// We keep this here so it's not cluttering up the main renderer.
-glm::mat4 joint_matrices[256];
-
-void init_skeleton() {
-    // FLAG: Identity Matrix Loop
-    // This stops Kisayo from disappearing before you start the animation.
-    for (int i = 0; i < 256; i++) {
-        joint_matrices[i] = glm::mat4(1.0f);
-    }
-}
-
-void update_joints_from_buffer(const float* data, int count) {
+#include "renderer.hpp"
+
+// FLAG: The Default Skeleton
+// Palettes live on the instances now (see AvatarInstance). This helper
+// keeps the old single-avatar call pointing at instance 0. No identity
+// palette is needed up front: joints an instance hasn't been given skin
+// as identity in the shader, so Kisayo doesn't disappear before animating.
+void update_joints_from_buffer(const float* data, int count, int first_joint, int joint_count) {
     // 16 floats per mat4
-    int num_matrices = count / 16;
-    if (num_matrices > 256) num_matrices = 256;
-
-    for (int i = 0; i < num_matrices; i++) {
-        // glm::make_mat4 copies the raw floats into our matrix array
-        joint_matrices[i] = glm::make_mat4(&data[i * 16]);
-    }
+    set_instance_joints(0, data, count, first_joint, joint_count);
 }
\ No newline at end of file
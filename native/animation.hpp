@@ -1,7 +1,4 @@
 #pragma once
 #include <glm/glm.hpp>
 
-extern glm::mat4 joint_matrices[128];
-
-void init_skeleton();
-void update_joints_from_buffer(const float* data, int count);
\ No newline at end of file
+void update_joints_from_buffer(const float* data, int count, int first_joint = 0, int joint_count = -1);
\ No newline at end of file
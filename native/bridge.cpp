@@ -2,8 +2,10 @@
 #include <pybind11/numpy.h>
 #include <vector>
 #include <string>
+#include <unordered_map>
 #include "renderer.hpp"
 #include "animation.hpp"
+#include "texture_loader.hpp"
 #include <iostream>
 
 namespace py = pybind11;
@@ -11,15 +13,17 @@ namespace py = pybind11;
 // Forward declarations
 extern void set_current_texture(GLuint tex_id);
 
-void upload_mesh_to_gpu(
+int upload_mesh_to_gpu(
     py::array_t<float> vertices,
     py::array_t<float> normals,
     py::array_t<float> uvs,
     py::array_t<uint32_t> joints,
     py::array_t<float> weights,
     py::array_t<uint32_t> indices,
-    py::list morph_list, // FLAG: Changed to py::list for multiple arrays
-    int tex_id
+    py::object morphs,
+    int tex_id,
+    bool transparent,
+    int asset_id
 ) {
     auto v_ptr = vertices.data();
     auto n_ptr = normals.data();
@@ -28,55 +32,124 @@ void upload_mesh_to_gpu(
     auto w_ptr = weights.data();
     auto i_ptr = indices.data();
 
-    // FLAG: The Converter
-    // We convert the Python list of NumPy arrays into a C++ vector of pointers
-    std::vector<py::array_t<float>> morph_arrays;
-    std::vector<const float*> m_ptrs;
-
-    for (auto item : morph_list) {
-        py::array_t<float, py::array::c_style | py::array::forcecast> arr =
-            item.cast<py::array_t<float, py::array::c_style | py::array::forcecast>>();
-
-
-        if (arr.size() != vertices.size()) {
-        std::cout << "⚠ Morph size mismatch: "
-                  << arr.size() << " vs "
-                  << vertices.size() << std::endl;
+    // FLAG: Whole Morph Stack
+    // One (targets, vertices, 3) float32 block (MorphStack.deltas). Already
+    // contiguous float32, so forcecast hands the same memory through.
+    const float* m_ptr = nullptr;
+    int morph_count = 0;
+    py::array_t<float, py::array::c_style | py::array::forcecast> morph_block;
+    if (!morphs.is_none()) {
+        morph_block = morphs.cast<py::array_t<float, py::array::c_style | py::array::forcecast>>();
+        if (morph_block.ndim() != 3 || morph_block.shape(2) != 3 ||
+            morph_block.shape(1) * 3 != vertices.size()) {
+            throw std::runtime_error("morphs must be a (targets, vertices, 3) array matching the vertices");
         }
-
-        morph_arrays.push_back(arr);     // KEEP ARRAY ALIVE
-        m_ptrs.push_back(arr.data());    // THEN GET POINTER
+        morph_count = (int)morph_block.shape(0);
+        m_ptr = morph_block.data();
     }
 
-
     // Now this matches the signature in renderer.hpp perfectly!
-    add_mesh_to_scene(
+    return add_mesh_to_scene(
         v_ptr, vertices.size(), 
         n_ptr, normals.size(),
         uv_ptr, uvs.size(), 
         j_ptr, joints.size(), 
         w_ptr, weights.size(), 
         i_ptr, indices.size(),
-        m_ptrs, // Pass the vector
-        tex_id
+        m_ptr, morph_count,
+        tex_id,
+        transparent,
+        asset_id
     );
 }
 
-void update_morph_data(int mesh_index, int slot_index, py::array_t<float> new_data) {
-    // FLAG: Keep memory alive during the call
-    auto arr = new_data.cast<py::array_t<float, py::array::c_style | py::array::forcecast>>();
-    
-    
-    // Call the renderer function we discussed
-    update_morph_slot(mesh_index, slot_index, arr.data(), arr.size());
+namespace {
+
+// FLAG: Buffer Protocol Input
+// Any bytes-like object (bytes, a memoryview over the mmap'd BIN chunk,
+// a uint8 NumPy array) is read in place instead of copied into a string.
+struct ByteSource {
+    py::buffer_info info;
+    const unsigned char* data;
+    int size;
+};
+
+void require_c_contiguous(const py::buffer_info& info, const char* what) {
+    py::ssize_t expected = info.itemsize;
+    for (py::ssize_t d = info.ndim - 1; d >= 0; d--) {
+        if (info.shape[d] > 1 && info.strides[d] != expected) {
+            throw std::runtime_error(std::string(what) + " buffer must be C-contiguous");
+        }
+        expected *= info.shape[d];
+    }
+}
+
+ByteSource request_bytes(const py::buffer& buf) {
+    py::buffer_info info = buf.request();
+    require_c_contiguous(info, "Texture source");
+
+    ByteSource src;
+    src.data = static_cast<const unsigned char*>(info.ptr);
+    src.size = (int)(info.size * info.itemsize);
+    src.info = std::move(info);
+    return src;
+}
+
+py::object decoded_to_numpy(const DecodedTexture& decoded) {
+    if (!decoded.pixels) return py::none();
+
+    // FLAG: Zero-Copy Hand-Off
+    // The capsule frees the stb buffer once NumPy drops the array.
+    py::capsule owner(decoded.pixels, [](void* p) {
+        free_decoded_texture(static_cast<unsigned char*>(p));
+    });
+    return py::array_t<uint8_t>(
+        {decoded.height, decoded.width, 4}, decoded.pixels, owner
+    );
+}
+
+// FLAG: Palette In Place
+// Skeleton.palette is float32 and C-contiguous already, so update_joints
+// reads it through the buffer protocol instead of forcecasting a copy.
+void send_palette(int instance_id, const py::buffer& matrices, int first_joint, int joint_count) {
+    py::buffer_info info = matrices.request();
+    if (info.format != py::format_descriptor<float>::format()) {
+        throw std::runtime_error("Joint palette must be float32");
+    }
+    require_c_contiguous(info, "Joint palette");
+
+    const float* data = static_cast<const float*>(info.ptr);
+    int count = (int)info.size;
+    if (joint_count == 0) return;
+
+    set_instance_joints(instance_id, data, count, first_joint, joint_count);
+}
+
+void send_morph_weights(int instance_id, int mesh_index,
+                        const py::array_t<float, py::array::c_style | py::array::forcecast>& weights) {
+    set_instance_morph_weights(instance_id, mesh_index, weights.data(), (int)weights.size());
 }
 
+// Source buffers of in-flight async decodes, by ticket. Heap-allocated on
+// purpose: it must not be destroyed after the interpreter has shut down.
+std::unordered_map<uint64_t, py::buffer_info>& pending_decodes() {
+    static auto* pending = new std::unordered_map<uint64_t, py::buffer_info>();
+    return *pending;
+}
+
+} // namespace
+
 PYBIND11_MODULE(greko_native, m) {
     m.doc() = "Greko Engine Native Renderer Bridge";
     
     // Core functions
     m.def("init_renderer", &init_renderer);
-    m.def("upload_mesh", &upload_mesh_to_gpu);
+    m.def("upload_mesh", &upload_mesh_to_gpu,
+        py::arg("vertices"), py::arg("normals"), py::arg("uvs"),
+        py::arg("joints"), py::arg("weights"), py::arg("indices"),
+        py::arg("morphs"), py::arg("tex_id"), py::arg("transparent") = false,
+        py::arg("asset") = 0,
+        "Upload one primitive into an asset; returns its mesh index");
     m.def("clear_screen", &clear_screen);
     m.def("swap_buffers", &swap_buffers);
     m.def("should_close", &should_close);
@@ -85,29 +158,199 @@ PYBIND11_MODULE(greko_native, m) {
     
     
     // *** Texture upload ***
-    m.def("upload_texture", [](py::bytes data, bool srgb) -> int {
-        std::string buf = data;
-        GLuint tex_id = upload_texture_bytes(
-            reinterpret_cast<const unsigned char*>(buf.data()),
-            buf.size()
-        );
+    m.def("upload_texture", [](py::buffer data, bool srgb) -> int {
+        ByteSource src = request_bytes(data);
+
+        DecodedTexture decoded;
+        {
+            py::gil_scoped_release release;
+            decoded.pixels = decode_texture_rgba(src.data, src.size, &decoded.width, &decoded.height);
+        }
+        if (!decoded.pixels) return 0;
+
+        GLuint tex_id = upload_texture_rgba(decoded.pixels, decoded.width, decoded.height, srgb);
+        free_decoded_texture(decoded.pixels);
         
         // Set as current texture
         set_current_texture(tex_id);
         
         return static_cast<int>(tex_id);
     }, py::arg("data"), py::arg("srgb") = true,
-       "Upload texture from bytes and set as current");
+       "Decode + upload texture from any bytes-like object and set as current");
 
-    m.def("update_joints", [](py::array_t<float> matrices) {
-        auto r = matrices.unchecked<1>();
-        update_joints_from_buffer(r.data(0), (int)r.size());
-    }, "Upload new bone matrices to the GPU");
+    // *** Split texture path: CPU decode (any thread) → GL upload (GL thread) ***
+    m.def("decode_texture", [](py::buffer data) -> py::object {
+        ByteSource src = request_bytes(data);
 
-    m.def("set_morph_weights", &set_morph_weights, 
-        "Set how much the face expression is applied (0.0 to 1.0)");
+        DecodedTexture decoded;
+        {
+            py::gil_scoped_release release;
+            decoded.pixels = decode_texture_rgba(src.data, src.size, &decoded.width, &decoded.height);
+        }
+        return decoded_to_numpy(decoded);
+    }, py::arg("data"),
+       "Decode PNG/JPEG to an (H, W, 4) uint8 RGBA array on this thread, GIL released (no GL needed)");
+
+    m.def("decode_textures", [](py::list images) -> py::list {
+        std::vector<ByteSource> sources;
+        for (auto item : images) {
+            sources.push_back(request_bytes(item.cast<py::buffer>()));
+        }
+
+        // FLAG: All Cores, No GIL
+        // Every image goes to the native pool at once; we only wait here.
+        std::vector<DecodedTexture> decoded(sources.size());
+        {
+            py::gil_scoped_release release;
+            TextureDecodePool& pool = texture_decode_pool();
+
+            std::vector<uint64_t> tickets;
+            for (auto& src : sources) {
+                tickets.push_back(pool.submit(src.data, src.size));
+            }
+            for (size_t i = 0; i < tickets.size(); i++) {
+                decoded[i] = pool.wait(tickets[i]);
+            }
+        }
+
+        py::list out;
+        for (auto& d : decoded) out.append(decoded_to_numpy(d));
+        return out;
+    }, py::arg("images"),
+       "Decode a list of PNG/JPEG buffers in parallel on the native pool; returns arrays (None on failure)");
+
+    m.def("decode_texture_async", [](py::buffer data) -> uint64_t {
+        ByteSource src = request_bytes(data);
+        uint64_t ticket = texture_decode_pool().submit(src.data, src.size);
+
+        // The source buffer must outlive the decode
+        pending_decodes().emplace(ticket, std::move(src.info));
+        return ticket;
+    }, py::arg("data"),
+       "Queue a decode on the native pool; poll with collect_decoded_textures()");
+
+    m.def("collect_decoded_textures", []() -> py::list {
+        py::list out;
+        auto& pending = pending_decodes();
+        TextureDecodePool& pool = texture_decode_pool();
+
+        for (auto it = pending.begin(); it != pending.end();) {
+            DecodedTexture decoded;
+            if (pool.try_take(it->first, decoded)) {
+                out.append(py::make_tuple(it->first, decoded_to_numpy(decoded)));
+                it = pending.erase(it);
+            } else {
+                ++it;
+            }
+        }
+        return out;
+    }, "Non-blocking: [(ticket, array or None), ...] for every finished async decode");
+
+    m.def("pending_texture_decodes", []() -> size_t {
+        return pending_decodes().size();
+    });
+
+    m.def("texture_decode_threads", []() -> unsigned int {
+        return texture_decode_pool().thread_count();
+    });
+
+    m.def("upload_texture_rgba", [](py::array_t<uint8_t, py::array::c_style | py::array::forcecast> pixels, bool srgb) -> int {
+        if (pixels.ndim() != 3 || pixels.shape(2) != 4) {
+            throw std::runtime_error("upload_texture_rgba expects an (H, W, 4) uint8 array");
+        }
+        GLuint tex_id = upload_texture_rgba(
+            pixels.data(),
+            (int)pixels.shape(1),
+            (int)pixels.shape(0),
+            srgb
+        );
+        set_current_texture(tex_id);
+        return static_cast<int>(tex_id);
+    }, py::arg("pixels"), py::arg("srgb") = true,
+       "Upload a decoded RGBA image (driver-generated mips) and set as current");
+
+    m.def("upload_texture_levels", [](py::list levels, bool srgb) -> int {
+        if (levels.size() == 0) return 0;
+
+        std::vector<py::array_t<uint8_t, py::array::c_style | py::array::forcecast>> arrays;
+        std::vector<const unsigned char*> ptrs;
+        for (auto item : levels) {
+            auto arr = item.cast<py::array_t<uint8_t, py::array::c_style | py::array::forcecast>>();
+            if (arr.ndim() != 3 || arr.shape(2) != 4) {
+                throw std::runtime_error("upload_texture_levels expects (H, W, 4) uint8 levels");
+            }
+            arrays.push_back(arr);  // KEEP ARRAY ALIVE
+            ptrs.push_back(arr.data());
+        }
+
+        GLuint tex_id = upload_texture_levels(
+            ptrs,
+            (int)arrays[0].shape(1),
+            (int)arrays[0].shape(0),
+            srgb
+        );
+        set_current_texture(tex_id);
+        return static_cast<int>(tex_id);
+    }, py::arg("levels"), py::arg("srgb") = true,
+       "Upload a decoded RGBA mip chain (level 0 first) and set as current");
+
+    m.def("set_texture_sampler", &set_texture_sampler,
+        py::arg("tex_id"), py::arg("min_filter"), py::arg("mag_filter"),
+        py::arg("wrap_s"), py::arg("wrap_t"),
+        "Apply glTF sampler state (GL enum values) to a texture");
+
+    m.def("delete_texture", &delete_texture, py::arg("tex_id"),
+        "Free a GL texture");
+
+    m.def("update_joints", [](py::buffer matrices, int first_joint, int joint_count) {
+        send_palette(0, matrices, first_joint, joint_count);
+    }, py::arg("matrices"), py::arg("first_joint") = 0, py::arg("joint_count") = -1,
+       "Upload new bone matrices (float32, 16 per joint); optionally only a joint range");
+
+    m.def("set_morph_weights", [](int mesh_index, py::array_t<float, py::array::c_style | py::array::forcecast> weights) {
+        send_morph_weights(0, mesh_index, weights);
+    }, py::arg("mesh"), py::arg("weights"),
+       "One weight per morph target of the mesh (0.0 to 1.0); zeros cost nothing");
+
+    // FLAG: Assets & Instances
+    // Asset 0 / instance 0 are created by init_renderer; the calls above
+    // (update_joints, set_morph_weights) drive instance 0.
+    m.def("create_asset", &create_asset, py::arg("joint_count"),
+        "Register shared geometry/texture storage; returns an asset id");
+    m.def("create_instance", &create_instance, py::arg("asset"),
+        "Place another copy of an asset in the scene; returns an instance id (-1 on error)");
+    m.def("destroy_instance", &destroy_instance, py::arg("instance"));
+    m.def("set_instance_transform", [](int instance_id, py::array_t<float, py::array::c_style | py::array::forcecast> matrix) {
+        if (matrix.size() != 16) {
+            throw std::runtime_error("set_instance_transform expects 16 floats (column-major mat4)");
+        }
+        set_instance_transform(instance_id, matrix.data());
+    }, py::arg("instance"), py::arg("matrix"));
+    m.def("update_instance_joints", [](int instance_id, py::buffer matrices, int first_joint, int joint_count) {
+        send_palette(instance_id, matrices, first_joint, joint_count);
+    }, py::arg("instance"), py::arg("matrices"),
+       py::arg("first_joint") = 0, py::arg("joint_count") = -1,
+       "Per-instance version of update_joints");
+    m.def("set_instance_morph_weights", [](int instance_id, int mesh_index, py::array_t<float, py::array::c_style | py::array::forcecast> weights) {
+        send_morph_weights(instance_id, mesh_index, weights);
+    }, py::arg("instance"), py::arg("mesh"), py::arg("weights"),
+       "Per-instance version of set_morph_weights");
+    m.def("set_instance_visible", &set_instance_visible, py::arg("instance"), py::arg("visible"));
+    m.def("instance_count", &instance_count);
 
-    m.def("update_morph_data", &update_morph_data, "Hot-swap a morph target's vertex data");
+    m.def("gl_stats", []() {
+        GLStats s = gl_stats();
+        py::dict d;
+        d["draw_calls"] = s.draw_calls;
+        d["program_binds"] = s.program_binds;
+        d["vao_binds"] = s.vao_binds;
+        d["texture_binds"] = s.texture_binds;
+        d["buffer_binds"] = s.buffer_binds;
+        d["buffer_uploads"] = s.buffer_uploads;
+        d["uniform_sets"] = s.uniform_sets;
+        d["skipped"] = s.skipped;
+        return d;
+    }, "GL calls issued (and redundant ones skipped) during the last completed frame");
     
     // Camera controls
     m.def("set_camera_position", [](float x, float y, float z) {
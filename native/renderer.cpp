@@ -7,15 +7,19 @@
 #include <fstream>
 #include <sstream>
 #include <string>
+#include <algorithm>
+#include <cstring>
+#include <glm/gtc/type_ptr.hpp>
 
 #include "camera.hpp"
 #include "renderer.hpp"
+#include "shader_program.hpp"
 #include "texture_loader.hpp"
 #include "animation.hpp"
 
 // Define the global instance
 Camera main_camera;
-GLuint shaderProgram;
+ShaderProgram main_program;
 // FLAG: The GrekoEngine Window
 GLFWwindow* window;
 GLuint g_texture = 0;
@@ -38,7 +42,147 @@ glm::vec3 cameraFront = glm::vec3(0.0f, 0.0f, -1.0f);
 //};
 
 std::vector<GPUMesh> scene_meshes;
-float g_morph_weights[4] = {0.0f, 0.0f, 0.0f, 0.0f};
+std::vector<GPUAsset> scene_assets;
+std::vector<AvatarInstance> scene_instances;
+std::vector<int> free_instance_ids;
+
+// FLAG: Per-Frame Instance Data
+// Layout matches `InstanceData` (std430) in Textest.vert. Instances of one
+// asset are packed next to each other so one instanced draw covers them all.
+struct InstanceRecord {
+    glm::mat4 model;
+    uint32_t palette_offset;
+    uint32_t morph_ranges;   // first entry of this instance in uMorphRanges
+    uint32_t joint_count;    // palette entries this instance has
+    uint32_t pad;
+};
+static_assert(sizeof(InstanceRecord) == 80, "InstanceRecord must match std430 layout");
+
+static_assert(sizeof(JointRows) == 48, "JointRows must match std430 mat3x4");
+
+// (offset, count) into the active morph list, one per instance per mesh slot
+struct MorphRange {
+    uint32_t offset;
+    uint32_t count;
+};
+
+GLuint instance_ssbo = 0;   // binding 0
+GLuint palette_ssbo = 0;    // binding 1
+                            // binding 2: the mesh's own morph_ssbo, per draw
+GLuint morph_range_ssbo = 0;   // binding 3
+GLuint active_morph_ssbo = 0;  // binding 4
+GLuint empty_ssbo = 0;         // bound at 2 for meshes without targets
+std::vector<InstanceRecord> frame_instances;
+std::vector<const AvatarInstance*> frame_palette_sources;
+size_t frame_palette_joints = 0;
+size_t palette_capacity = 0;   // bytes allocated for palette_ssbo
+std::vector<MorphRange> frame_morph_ranges;
+std::vector<ActiveMorph> frame_active_morphs;
+std::vector<int> asset_first_instance;
+std::vector<int> asset_drawn_instances;
+
+// FLAG: Per-Frame Constants
+// Layout matches the `Frame` block (std140, binding 0) in Textest.vert.
+// Re-uploaded only when the camera changed.
+struct FrameUniforms {
+    glm::mat4 view;
+    glm::mat4 projection;
+};
+GLuint frame_ubo = 0;
+FrameUniforms submitted_frame;
+bool frame_submitted = false;
+
+GLStats frame_stats = {};       // this frame, so far
+GLStats last_frame_stats = {};  // what gl_stats() reports
+
+// Locations draw_scene needs, resolved once at link
+struct MainUniforms {
+    GLint instance_base = -1;
+    GLint mesh_slot = -1;
+    GLint vertex_count = -1;
+    GLint main_tex = -1;
+    GLint base_color = -1;
+} main_uniforms;
+
+// FLAG: Redundant State Filter
+// draw_scene goes through this instead of calling GL directly, so a mesh
+// that shares a texture / VAO / value with the previous one costs nothing.
+// Bindings are forgotten each frame (texture uploads rebind in between);
+// uniform values are program state only draw_scene sets, so they carry over.
+struct DrawState {
+    GLuint program = 0;
+    GLuint vao = 0;
+    GLuint texture = 0;
+    GLuint morph_ssbo = 0;
+    GLint instance_base = -1;
+    GLuint mesh_slot = ~0u;
+    GLuint vertex_count = ~0u;
+    glm::vec4 base_color = glm::vec4(-1.0f);
+
+    void begin_frame() {
+        program = vao = texture = morph_ssbo = 0;
+    }
+
+    void use_program(GLuint id) {
+        if (program == id) { frame_stats.skipped++; return; }
+        glUseProgram(id);
+        program = id;
+        frame_stats.program_binds++;
+    }
+
+    void bind_vao(GLuint id) {
+        if (vao == id) { frame_stats.skipped++; return; }
+        glBindVertexArray(id);
+        vao = id;
+        frame_stats.vao_binds++;
+    }
+
+    void bind_texture(GLuint id) {
+        if (texture == id) { frame_stats.skipped++; return; }
+        glActiveTexture(GL_TEXTURE0);
+        glBindTexture(GL_TEXTURE_2D, id);
+        texture = id;
+        frame_stats.texture_binds++;
+    }
+
+    void bind_morphs(GLuint ssbo) {
+        if (morph_ssbo == ssbo) { frame_stats.skipped++; return; }
+        glBindBufferBase(GL_SHADER_STORAGE_BUFFER, 2, ssbo);
+        morph_ssbo = ssbo;
+        frame_stats.buffer_binds++;
+    }
+
+    void set_instance_base(GLint value) {
+        if (instance_base == value) { frame_stats.skipped++; return; }
+        glUniform1i(main_uniforms.instance_base, value);
+        instance_base = value;
+        frame_stats.uniform_sets++;
+    }
+
+    void set_mesh(GLuint slot, GLuint vertices) {
+        if (mesh_slot == slot) {
+            frame_stats.skipped++;
+        } else {
+            glUniform1ui(main_uniforms.mesh_slot, slot);
+            mesh_slot = slot;
+            frame_stats.uniform_sets++;
+        }
+        if (vertex_count == vertices) {
+            frame_stats.skipped++;
+        } else {
+            glUniform1ui(main_uniforms.vertex_count, vertices);
+            vertex_count = vertices;
+            frame_stats.uniform_sets++;
+        }
+    }
+
+    void set_base_color(const glm::vec4& color) {
+        if (base_color == color) { frame_stats.skipped++; return; }
+        glUniform4fv(main_uniforms.base_color, 1, glm::value_ptr(color));
+        base_color = color;
+        frame_stats.uniform_sets++;
+    }
+} draw_state;
 
 // FLAG: Performance Tracking
 double lastTime = 0.0;
@@ -51,8 +195,9 @@ void update_fps_counter() {
         // FLAG: The \r Trick
         // \r moves the cursor back to the start of the line without making a new one.
         // This creates a "live" updating line in your terminal.
-        printf("\rFPS: %d | Cam: [%.1f, %.1f, %.1f]", 
-                nbFrames, main_camera.pos.x, main_camera.pos.y, main_camera.pos.z);
+        printf("\rFPS: %d | Cam: [%.1f, %.1f, %.1f] | Draws: %u | Skipped binds: %u", 
+                nbFrames, main_camera.pos.x, main_camera.pos.y, main_camera.pos.z,
+                last_frame_stats.draw_calls, last_frame_stats.skipped);
         fflush(stdout); 
 
         nbFrames = 0;
@@ -181,21 +326,19 @@ void setup_debug_shader() {
     GLuint vs = compile_shader("shaders/Textest.vert", GL_VERTEX_SHADER);
     GLuint fs = compile_shader("shaders/Textest.frag", GL_FRAGMENT_SHADER);
 
-    shaderProgram = glCreateProgram();
-    glAttachShader(shaderProgram, vs);
-    glAttachShader(shaderProgram, fs);
-    glLinkProgram(shaderProgram);
+    main_program.link(vs, fs);
+    glDeleteShader(vs);
+    glDeleteShader(fs);
 
-    // FLAG: Link Error Check
-    int success;
-    glGetProgramiv(shaderProgram, GL_LINK_STATUS, &success);
-    if (!success) {
-        char infoLog[512];
-        glGetProgramInfoLog(shaderProgram, 512, NULL, infoLog);
-        std::cout << "❌ Shader Link Error:\n" << infoLog << std::endl;
-    }
+    main_uniforms.instance_base = main_program.location("uInstanceBase");
+    main_uniforms.mesh_slot = main_program.location("uMeshSlot");
+    main_uniforms.vertex_count = main_program.location("uVertexCount");
+    main_uniforms.main_tex = main_program.location("uMainTex");
+    main_uniforms.base_color = main_program.location("uBaseColorFactor");
 
-    glUseProgram(shaderProgram);
+    glUseProgram(main_program.id);
+    // Samplers never change: uMainTex always reads texture unit 0
+    glUniform1i(main_uniforms.main_tex, 0);
 }
 
 int init_renderer(int width, int height) {
@@ -220,7 +363,27 @@ int init_renderer(int width, int height) {
         return -1;
     }
 
-    init_skeleton();
+    glGenBuffers(1, &instance_ssbo);
+    glGenBuffers(1, &palette_ssbo);
+    glGenBuffers(1, &morph_range_ssbo);
+    glGenBuffers(1, &active_morph_ssbo);
+
+    glGenBuffers(1, &empty_ssbo);
+    glBindBuffer(GL_SHADER_STORAGE_BUFFER, empty_ssbo);
+    glBufferData(GL_SHADER_STORAGE_BUFFER, 16, nullptr, GL_STATIC_DRAW);
+    glBindBuffer(GL_SHADER_STORAGE_BUFFER, 0);
+
+    glGenBuffers(1, &frame_ubo);
+    glBindBuffer(GL_UNIFORM_BUFFER, frame_ubo);
+    glBufferData(GL_UNIFORM_BUFFER, sizeof(FrameUniforms), nullptr, GL_DYNAMIC_DRAW);
+    glBindBuffer(GL_UNIFORM_BUFFER, 0);
+    glBindBufferBase(GL_UNIFORM_BUFFER, 0, frame_ubo);
+
+    // Asset 0 / instance 0: what upload_mesh / update_joints talk to by default.
+    // Its palette starts empty and takes the size of the first one fed;
+    // until then every joint skins as identity (bind pose).
+    create_asset(0);
+    create_instance(0);
 
     glfwSwapInterval(0);  // Enabled VSync, change to 0 to turn it off.
 
@@ -250,6 +413,9 @@ void swap_buffers() {
     lastFrame = currentFrame;
 
     process_input(dt);
+
+    last_frame_stats = frame_stats;
+    frame_stats = GLStats{};
     update_fps_counter();
     
     glfwSwapBuffers(window);
@@ -269,17 +435,22 @@ void terminate() {
     glfwTerminate();
 }
 
-void add_mesh_to_scene(
+int add_mesh_to_scene(
     const float* vertices, size_t v_size,
     const float* normals, size_t n_size,
     const float* uvs, size_t uv_size,
     const uint32_t* joints, size_t j_size,
     const float* weights, size_t w_size,
     const uint32_t* indices, size_t i_size,
-    const std::vector<const float*>& morph_data_ptrs, // List of pointers
-    //const std::vector<size_t>& morph_sizes,
-    int tex_id
+    const float* morph_deltas, int morph_count,
+    int tex_id,
+    bool transparent,
+    int asset_id
 ) {
+    if (asset_id < 0 || asset_id >= (int)scene_assets.size()) {
+        std::cout << "⚠ upload_mesh: unknown asset " << asset_id << ", using 0" << std::endl;
+        asset_id = 0;
+    }
 
     GPUMesh mesh;
     glGenVertexArrays(1, &mesh.vao);
@@ -326,122 +497,324 @@ void add_mesh_to_scene(
     glVertexAttribPointer(4, 4, GL_FLOAT, GL_FALSE, 0, 0);
     glEnableVertexAttribArray(4);
 
-    // Morph Targets (locations 5, 6, 7, 8)
-    for (int i = 0; i < 4; i++) {
-        glGenBuffers(1, &mesh.vbo_morphs[i]);
-        glBindBuffer(GL_ARRAY_BUFFER, mesh.vbo_morphs[i]);
-        
-        if (i < morph_data_ptrs.size() && morph_data_ptrs[i] != nullptr) {
-            glBufferData(GL_ARRAY_BUFFER, v_size * sizeof(float), morph_data_ptrs[i], GL_DYNAMIC_DRAW);
-        } else {
-            std::vector<float> zeros(v_size, 0.0f);
-            glBufferData(GL_ARRAY_BUFFER, v_size * sizeof(float), zeros.data(), GL_DYNAMIC_DRAW);
-        }
-
-        // FLAG: Use sizeof(float)*3 instead of 0 for the stride
-        // This ensures the GPU jumps exactly 12 bytes between vertices
-        glVertexAttribPointer(5 + i, 3, GL_FLOAT, GL_FALSE, 3 * sizeof(float), (void*)0);
-        glEnableVertexAttribArray(5 + i);
+    // FLAG: Upload Once
+    // All targets go into one storage buffer the vertex shader indexes by
+    // (target, gl_VertexID). Changing expression only changes weights.
+    mesh.morph_ssbo = 0;
+    mesh.morph_count = (morph_deltas && morph_count > 0) ? morph_count : 0;
+    mesh.vertex_count = (int)(v_size / 3);
+    if (mesh.morph_count > 0) {
+        glGenBuffers(1, &mesh.morph_ssbo);
+        glBindBuffer(GL_SHADER_STORAGE_BUFFER, mesh.morph_ssbo);
+        glBufferData(GL_SHADER_STORAGE_BUFFER, (size_t)mesh.morph_count * v_size * sizeof(float),
+                     morph_deltas, GL_STATIC_DRAW);
+        glBindBuffer(GL_SHADER_STORAGE_BUFFER, 0);
     }
 
     mesh.index_count = (int)i_size;
     mesh.texture_id = (GLuint)tex_id;
+    mesh.transparent = transparent;
+    mesh.asset_slot = (int)scene_assets[asset_id].mesh_indices.size();
     scene_meshes.push_back(mesh);
-    //return scene_meshes.size() - 1;
+    scene_assets[asset_id].mesh_indices.push_back((int)scene_meshes.size() - 1);
+    return (int)scene_meshes.size() - 1;
 }
 
-// One call from Python draws EVERYTHING stored in the vector.
-void draw_scene() {
-    glUseProgram(shaderProgram);
+static JointRows identity_joint() {
+    return {{glm::vec4(1, 0, 0, 0), glm::vec4(0, 1, 0, 0), glm::vec4(0, 0, 1, 0)}};
+}
 
-    glm::mat4 view = main_camera.get_view();
-    glm::mat4 proj = main_camera.get_projection();
-    glm::mat4 model = glm::mat4(1.0f);
+int create_asset(int joint_count) {
+    GPUAsset asset;
+    asset.joint_count = joint_count > 0 ? joint_count : 0;
+    scene_assets.push_back(asset);
+    return (int)scene_assets.size() - 1;
+}
+
+int create_instance(int asset_id) {
+    if (asset_id < 0 || asset_id >= (int)scene_assets.size()) return -1;
+
+    AvatarInstance inst;
+    inst.asset_id = asset_id;
+    inst.alive = true;
+    inst.visible = true;
+    inst.model = glm::mat4(1.0f);
+    inst.joints.assign(scene_assets[asset_id].joint_count, identity_joint());
+
+    // FLAG: Slot Reuse
+    // Despawned crowd members leave holes; fill those before growing.
+    int id;
+    if (!free_instance_ids.empty()) {
+        id = free_instance_ids.back();
+        free_instance_ids.pop_back();
+        scene_instances[id] = std::move(inst);
+    } else {
+        id = (int)scene_instances.size();
+        scene_instances.push_back(std::move(inst));
+    }
+    scene_assets[asset_id].instance_ids.push_back(id);
+    return id;
+}
 
-    glUniformMatrix4fv(glGetUniformLocation(shaderProgram, "view"), 1, GL_FALSE, glm::value_ptr(view));
-    glUniformMatrix4fv(glGetUniformLocation(shaderProgram, "projection"), 1, GL_FALSE, glm::value_ptr(proj));
-    glUniformMatrix4fv(glGetUniformLocation(shaderProgram, "model"), 1, GL_FALSE, glm::value_ptr(model));
+static AvatarInstance* find_instance(int instance_id) {
+    if (instance_id < 0 || instance_id >= (int)scene_instances.size()) return nullptr;
+    AvatarInstance& inst = scene_instances[instance_id];
+    return inst.alive ? &inst : nullptr;
+}
 
-    //glUniformMatrix4fv(glGetUniformLocation(shaderProgram, "view"), 1, GL_FALSE, &view[0][0]);
-    //glUniformMatrix4fv(glGetUniformLocation(shaderProgram, "projection"), 1, GL_FALSE, &proj[0][0]);
-    //glUniformMatrix4fv(glGetUniformLocation(shaderProgram, "model"), 1, GL_FALSE, &model[0][0]);
+void destroy_instance(int instance_id) {
+    AvatarInstance* inst = find_instance(instance_id);
+    if (!inst || instance_id == 0) return;  // instance 0 is permanent
 
-    GLint jointLoc = glGetUniformLocation(shaderProgram, "uJointMatrices");
-    if (jointLoc != -1) {
-        glUniformMatrix4fv(jointLoc, 256, GL_FALSE, glm::value_ptr(joint_matrices[0]));
+    std::vector<int>& ids = scene_assets[inst->asset_id].instance_ids;
+    for (size_t i = 0; i < ids.size(); i++) {
+        if (ids[i] == instance_id) {
+            ids.erase(ids.begin() + i);
+            break;
+        }
     }
+    inst->alive = false;
+    inst->morphs.clear();
+    inst->joints.clear();
+    inst->joints.shrink_to_fit();
+    free_instance_ids.push_back(instance_id);
+}
+
+void set_instance_transform(int instance_id, const float* m16) {
+    AvatarInstance* inst = find_instance(instance_id);
+    if (inst) inst->model = glm::make_mat4(m16);
+}
 
-    for (const auto& mesh : scene_meshes) {
-        // FLAG: The Critical Texture Bind
-        // We use mesh.texture_id (which Python sent) instead of a global variable.
-        if (mesh.texture_id != 0) {
-            glActiveTexture(GL_TEXTURE0); 
-            glBindTexture(GL_TEXTURE_2D, mesh.texture_id);
-            
-            // Tell the shader: "Use Texture Unit 0"
-            GLint texLoc = glGetUniformLocation(shaderProgram, "uMainTex");
-            glUniform1i(texLoc, 0);
+void set_instance_joints(int instance_id, const float* data, int count, int first_joint, int joint_count) {
+    AvatarInstance* inst = find_instance(instance_id);
+    if (!inst) return;
+
+    // 16 floats per mat4; the palette is sized to the skeleton it is fed
+    int num_matrices = count / 16;
+    if (num_matrices < 1) return;
+    if ((int)inst->joints.size() != num_matrices) {
+        inst->joints.resize(num_matrices, identity_joint());
+    }
+
+    // FLAG: Dirty Range
+    // Only the joints Python says changed are copied.
+    if (joint_count < 0) joint_count = num_matrices - first_joint;
+    if (first_joint < 0) first_joint = 0;
+    int end = std::min(first_joint + joint_count, num_matrices);
+
+    // Column-major in, rows out; the bottom row (0,0,0,1) is dropped
+    for (int i = first_joint; i < end; i++) {
+        const float* m = &data[i * 16];
+        JointRows& joint = inst->joints[i];
+        for (int r = 0; r < 3; r++) {
+            joint.rows[r] = glm::vec4(m[r], m[4 + r], m[8 + r], m[12 + r]);
         }
+    }
+}
 
-        // FLAG: Base Color Safety
-        // If it's black, Kisayo will be a shadow. Let's force it to White (1.0) for now.
-        GLint colorLoc = glGetUniformLocation(shaderProgram, "uBaseColorFactor");
-        glUniform4f(colorLoc, 1.0f, 1.0f, 1.0f, 1.0f);
+void set_instance_morph_weights(int instance_id, int mesh_index, const float* weights, int count) {
+    AvatarInstance* inst = find_instance(instance_id);
+    if (!inst || mesh_index < 0 || mesh_index >= (int)scene_meshes.size()) return;
+
+    const GPUMesh& mesh = scene_meshes[mesh_index];
+    const std::vector<int>& meshes = scene_assets[inst->asset_id].mesh_indices;
+    if (mesh.asset_slot >= (int)meshes.size() || meshes[mesh.asset_slot] != mesh_index) {
+        std::cout << "⚠ set_morph_weights: mesh " << mesh_index
+                  << " is not part of instance " << instance_id << "'s asset" << std::endl;
+        return;
+    }
 
-        glBindVertexArray(mesh.vao);
-        glDrawElements(GL_TRIANGLES, mesh.index_count, GL_UNSIGNED_INT, 0);
+    // Meshes stream in after the instance exists, so slots grow on demand
+    if ((int)inst->morphs.size() <= mesh.asset_slot) {
+        inst->morphs.resize(meshes.size());
+    }
+
+    // FLAG: Compaction
+    // The shader loops over this list, so an idle face costs nothing and a
+    // talking one pays for two or three targets, not all fifty.
+    std::vector<ActiveMorph>& active = inst->morphs[mesh.asset_slot];
+    active.clear();
+    int n = std::min(count, mesh.morph_count);
+    for (int i = 0; i < n; i++) {
+        if (weights[i] != 0.0f) active.push_back({(uint32_t)i, weights[i]});
     }
 }
 
-GLuint upload_texture_bytes(const unsigned char* data, int size) {
-    g_texture = load_texture_from_memory(data, size, true);
-    return g_texture;
+void set_instance_visible(int instance_id, bool visible) {
+    AvatarInstance* inst = find_instance(instance_id);
+    if (inst) inst->visible = visible;
 }
-// Store the uploaded texture ID
-void set_current_texture(GLuint tex_id) {
-    current_texture = tex_id;
+
+int instance_count() {
+    return (int)(scene_instances.size() - free_instance_ids.size());
 }
 
-void set_morph_weights(float w0, float w1, float w2, float w3) {
-    g_morph_weights[0] = w0;
-    g_morph_weights[1] = w1;
-    g_morph_weights[2] = w2;
-    g_morph_weights[3] = w3;
-
-    glUseProgram(shaderProgram);
-    GLint loc = glGetUniformLocation(shaderProgram, "uMorphWeights");
-    if (loc != -1) {
-        // Send all 4 weights to the vec4 in the shader
-        glUniform4f(loc, w0, w1, w2, w3);
+// FLAG: Pack Instances
+// Gathers every visible instance into one SSBO (grouped by asset) and all
+// their palettes into another. Two uploads per frame, whatever the crowd size.
+static void upload_instance_data() {
+    frame_instances.clear();
+    frame_palette_sources.clear();
+    frame_palette_joints = 0;
+    frame_morph_ranges.clear();
+    frame_active_morphs.clear();
+    asset_first_instance.assign(scene_assets.size(), 0);
+    asset_drawn_instances.assign(scene_assets.size(), 0);
+
+    for (size_t a = 0; a < scene_assets.size(); a++) {
+        asset_first_instance[a] = (int)frame_instances.size();
+
+        for (int id : scene_assets[a].instance_ids) {
+            const AvatarInstance& inst = scene_instances[id];
+            if (!inst.visible) continue;
+
+            InstanceRecord rec;
+            rec.model = inst.model;
+            rec.palette_offset = (uint32_t)frame_palette_joints;
+            rec.morph_ranges = (uint32_t)frame_morph_ranges.size();
+            rec.joint_count = (uint32_t)inst.joints.size();
+            rec.pad = 0;
+            frame_instances.push_back(rec);
+
+            frame_palette_sources.push_back(&inst);
+            frame_palette_joints += inst.joints.size();
+
+            for (size_t slot = 0; slot < scene_assets[a].mesh_indices.size(); slot++) {
+                MorphRange range = {(uint32_t)frame_active_morphs.size(), 0};
+                if (slot < inst.morphs.size()) {
+                    const std::vector<ActiveMorph>& active = inst.morphs[slot];
+                    frame_active_morphs.insert(frame_active_morphs.end(), active.begin(), active.end());
+                    range.count = (uint32_t)active.size();
+                }
+                frame_morph_ranges.push_back(range);
+            }
+        }
+        asset_drawn_instances[a] = (int)frame_instances.size() - asset_first_instance[a];
     }
-}
 
-void update_morph_slot(int mesh_index, int slot_index, const float* new_data, size_t data_size) {
-    if (mesh_index < 0 || mesh_index >= scene_meshes.size() || slot_index < 0 || slot_index >= 4) {
-        return;
+    if (frame_instances.empty()) return;
+
+    // glBufferData with the new size orphans last frame's storage, so the
+    // driver never stalls waiting for the GPU to finish reading it.
+    glBindBuffer(GL_SHADER_STORAGE_BUFFER, instance_ssbo);
+    glBufferData(GL_SHADER_STORAGE_BUFFER, frame_instances.size() * sizeof(InstanceRecord),
+                 frame_instances.data(), GL_STREAM_DRAW);
+    glBindBufferBase(GL_SHADER_STORAGE_BUFFER, 0, instance_ssbo);
+
+    // FLAG: Mapped Palette
+    // Storage only grows. Each frame it is mapped with INVALIDATE_BUFFER
+    // (orphaned: the GPU keeps last frame's copy) and every instance's
+    // joint rows are written straight into it, with no staging vector.
+    size_t palette_bytes = std::max<size_t>(frame_palette_joints, 1) * sizeof(JointRows);
+    glBindBuffer(GL_SHADER_STORAGE_BUFFER, palette_ssbo);
+    if (palette_bytes > palette_capacity) {
+        palette_capacity = std::max(palette_bytes, palette_capacity * 2);
+        glBufferData(GL_SHADER_STORAGE_BUFFER, palette_capacity, nullptr, GL_STREAM_DRAW);
+    }
+    JointRows* dst = static_cast<JointRows*>(glMapBufferRange(
+        GL_SHADER_STORAGE_BUFFER, 0, palette_bytes, GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT));
+    if (dst) {
+        for (const AvatarInstance* inst : frame_palette_sources) {
+            dst = std::copy(inst->joints.begin(), inst->joints.end(), dst);
+        }
+        glUnmapBuffer(GL_SHADER_STORAGE_BUFFER);
     }
+    glBindBufferBase(GL_SHADER_STORAGE_BUFFER, 1, palette_ssbo);
 
-    //std::cout << " Mesh: " << mesh_index 
-    //      << " Slot: " << slot_index 
-    //      << " Size: " << data_size
-    //      << std::endl;
+    // Never zero-sized: an idle face still needs something bound
+    if (frame_morph_ranges.empty()) frame_morph_ranges.push_back({0, 0});
+    if (frame_active_morphs.empty()) frame_active_morphs.push_back({0, 0.0f});
 
+    glBindBuffer(GL_SHADER_STORAGE_BUFFER, morph_range_ssbo);
+    glBufferData(GL_SHADER_STORAGE_BUFFER, frame_morph_ranges.size() * sizeof(MorphRange),
+                 frame_morph_ranges.data(), GL_STREAM_DRAW);
+    glBindBufferBase(GL_SHADER_STORAGE_BUFFER, 3, morph_range_ssbo);
 
+    glBindBuffer(GL_SHADER_STORAGE_BUFFER, active_morph_ssbo);
+    glBufferData(GL_SHADER_STORAGE_BUFFER, frame_active_morphs.size() * sizeof(ActiveMorph),
+                 frame_active_morphs.data(), GL_STREAM_DRAW);
+    glBindBufferBase(GL_SHADER_STORAGE_BUFFER, 4, active_morph_ssbo);
+    glBindBuffer(GL_SHADER_STORAGE_BUFFER, 0);
 
-    GPUMesh& mesh = scene_meshes[mesh_index];
-    glBindVertexArray(mesh.vao);
-    glBindBuffer(GL_ARRAY_BUFFER, mesh.vbo_morphs[slot_index]);
-    
-    // FLAG: glBufferSubData
-    // We don't re-allocate (glBufferData), we just "paste" over the existing memory.
-    // This is much faster than recreating the buffer.
-    glBufferSubData(GL_ARRAY_BUFFER, 0, data_size * sizeof(float), new_data);
+    frame_stats.buffer_uploads += 4;
+    frame_stats.buffer_binds += 4;
+}
 
-    
-    // Re-tell the VAO exactly where this slot is. Location for Morph2 is 7.
-    //int location = 5 + slot_index; 
-    //glVertexAttribPointer(location, 3, GL_FLOAT, GL_FALSE, 3 * sizeof(float), (void*)0);
-    //glEnableVertexAttribArray(location);
-    glBindBuffer(GL_ARRAY_BUFFER, 0);
-    glBindVertexArray(0);
-}
\ No newline at end of file
+// One call from Python draws EVERYTHING stored in the vector.
+void draw_scene() {
+    draw_state.begin_frame();
+    draw_state.use_program(main_program.id);
+
+    // FLAG: Frame Uniform Block
+    // view / projection live in one UBO shared by every draw; a still
+    // camera uploads nothing.
+    FrameUniforms frame = {main_camera.get_view(), main_camera.get_projection()};
+    if (!frame_submitted || std::memcmp(&frame, &submitted_frame, sizeof(FrameUniforms)) != 0) {
+        glBindBuffer(GL_UNIFORM_BUFFER, frame_ubo);
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, sizeof(FrameUniforms), &frame);
+        glBindBuffer(GL_UNIFORM_BUFFER, 0);
+        submitted_frame = frame;
+        frame_submitted = true;
+        frame_stats.buffer_uploads++;
+    } else {
+        frame_stats.skipped++;
+    }
+
+    // Model matrices, active morphs and joint palettes are per instance now
+    upload_instance_data();
+    if (frame_instances.empty()) return;
+
+    // FLAG: Two Passes
+    // Meshes stream in from the loader in file order, so opaque/transparent
+    // ordering is done here instead of by upload order.
+    for (int pass = 0; pass < 2; pass++)
+    for (size_t a = 0; a < scene_assets.size(); a++) {
+        int count = asset_drawn_instances[a];
+        if (count == 0) continue;
+
+        // GLSL 4.30 has no gl_BaseInstance, so the shader adds this itself
+        draw_state.set_instance_base(asset_first_instance[a]);
+
+        for (int mesh_index : scene_assets[a].mesh_indices) {
+            const GPUMesh& mesh = scene_meshes[mesh_index];
+            if (mesh.transparent != (pass == 1)) continue;
+
+            // FLAG: The Critical Texture Bind
+            // We use mesh.texture_id (which Python sent) instead of a global variable.
+            // Meshes without one keep whatever texture is bound, as before.
+            if (mesh.texture_id != 0) {
+                draw_state.bind_texture(mesh.texture_id);
+            }
+
+            // FLAG: Base Color Safety
+            // If it's black, Kisayo will be a shadow. Let's force it to White (1.0) for now.
+            draw_state.set_base_color(glm::vec4(1.0f));
+
+            draw_state.bind_morphs(mesh.morph_ssbo ? mesh.morph_ssbo : empty_ssbo);
+            draw_state.set_mesh((GLuint)mesh.asset_slot, (GLuint)mesh.vertex_count);
+
+            // FLAG: One Draw Per Mesh, Not Per Avatar
+            draw_state.bind_vao(mesh.vao);
+            glDrawElementsInstanced(GL_TRIANGLES, mesh.index_count, GL_UNSIGNED_INT, 0, count);
+            frame_stats.draw_calls++;
+        }
+    }
+}
+
+GLuint upload_texture_bytes(const unsigned char* data, int size) {
+    g_texture = load_texture_from_memory(data, size, true);
+    return g_texture;
+}
+// Store the uploaded texture ID
+void set_current_texture(GLuint tex_id) {
+    current_texture = tex_id;
+}
+
+void set_morph_weights(int mesh_index, const float* weights, int count) {
+    // Single-avatar path: drives instance 0
+    set_instance_morph_weights(0, mesh_index, weights, count);
+}
+
+GLStats gl_stats() {
+    return last_frame_stats;
+}
@@ -2,6 +2,7 @@
 #include <cstdint>
 #include <vector>
 #include <glad/glad.h>
+#include <glm/glm.hpp>
 #include "camera.hpp"
 
 // Forward declarations / globals
@@ -18,8 +19,66 @@ struct GPUMesh {
     GLuint vbo_pos, vbo_norm, vbo_uv, vbo_joints, vbo_weights, ebo;
     int index_count;
     GLuint texture_id;
-     // Must be an array of 4
-    GLuint vbo_morphs[4]; 
+    // FLAG: Resident Morphs
+    // Every target's position deltas, uploaded once: float[target][vertex][3]
+    GLuint morph_ssbo;
+    int morph_count;
+    int vertex_count;
+    int asset_slot;      // position in its asset's mesh_indices
+    // Drawn after every opaque mesh, whatever order meshes arrive in
+    bool transparent;
+};
+
+// FLAG: Asset / Instance Split
+// An asset owns geometry, textures and morph data (uploaded once). Every
+// avatar placed in the scene is an instance of an asset with its own
+// transform, joint palette and morph weights. Asset 0 / instance 0 always
+// exist so the single-avatar calls keep working.
+
+// One non-zero morph weight; layout matches `ActiveMorph` in Textest.vert
+struct ActiveMorph {
+    uint32_t target;
+    float weight;
+};
+
+// FLAG: Compact Joints
+// A joint matrix is affine, so only its top three rows are kept (the fourth
+// is always 0,0,0,1): 48 bytes instead of 64. Layout matches `mat3x4` in
+// Textest.vert's Palette buffer.
+struct JointRows {
+    glm::vec4 rows[3];
+};
+
+struct GPUAsset {
+    std::vector<int> mesh_indices;   // into scene_meshes
+    std::vector<int> instance_ids;   // live instances, drawn in one batch
+    int joint_count;                 // palette entries per instance (0: unskinned)
+};
+
+struct AvatarInstance {
+    int asset_id;
+    bool alive;
+    bool visible;
+    glm::mat4 model;
+    // Per mesh slot of the asset, only the targets with a non-zero weight
+    std::vector<std::vector<ActiveMorph>> morphs;
+    // Sized to the skeleton fed to it; joints past the end skin as identity
+    std::vector<JointRows> joints;
+};
+
+// FLAG: GL Call Counters
+// What draw_scene issued, and how many binds / uniform sets it skipped
+// because the state was already current. One frame's worth, reset by
+// swap_buffers.
+struct GLStats {
+    uint32_t draw_calls;
+    uint32_t program_binds;
+    uint32_t vao_binds;
+    uint32_t texture_binds;
+    uint32_t buffer_binds;     // glBindBufferBase
+    uint32_t buffer_uploads;   // glBufferData / glBufferSubData
+    uint32_t uniform_sets;
+    uint32_t skipped;          // redundant calls not issued
 };
 
 
@@ -32,18 +91,35 @@ void terminate();
 void draw_scene();
 
 
-void add_mesh_to_scene(
+// Returns the mesh index (what set_morph_weights expects)
+int add_mesh_to_scene(
     const float* vertices, size_t v_size,
     const float* normals, size_t n_size,
     const float* uvs, size_t uv_size,
     const uint32_t* joints, size_t j_size,
     const float* weights, size_t w_size,
     const uint32_t* indices, size_t i_size,
-    const std::vector<const float*>& morph_data_ptrs,
-    int tex_id
+    const float* morph_deltas, int morph_count,  // (morph_count, v_size) floats
+    int tex_id,
+    bool transparent = false,
+    int asset_id = 0
 );
 
+int create_asset(int joint_count);
+int create_instance(int asset_id);
+void destroy_instance(int instance_id);
+void set_instance_transform(int instance_id, const float* m16);
+// `data` is the whole palette (count floats); only joints
+// [first_joint, first_joint + joint_count) are copied (-1 = to the end)
+void set_instance_joints(int instance_id, const float* data, int count,
+                         int first_joint = 0, int joint_count = -1);
+// `weights` holds one value per morph target of the mesh; zeros are dropped
+void set_instance_morph_weights(int instance_id, int mesh_index, const float* weights, int count);
+void set_instance_visible(int instance_id, bool visible);
+int instance_count();
+
 GLuint upload_texture_bytes(const unsigned char* data, int size);
 void set_current_texture(GLuint tex_id);
-void set_morph_weights(float w0, float w1, float w2, float w3);
-void update_morph_slot(int mesh_index, int slot_index, const float* new_data, size_t data_size);
\ No newline at end of file
+void set_morph_weights(int mesh_index, const float* weights, int count);
+// Counters for the last completed frame
+GLStats gl_stats();
@@ -0,0 +1,56 @@
+#pragma once
+#include <iostream>
+#include <string>
+#include <unordered_map>
+#include <glad/glad.h>
+
+// FLAG: Cached Uniform Locations
+// Every active uniform is looked up once, right after linking. Nothing on
+// the draw path calls glGetUniformLocation; a uniform the linker optimised
+// away resolves to -1, which glUniform* ignores.
+struct ShaderProgram {
+    GLuint id = 0;
+    std::unordered_map<std::string, GLint> locations;
+
+    bool link(GLuint vs, GLuint fs) {
+        id = glCreateProgram();
+        glAttachShader(id, vs);
+        glAttachShader(id, fs);
+        glLinkProgram(id);
+
+        // FLAG: Link Error Check
+        int success;
+        glGetProgramiv(id, GL_LINK_STATUS, &success);
+        if (!success) {
+            char infoLog[512];
+            glGetProgramInfoLog(id, 512, NULL, infoLog);
+            std::cout << "❌ Shader Link Error:\n" << infoLog << std::endl;
+            return false;
+        }
+
+        GLint count = 0, max_length = 0;
+        glGetProgramiv(id, GL_ACTIVE_UNIFORMS, &count);
+        glGetProgramiv(id, GL_ACTIVE_UNIFORM_MAX_LENGTH, &max_length);
+        std::string name(max_length > 0 ? max_length : 1, '\0');
+        for (GLint i = 0; i < count; i++) {
+            GLsizei length = 0;
+            GLint size = 0;
+            GLenum type = 0;
+            glGetActiveUniform(id, (GLuint)i, max_length, &length, &size, &type, &name[0]);
+            std::string key(name.data(), length);
+            GLint location = glGetUniformLocation(id, key.c_str());
+            if (location < 0) continue;   // lives in a uniform block
+            // Arrays report "name[0]"; make "name" work too
+            if (key.size() > 3 && key.compare(key.size() - 3, 3, "[0]") == 0)
+                locations[key.substr(0, key.size() - 3)] = location;
+            locations[key] = location;
+        }
+        return true;
+    }
+
+    // Link-time lookup, never a GL call; -1 when missing
+    GLint location(const std::string& name) const {
+        auto it = locations.find(name);
+        return it == locations.end() ? -1 : it->second;
+    }
+};
@@ -9,23 +9,55 @@ GLuint load_texture_from_memory(
     int size,
     bool srgb
 ) {
-    int width, height, channels;
-    stbi_set_flip_vertically_on_load(true);
+    int width, height;
+    unsigned char* pixels = decode_texture_rgba(data, size, &width, &height);
+
+    if (!pixels) {
+        return 0;
+    }
+
+    GLuint tex = upload_texture_rgba(pixels, width, height, srgb);
+
+    stbi_image_free(pixels);
+    return tex;
+}
+
+unsigned char* decode_texture_rgba(
+    const unsigned char* data,
+    int size,
+    int* width,
+    int* height
+) {
+    int channels;
+    // FLAG: Per-Thread Flip
+    // The global stbi_set_flip_vertically_on_load races across decode workers.
+    stbi_set_flip_vertically_on_load_thread(true);
 
     unsigned char* pixels = stbi_load_from_memory(
         data,
         size,
-        &width,
-        &height,
+        width,
+        height,
         &channels,
         STBI_rgb_alpha
     );
 
     if (!pixels) {
         std::cerr << "❌ STB failed to decode texture\n";
-        return 0;
     }
+    return pixels;
+}
+
+void free_decoded_texture(unsigned char* pixels) {
+    stbi_image_free(pixels);
+}
 
+GLuint upload_texture_rgba(
+    const unsigned char* pixels,
+    int width,
+    int height,
+    bool srgb
+) {
     GLuint tex;
     glGenTextures(1, &tex);
     glBindTexture(GL_TEXTURE_2D, tex);
@@ -49,6 +81,147 @@ GLuint load_texture_from_memory(
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT);
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT);
 
-    stbi_image_free(pixels);
     return tex;
 }
+
+GLuint upload_texture_levels(
+    const std::vector<const unsigned char*>& levels,
+    int width,
+    int height,
+    bool srgb
+) {
+    if (levels.empty()) return 0;
+
+    GLuint tex;
+    glGenTextures(1, &tex);
+    glBindTexture(GL_TEXTURE_2D, tex);
+
+    // FLAG: Pre-Cooked Mips
+    // Levels come from the asset cache, so no glGenerateMipmap here.
+    // RGBA8 rows are 4*w bytes, so the default unpack alignment of 4 fits
+    // every level, odd widths included.
+
+    int w = width;
+    int h = height;
+    for (int level = 0; level < (int)levels.size(); level++) {
+        glTexImage2D(
+            GL_TEXTURE_2D,
+            level,
+            srgb ? GL_SRGB8_ALPHA8 : GL_RGBA8,
+            w,
+            h,
+            0,
+            GL_RGBA,
+            GL_UNSIGNED_BYTE,
+            levels[level]
+        );
+        w = w > 1 ? w / 2 : 1;
+        h = h > 1 ? h / 2 : 1;
+    }
+
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, (GLint)levels.size() - 1);
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER,
+                    levels.size() > 1 ? GL_LINEAR_MIPMAP_LINEAR : GL_LINEAR);
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR);
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT);
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT);
+
+    return tex;
+}
+
+void set_texture_sampler(GLuint tex, GLint min_filter, GLint mag_filter, GLint wrap_s, GLint wrap_t) {
+    glBindTexture(GL_TEXTURE_2D, tex);
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, min_filter);
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, mag_filter);
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, wrap_s);
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, wrap_t);
+}
+
+void delete_texture(GLuint tex) {
+    if (tex != 0) glDeleteTextures(1, &tex);
+}
+
+// ==========================
+// Decode worker pool
+// ==========================
+
+TextureDecodePool::TextureDecodePool(unsigned int threads) {
+    if (threads == 0) threads = std::thread::hardware_concurrency();
+    if (threads == 0) threads = 1;
+
+    for (unsigned int i = 0; i < threads; i++) {
+        workers.emplace_back(&TextureDecodePool::worker_loop, this);
+    }
+}
+
+TextureDecodePool::~TextureDecodePool() {
+    {
+        std::lock_guard<std::mutex> lock(mtx);
+        stopping = true;
+    }
+    job_cv.notify_all();
+    for (auto& t : workers) t.join();
+
+    // Nobody came back for these
+    for (auto& entry : finished) {
+        if (entry.second.pixels) free_decoded_texture(entry.second.pixels);
+    }
+}
+
+uint64_t TextureDecodePool::submit(const unsigned char* data, int size) {
+    uint64_t ticket;
+    {
+        std::lock_guard<std::mutex> lock(mtx);
+        ticket = next_ticket++;
+        queue.push_back({ticket, data, size});
+    }
+    job_cv.notify_one();
+    return ticket;
+}
+
+DecodedTexture TextureDecodePool::wait(uint64_t ticket) {
+    std::unique_lock<std::mutex> lock(mtx);
+    done_cv.wait(lock, [&] { return finished.count(ticket) != 0; });
+
+    DecodedTexture out = finished[ticket];
+    finished.erase(ticket);
+    return out;
+}
+
+bool TextureDecodePool::try_take(uint64_t ticket, DecodedTexture& out) {
+    std::lock_guard<std::mutex> lock(mtx);
+    auto it = finished.find(ticket);
+    if (it == finished.end()) return false;
+
+    out = it->second;
+    finished.erase(it);
+    return true;
+}
+
+void TextureDecodePool::worker_loop() {
+    while (true) {
+        Job job;
+        {
+            std::unique_lock<std::mutex> lock(mtx);
+            job_cv.wait(lock, [&] { return stopping || !queue.empty(); });
+            if (stopping && queue.empty()) return;
+
+            job = queue.front();
+            queue.pop_front();
+        }
+
+        DecodedTexture result;
+        result.pixels = decode_texture_rgba(job.data, job.size, &result.width, &result.height);
+
+        {
+            std::lock_guard<std::mutex> lock(mtx);
+            finished[job.ticket] = result;
+        }
+        done_cv.notify_all();
+    }
+}
+
+TextureDecodePool& texture_decode_pool() {
+    static TextureDecodePool pool;
+    return pool;
+}
@@ -1,4 +1,11 @@
 #pragma once
+#include <condition_variable>
+#include <cstdint>
+#include <deque>
+#include <mutex>
+#include <thread>
+#include <unordered_map>
+#include <vector>
 #include <glad/glad.h>
 
 GLuint load_texture_from_memory(
@@ -6,3 +13,80 @@ GLuint load_texture_from_memory(
     int size,
     bool srgb = true
 );
+
+// CPU-only half of the loader: returns tightly packed RGBA8 pixels
+// (flipped like load_texture_from_memory) or nullptr on failure.
+// Thread-safe; release with free_decoded_texture.
+unsigned char* decode_texture_rgba(
+    const unsigned char* data,
+    int size,
+    int* width,
+    int* height
+);
+void free_decoded_texture(unsigned char* pixels);
+
+// GL half: uploads level 0 and lets the driver build the mips.
+GLuint upload_texture_rgba(
+    const unsigned char* pixels,
+    int width,
+    int height,
+    bool srgb = true
+);
+
+// GL half: uploads an already decoded RGBA8 mip chain (level 0 first).
+GLuint upload_texture_levels(
+    const std::vector<const unsigned char*>& levels,
+    int width,
+    int height,
+    bool srgb = true
+);
+
+// Sampler state straight from a glTF sampler (values are GL enums)
+void set_texture_sampler(GLuint tex, GLint min_filter, GLint mag_filter, GLint wrap_s, GLint wrap_t);
+void delete_texture(GLuint tex);
+
+struct DecodedTexture {
+    unsigned char* pixels = nullptr;  // nullptr = decode failed
+    int width = 0;
+    int height = 0;
+};
+
+// FLAG: Decode Worker Pool
+// Decodes run on native threads; callers hand in raw pointers that must
+// stay valid until the ticket has been taken back out.
+class TextureDecodePool {
+public:
+    explicit TextureDecodePool(unsigned int threads = 0);
+    ~TextureDecodePool();
+
+    uint64_t submit(const unsigned char* data, int size);
+
+    // Blocks until the ticket is done, then hands ownership to the caller
+    DecodedTexture wait(uint64_t ticket);
+
+    // Non-blocking: true (and ownership) if the ticket is done
+    bool try_take(uint64_t ticket, DecodedTexture& out);
+
+    unsigned int thread_count() const { return (unsigned int)workers.size(); }
+
+private:
+    struct Job {
+        uint64_t ticket;
+        const unsigned char* data;
+        int size;
+    };
+
+    void worker_loop();
+
+    std::vector<std::thread> workers;
+    std::deque<Job> queue;
+    std::unordered_map<uint64_t, DecodedTexture> finished;
+    std::mutex mtx;
+    std::condition_variable job_cv;
+    std::condition_variable done_cv;
+    uint64_t next_ticket = 1;
+    bool stopping = false;
+};
+
+// Lazily created, one worker per hardware thread
+TextureDecodePool& texture_decode_pool();
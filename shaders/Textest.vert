@@ -9,21 +9,70 @@ layout (location = 2) in vec2 aUV;
 layout (location = 3) in ivec4 aJoints;
 layout (location = 4) in vec4 aWeights;
 
+// ==========================
+// Uniforms
+// ==========================
+// Per-frame constants, one UBO for every draw (FrameUniforms in renderer.cpp)
+layout(std140, binding = 0) uniform Frame {
+    mat4 view;
+    mat4 projection;
+};
+
+// ==========================
+// Per-Instance Data (packed by draw_scene, one entry per avatar)
+// ==========================
+struct InstanceData {
+    mat4 model;
+    uint paletteOffset;  // first joint of this instance in uJoints
+    uint morphRanges;    // first entry of this instance in uMorphRanges
+    uint jointCount;     // palette entries this instance has
+    uint pad0;
+};
+
+layout(std430, binding = 0) readonly buffer Instances {
+    InstanceData uInstances[];
+};
 
-layout (location = 5) in vec3 aMorph0; // Blink
-layout (location = 6) in vec3 aMorph1; // Breath/Surprise
-layout (location = 7) in vec3 aMorph2; // Mouth A
-layout (location = 8) in vec3 aMorph3; // Mouth I
+// Affine joints as their top three rows (JointRows in renderer.hpp):
+// column i of the mat3x4 is row i of the 4x4 matrix
+layout(std430, binding = 1) readonly buffer Palette {
+    mat3x4 uJoints[];
+};
+
+const mat3x4 IDENTITY_JOINT = mat3x4(vec4(1, 0, 0, 0), vec4(0, 1, 0, 0), vec4(0, 0, 1, 0));
+
+// Joints past the end of an instance's palette skin as identity
+mat3x4 joint(uint base, uint count, int index) {
+    return uint(index) < count ? uJoints[base + uint(index)] : IDENTITY_JOINT;
+}
 
 // ==========================
-// Uniforms
+// Morph Targets (uploaded once per mesh, driven by weights only)
 // ==========================
-uniform mat4 model;
-uniform mat4 view;
-uniform mat4 projection;
-uniform mat4 uJointMatrices[256];
+struct ActiveMorph {
+    uint target;
+    float weight;
+};
+
+// Every target of the mesh being drawn: [target][vertex][xyz]
+layout(std430, binding = 2) readonly buffer MorphDeltas {
+    float uMorphDeltas[];
+};
 
-uniform vec4 uMorphWeights; // [w0, w1, w2, w3]
+// (offset, count) into uActiveMorphs, per instance per mesh slot
+layout(std430, binding = 3) readonly buffer MorphRanges {
+    uvec2 uMorphRanges[];
+};
+
+// Only the non-zero weights, compacted on the CPU
+layout(std430, binding = 4) readonly buffer ActiveMorphs {
+    ActiveMorph uActiveMorphs[];
+};
+
+// GLSL 4.30 has no gl_BaseInstance; first instance of the asset being drawn
+uniform int uInstanceBase;
+uniform uint uMeshSlot;     // this mesh's position within its asset
+uniform uint uVertexCount;  // stride between targets in uMorphDeltas
 
 // ==========================
 // Outputs
@@ -33,12 +82,18 @@ out vec3 vNormal; // for lighting
 
 void main()
 {
-    vec3 m0 = aMorph0 * uMorphWeights.x;
-    vec3 m1 = aMorph1 * uMorphWeights.y;
-    vec3 m2 = aMorph2 * uMorphWeights.z;
-    vec3 m3 = aMorph3 * uMorphWeights.w;
+    InstanceData inst = uInstances[uInstanceBase + gl_InstanceID];
+    mat4 model = inst.model;
+    uint base = inst.paletteOffset;
+    uint jointCount = inst.jointCount;
 
-    vec3 totalMorphOffset = m0 + m1 + m2 + m3;
+    uvec2 morphs = uMorphRanges[inst.morphRanges + uMeshSlot];
+    vec3 totalMorphOffset = vec3(0.0);
+    for (uint i = 0u; i < morphs.y; i++) {
+        ActiveMorph m = uActiveMorphs[morphs.x + i];
+        uint d = (m.target * uVertexCount + uint(gl_VertexID)) * 3u;
+        totalMorphOffset += m.weight * vec3(uMorphDeltas[d], uMorphDeltas[d + 1u], uMorphDeltas[d + 2u]);
+    }
 
     float totalWeight = aWeights.x + aWeights.y + aWeights.z + aWeights.w;
 
@@ -48,11 +103,12 @@ void main()
         // If no weights exist, fall back to a standard static pose
         skinMatrix = mat4(1.0);
     } else {
-        skinMatrix = 
-            aWeights.x * uJointMatrices[aJoints.x] +
-            aWeights.y * uJointMatrices[aJoints.y] +
-            aWeights.z * uJointMatrices[aJoints.z] +
-            aWeights.w * uJointMatrices[aJoints.w];
+        mat3x4 rows =
+            aWeights.x * joint(base, jointCount, aJoints.x) +
+            aWeights.y * joint(base, jointCount, aJoints.y) +
+            aWeights.z * joint(base, jointCount, aJoints.z) +
+            aWeights.w * joint(base, jointCount, aJoints.w);
+        skinMatrix = transpose(mat4(rows[0], rows[1], rows[2], vec4(0.0, 0.0, 0.0, 1.0)));
     }
 
     // FLAG: The "Forehead Eye" Fix